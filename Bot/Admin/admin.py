@@ -1,21 +1,36 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
+from typing import Optional, Set
 from utils.db import db
 
 
 class Admin(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Admin role IDs, loaded once and kept current by define/role deletes.
+        self._admin_role_ids: Optional[Set[int]] = None
+
+    async def cog_load(self):
+        try:
+            await self._load_admin_roles()
+        except Exception as e:
+            print(f"Could not load admin roles, will retry on first check: {e}")
+
+    async def _load_admin_roles(self) -> Set[int]:
+        admin_roles_records = await db.execute("SELECT role_id FROM admin_roles")
+        self._admin_role_ids = {record["role_id"] for record in admin_roles_records}
+        return self._admin_role_ids
 
     async def is_admin(self, member: discord.Member) -> bool:
         """Check if a member has an admin role."""
         try:
-            admin_roles_records = await db.execute("SELECT role_id FROM admin_roles")
-            if not admin_roles_records:
+            admin_role_ids = self._admin_role_ids
+            if admin_role_ids is None:
+                admin_role_ids = await self._load_admin_roles()
+            if not admin_role_ids:
                 return False
 
-            admin_role_ids = {record["role_id"] for record in admin_roles_records}
             member_role_ids = {role.id for role in member.roles}
 
             return not admin_role_ids.isdisjoint(member_role_ids)
@@ -23,6 +38,17 @@ class Admin(commands.Cog):
             print(f"An error occurred in is_admin check: {e}")
             return False
 
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Forget admin roles that no longer exist."""
+        if self._admin_role_ids is None or role.id not in self._admin_role_ids:
+            return
+        self._admin_role_ids.discard(role.id)
+        try:
+            await db.execute("DELETE FROM admin_roles WHERE role_id = $1", role.id)
+        except Exception as e:
+            print(f"Failed to remove deleted admin role {role.id}: {e}")
+
     admin = app_commands.Group(name="admin", description="Admin commands")
 
     @admin.command(name="define", description="Define an admin role.")
@@ -45,21 +71,48 @@ class Admin(commands.Cog):
         await interaction.response.defer()
         try:
             # Check if the role already exists
-            existing_role = await db.execute(
-                "SELECT * FROM admin_roles WHERE role_id = $1", role.id
-            )
-            if existing_role:
+            admin_role_ids = self._admin_role_ids
+            if admin_role_ids is None:
+                admin_role_ids = await self._load_admin_roles()
+            if role.id in admin_role_ids:
                 await interaction.followup.send(
                     f"Role {role.mention} is already an admin role."
                 )
                 return
-            await db.execute("INSERT INTO admin_roles (role_id) VALUES ($1)", role.id)
+            await db.execute(
+                "INSERT INTO admin_roles (role_id) VALUES ($1) ON CONFLICT DO NOTHING",
+                role.id,
+            )
+            # Write-through so the next permission check sees the new role.
+            admin_role_ids.add(role.id)
             await interaction.followup.send(
                 f"Role {role.mention} has been added as an admin role."
             )
         except Exception as e:
             await interaction.followup.send(f"An error occurred: {e}")
 
+    @admin.command(name="db_stats", description="Show database queue metrics.")
+    async def db_stats(self, interaction: discord.Interaction):
+        """Show DB worker queue depth and wait times."""
+        if not isinstance(interaction.user, discord.Member) or not await self.is_admin(
+            interaction.user
+        ):
+            await interaction.response.send_message(
+                "You do not have permission to use this command.", ephemeral=True
+            )
+            return
+
+        stats = db.stats()
+        lines = [
+            "**Database Queue**",
+            f"Workers: `{stats['workers']}`",
+            f"Queue depth: `{stats['queue_depth']}` (max `{stats['max_queue_depth']}`)",
+            f"Completed: `{stats['completed']}` | Failed: `{stats['failed']}` | Read-only: `{stats['readonly']}`",
+            f"Wait: avg `{stats['avg_wait_ms']:.1f}ms` | max `{stats['max_wait_ms']:.1f}ms`",
+            f"Run: avg `{stats['avg_run_ms']:.1f}ms` | max `{stats['max_run_ms']:.1f}ms`",
+        ]
+        await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(Admin(bot))
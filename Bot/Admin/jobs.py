@@ -0,0 +1,80 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from typing import Optional
+from utils.jobs import job_manager
+from Admin.admin import Admin
+
+
+class Jobs(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    async def _check_admin(self, interaction: discord.Interaction) -> bool:
+        admin_cog = self.bot.get_cog("Admin")
+        if (
+            not isinstance(admin_cog, Admin)
+            or not isinstance(interaction.user, discord.Member)
+            or not await admin_cog.is_admin(interaction.user)
+        ):
+            await interaction.response.send_message(
+                "You do not have permission to use this command.", ephemeral=True
+            )
+            return False
+        return True
+
+    job = app_commands.Group(name="job", description="Background job commands")
+
+    @job.command(name="status", description="Show the status of background jobs.")
+    @app_commands.describe(job_id="The job to show. Leave empty to list recent jobs.")
+    async def status(self, interaction: discord.Interaction, job_id: Optional[int] = None):
+        """Show one job, or the most recent jobs in this server."""
+        if not await self._check_admin(interaction):
+            return
+
+        if job_id is not None:
+            job = job_manager.get(job_id)
+            if job is None or job.guild_id != interaction.guild.id:
+                await interaction.response.send_message(
+                    f"No job found with ID `#{job_id}`.", ephemeral=True
+                )
+                return
+            await interaction.response.send_message(job.describe(), ephemeral=True)
+            return
+
+        jobs = job_manager.list(interaction.guild.id)[:10]
+        if not jobs:
+            await interaction.response.send_message("No jobs have been run.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            "\n".join(job.describe() for job in jobs), ephemeral=True
+        )
+
+    @job.command(name="cancel", description="Cancel a running background job.")
+    @app_commands.describe(job_id="The job to cancel.")
+    async def cancel(self, interaction: discord.Interaction, job_id: int):
+        """Cancel a queued or running job."""
+        if not await self._check_admin(interaction):
+            return
+
+        job = job_manager.get(job_id)
+        if job is None or job.guild_id != interaction.guild.id:
+            await interaction.response.send_message(
+                f"No job found with ID `#{job_id}`.", ephemeral=True
+            )
+            return
+
+        if not job_manager.cancel(job_id):
+            await interaction.response.send_message(
+                f"Job `#{job_id}` has already finished ({job.status}).", ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(
+            f"Cancelling job `#{job_id}` **{job.name}**. Work already done is kept.",
+            ephemeral=True,
+        )
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Jobs(bot))
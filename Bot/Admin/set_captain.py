@@ -3,6 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 from typing import List, cast
 from utils.db import db
+from utils.name_index import active_team_nicks
+from utils.search import find_by_name, did_you_mean
 from Admin.admin import Admin
 
 
@@ -41,13 +43,16 @@ class SetCaptain(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            teams = await db.execute(
-                "SELECT team_id FROM teams WHERE team_nick = $1 AND archived = FALSE",
+            teams, team_nick, suggestions = await find_by_name(
+                "active_teams",
                 team_nick,
+                lambda nick: db.execute(
+                    "SELECT team_id FROM teams WHERE team_nick = $1 AND archived = FALSE", nick
+                ),
             )
             if not teams:
                 await interaction.followup.send(
-                    f"Active team `{team_nick}` not found."
+                    f"Active team `{team_nick}` not found." + did_you_mean(suggestions)
                 )
                 return
 
@@ -74,14 +79,7 @@ class SetCaptain(commands.Cog):
     async def team_nick_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        records = await db.execute(
-            "SELECT team_nick FROM teams WHERE team_nick ILIKE $1 AND archived = FALSE LIMIT 25",
-            f"%{current}%",
-        )
-        return [
-            app_commands.Choice(name=r["team_nick"], value=r["team_nick"])
-            for r in records
-        ]
+        return await active_team_nicks.choices(current)
 
 
 async def setup(bot: commands.Bot):
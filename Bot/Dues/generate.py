@@ -1,12 +1,250 @@
+import asyncio
+import time
 import discord
 from discord import app_commands
 from discord.ext import commands
 from utils.db import db
+from utils.settings import settings_cache
+from utils.jobs import Job, job_manager
 from Admin.admin import Admin
 import openpyxl
-from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
 from io import BytesIO
 
+# Every active team with its roster in one round trip. Teams without members
+# still produce a row (with NULL member columns) so they appear in the report.
+db.register_statement(
+    "dues_rosters",
+    """
+    SELECT t.team_id, t.team_nick, t.category_id, t.captain_discord_id,
+           tm.player_discord_id, tm.member_status, p.rcsid
+    FROM teams t
+    LEFT JOIN team_members tm ON tm.team_id = t.team_id
+    LEFT JOIN players p ON p.player_discord_id = tm.player_discord_id
+    WHERE t.archived = FALSE
+    ORDER BY t.category_id, t.team_nick, t.team_id
+    """,
+)
+
+
+def _group_rosters(rows, guild):
+    """
+    Group the joined roster rows into {category_id: [team, ...]}, resolving each
+    player's display name and username from the member cache.
+    """
+    teams_by_category = {}
+    teams_by_id = {}
+    for row in rows:
+        team = teams_by_id.get(row["team_id"])
+        if team is None:
+            team = {
+                "team_nick": row["team_nick"],
+                "captain_discord_id": row["captain_discord_id"],
+                "members": [],
+            }
+            teams_by_id[row["team_id"]] = team
+            teams_by_category.setdefault(row["category_id"], []).append(team)
+
+        p_id = row["player_discord_id"]
+        if p_id is None:
+            continue
+        member = guild.get_member(p_id) if guild else None
+        team["members"].append(
+            {
+                "player_discord_id": p_id,
+                "member_status": row["member_status"],
+                "rcsid": row["rcsid"],
+                "full_name": member.display_name if member else "Unknown",
+                "discord_username": member.name if member else "Unknown",
+            }
+        )
+    return teams_by_category
+
+
+HEADERS = ["Full Name", "Discord username", "RCSID", "Role", "$", "initials here"]
+DISCLAIMER = "I understand that I may be charged a $10/25 club fee if I am a member"
+
+
+def _register_styles(wb):
+    """Register the report's named styles once so cells share them by name."""
+    thin = Side(style="thin")
+    thin_border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+    def solid(color):
+        return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+    styles = [
+        NamedStyle(name="dues_separator", fill=solid("000000")),
+        NamedStyle(name="dues_captain_label", fill=solid("FFFF00")),
+        NamedStyle(name="dues_box", fill=solid("FF0000")),
+        NamedStyle(name="dues_header", fill=solid("D3D3D3"), border=thin_border),
+        NamedStyle(name="dues_cell", border=thin_border),
+        NamedStyle(name="dues_captain", fill=solid("FFFF00"), border=thin_border),
+    ]
+    for style in styles:
+        wb.add_named_style(style)
+
+
+def _team_rows(team, starter_dues, sub_dues):
+    """Yield the rows for one team block as lists of (value, style name) pairs."""
+    captain_id = team["captain_discord_id"]
+    members_records = team["members"]
+    starters_count = sum(1 for m in members_records if m["member_status"] == "starter")
+    subs_count = sum(1 for m in members_records if m["member_status"] == "sub")
+
+    # Black separator boxes * 6
+    yield [(None, "dues_separator")] * 6
+    # Team name, yellow captain label, red dues boxes
+    yield [
+        ("Team Name:", None),
+        (team["team_nick"], None),
+        ("Captain", "dues_captain_label"),
+        (None, "dues_box"),
+        (None, "dues_box"),
+        (f"Starters = ${starter_dues}", "dues_box"),
+    ]
+    yield [
+        ("# of players", None),
+        (f"{starters_count} + {subs_count}", None),
+        (None, None),
+        (None, "dues_box"),
+        (f"Subs = ${sub_dues}", "dues_box"),
+    ]
+    yield [("League", None), (None, None), (None, None), (None, None), (DISCLAIMER, None)]
+    # Grey headers
+    yield [(header, "dues_header") for header in HEADERS]
+
+    for member_record in members_records:
+        status = member_record["member_status"]
+        player_due = starter_dues if status == "starter" else sub_dues
+        style = (
+            "dues_captain"
+            if member_record["player_discord_id"] == captain_id
+            else "dues_cell"
+        )
+        values = [
+            member_record["full_name"],
+            member_record["discord_username"],
+            member_record["rcsid"] or "",
+            status,
+            f"${player_due}",
+            "",
+        ]
+        yield [(value, style) for value in values]
+
+
+def _build_workbook(sheets, starter_dues, sub_dues) -> BytesIO:
+    """
+    Build the dues workbook from [(sheet_name, teams), ...] in openpyxl's
+    write-only mode and return it as a buffer. Works on plain data only so it
+    can run off the event loop.
+    """
+    wb = openpyxl.Workbook(write_only=True)
+    _register_styles(wb)
+
+    for sheet_name, cat_teams in sheets:
+        ws = wb.create_sheet(title=sheet_name)
+
+        # Generate the rows first, tracking column widths as we go; write-only
+        # sheets need their widths before the first row is streamed.
+        rows = []
+        widths = {}
+        for index, team in enumerate(cat_teams):
+            if index:
+                # Two blank rows between teams
+                rows.extend([[], []])
+            for row in _team_rows(team, starter_dues, sub_dues):
+                rows.append(row)
+                for col, (value, _) in enumerate(row, 1):
+                    # Blank cells count as "None" (4 chars), matching the old
+                    # width calculation over every cell in the sheet.
+                    widths[col] = max(widths.get(col, 0), len(str(value)))
+
+        for col, width in widths.items():
+            ws.column_dimensions[get_column_letter(col)].width = width + 2
+
+        for row in rows:
+            cells = []
+            for value, style in row:
+                if style is None:
+                    cells.append(value)
+                    continue
+                cell = WriteOnlyCell(ws, value=value)
+                cell.style = style
+                cells.append(cell)
+            ws.append(cells)
+
+    # Save to buffer
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def _sheet_name(guild, cat_id) -> str:
+    category = guild.get_channel(cat_id) if guild else None
+    cat_name = category.name if category else f"Category {cat_id}"
+
+    # Sanitize sheet name (max 31 chars, no invalid chars)
+    sheet_name = "".join(c for c in cat_name if c.isalnum() or c in " -_")[:30]
+    if not sheet_name:
+        sheet_name = f"Cat_{cat_id}"
+    return sheet_name
+
+
+async def _generate_report(job: Job, guild: discord.Guild):
+    """
+    Build the dues report and upload it to the job's channel. Runs as a
+    background job; returns a message when there is nothing to report.
+    """
+    db_started = time.perf_counter()
+    # Fetch dues
+    dues_record = await db.execute("SELECT * FROM dues LIMIT 1")
+    if not dues_record:
+        return "Dues have not been set. Please use /set_dues_* commands first."
+    dues = dues_record[0]
+    starter_dues = dues["starters"]
+    sub_dues = dues["substitues"]
+    # non_player_dues = dues['non_player']
+
+    # Fetch every active team and its roster in one query
+    roster_rows = await db.execute_named("dues_rosters")
+    db_time = time.perf_counter() - db_started
+    if not roster_rows:
+        return "No active teams found."
+    await job.report(1, 3, "building workbook")
+
+    build_started = time.perf_counter()
+    teams_by_category = _group_rosters(roster_rows, guild)
+    sheets = [
+        (_sheet_name(guild, cat_id), cat_teams)
+        for cat_id, cat_teams in teams_by_category.items()
+    ]
+    loop = asyncio.get_event_loop()
+    buffer = await loop.run_in_executor(
+        None, _build_workbook, sheets, starter_dues, sub_dues
+    )
+    build_time = time.perf_counter() - build_started
+    await job.report(2, 3, "uploading")
+
+    team_count = sum(len(cat_teams) for _, cat_teams in sheets)
+    summary = f"Dues report for {team_count} teams."
+    upload_started = time.perf_counter()
+    message = await job.channel.send(
+        summary, file=discord.File(buffer, filename="dues.xlsx")
+    )
+    upload_time = time.perf_counter() - upload_started
+    await job.report(3, 3, "uploaded")
+
+    await message.edit(
+        content=(
+            f"{summary}\n"
+            f"DB: `{db_time:.2f}s` | Workbook: `{build_time:.2f}s` | Upload: `{upload_time:.2f}s`"
+        )
+    )
+
 
 class GenerateDues(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -30,233 +268,24 @@ class GenerateDues(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            # Fetch dues
-            dues_record = await db.execute("SELECT * FROM dues LIMIT 1")
-            if not dues_record:
+            guild = interaction.guild
+            settings = await settings_cache.get(guild)
+            engineer_channel = settings.engineer_channel if settings else None
+            if not engineer_channel:
                 await interaction.followup.send(
-                    "Dues have not been set. Please use /set_dues_* commands first."
+                    "Could not find the engineer channel. Please ensure the bot has been set up correctly."
                 )
                 return
-            dues = dues_record[0]
-            starter_dues = dues["starters"]
-            sub_dues = dues["substitues"]
-            # non_player_dues = dues['non_player']
-
-            # Fetch active teams
-            teams = await db.execute(
-                "SELECT * FROM teams WHERE archived = FALSE ORDER BY category_id, team_nick"
-            )
-            if not teams:
-                await interaction.followup.send("No active teams found.")
-                return
 
-            # Create Workbook
-            wb = openpyxl.Workbook()
-            # Remove default sheet
-            default_sheet = wb.active
-            if default_sheet is not None:
-                wb.remove(default_sheet)
-
-            # Styles
-            black_fill = PatternFill(
-                start_color="000000", end_color="000000", fill_type="solid"
-            )
-            yellow_fill = PatternFill(
-                start_color="FFFF00", end_color="FFFF00", fill_type="solid"
+            job = job_manager.submit(
+                "dues report",
+                lambda job: _generate_report(job, guild),
+                guild_id=guild.id,
+                user_id=interaction.user.id,
+                channel=engineer_channel,
             )
-            red_fill = PatternFill(
-                start_color="FF0000", end_color="FF0000", fill_type="solid"
-            )
-            grey_fill = PatternFill(
-                start_color="D3D3D3", end_color="D3D3D3", fill_type="solid"
-            )
-
-            thin_border = Border(
-                left=Side(style="thin"),
-                right=Side(style="thin"),
-                top=Side(style="thin"),
-                bottom=Side(style="thin"),
-            )
-
-            # Group teams by category
-            teams_by_category = {}
-            for team in teams:
-                cat_id = team["category_id"]
-                if cat_id not in teams_by_category:
-                    teams_by_category[cat_id] = []
-                teams_by_category[cat_id].append(team)
-
-            for cat_id, cat_teams in teams_by_category.items():
-                category = (
-                    interaction.guild.get_channel(cat_id) if interaction.guild else None
-                )
-                cat_name = category.name if category else f"Category {cat_id}"
-
-                # Sanitize sheet name (max 31 chars, no invalid chars)
-                sheet_name = "".join(c for c in cat_name if c.isalnum() or c in " -_")[
-                    :30
-                ]
-                if not sheet_name:
-                    sheet_name = f"Cat_{cat_id}"
-
-                ws = wb.create_sheet(title=sheet_name)
-
-                current_row = 1
-
-                for team in cat_teams:
-                    team_id = team["team_id"]
-                    team_nick = team["team_nick"]
-                    captain_id = team["captain_discord_id"]
-
-                    # Fetch members
-                    members_records = await db.execute(
-                        """
-                        SELECT tm.player_discord_id, tm.member_status, p.rcsid 
-                        FROM team_members tm
-                        LEFT JOIN players p ON tm.player_discord_id = p.player_discord_id
-                        WHERE tm.team_id = $1
-                    """,
-                        team_id,
-                    )
-
-                    starters_count = sum(
-                        1 for m in members_records if m["member_status"] == "starter"
-                    )
-                    subs_count = sum(
-                        1 for m in members_records if m["member_status"] == "sub"
-                    )
-                    total_players = len(members_records)
-
-                    # ROW 0: Black boxes * 6
-                    for col in range(1, 7):
-                        cell = ws.cell(row=current_row, column=col)
-                        cell.fill = black_fill
-                    current_row += 1
-
-                    # ROW 1
-                    # Col A: Team Name:
-                    ws.cell(row=current_row, column=1, value="Team Name:")
-                    # Col B: [Team Name]
-                    ws.cell(row=current_row, column=2, value=team_nick)
-                    # Col C: Captain (Yellow)
-                    c_cell = ws.cell(row=current_row, column=3, value="Captain")
-                    c_cell.fill = yellow_fill
-                    # Col D: Red box
-                    ws.cell(row=current_row, column=4).fill = red_fill
-                    # Col E: Red highlight box
-                    ws.cell(row=current_row, column=5).fill = red_fill
-                    # Col F: starters = $... (Red highlight box?)
-                    f_cell = ws.cell(
-                        row=current_row, column=6, value=f"Starters = ${starter_dues}"
-                    )
-                    f_cell.fill = red_fill
-                    current_row += 1
-
-                    # ROW 2
-                    # Col A: # of players
-                    ws.cell(row=current_row, column=1, value="# of players")
-                    # Col B: [starters] + [subs]
-                    ws.cell(
-                        row=current_row,
-                        column=2,
-                        value=f"{starters_count} + {subs_count}",
-                    )
-                    # Col C: Blank
-                    # Col D: Red box
-                    ws.cell(row=current_row, column=4).fill = red_fill
-                    # Col E: (red box) Subs = $...
-                    e_cell = ws.cell(
-                        row=current_row, column=5, value=f"Subs = ${sub_dues}"
-                    )
-                    e_cell.fill = red_fill
-                    # Col F: Blank?
-                    current_row += 1
-
-                    # ROW 3
-                    # Col A: League
-                    ws.cell(row=current_row, column=1, value="League")
-                    # Col E: Disclaimer
-                    ws.cell(
-                        row=current_row,
-                        column=5,
-                        value="I understand that I may be charged a $10/25 club fee if I am a member",
-                    )
-                    current_row += 1
-
-                    # ROW 4: Headers (Grey)
-                    headers = [
-                        "Full Name",
-                        "Discord username",
-                        "RCSID",
-                        "Role",
-                        "$",
-                        "initials here",
-                    ]
-                    for col, header in enumerate(headers, 1):
-                        cell = ws.cell(row=current_row, column=col, value=header)
-                        cell.fill = grey_fill
-                        cell.border = thin_border
-                    current_row += 1
-
-                    # Player Rows
-                    for member_record in members_records:
-                        p_id = member_record["player_discord_id"]
-                        status = member_record["member_status"]
-                        rcsid = member_record["rcsid"] or ""
-
-                        member = (
-                            interaction.guild.get_member(p_id)
-                            if interaction.guild
-                            else None
-                        )
-                        full_name = member.display_name if member else "Unknown"
-                        discord_username = member.name if member else "Unknown"
-
-                        # Determine dues for this player
-                        player_due = starter_dues if status == "starter" else sub_dues
-
-                        row_values = [
-                            full_name,
-                            discord_username,
-                            rcsid,
-                            status,
-                            f"${player_due}",
-                            "",
-                        ]
-
-                        for col, val in enumerate(row_values, 1):
-                            cell = ws.cell(row=current_row, column=col, value=val)
-                            cell.border = thin_border
-
-                            # Highlight captain
-                            if p_id == captain_id:
-                                cell.fill = yellow_fill
-
-                        current_row += 1
-
-                    # Add some spacing between teams
-                    current_row += 2
-
-                # Adjust column widths
-                for col in ws.columns:
-                    max_length = 0
-                    column = col[0].column_letter  # Get the column name
-                    for cell in col:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = max_length + 2
-                    ws.column_dimensions[column].width = adjusted_width
-
-            # Save to buffer
-            buffer = BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-
             await interaction.followup.send(
-                file=discord.File(buffer, filename="dues.xlsx")
+                f"Dues report started as job `#{job.id}`. The file will be posted in {engineer_channel.mention}."
             )
 
         except Exception as e:
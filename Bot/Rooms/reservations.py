@@ -1,8 +1,150 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 from utils.db import db
+from utils.name_index import room_names
+
+db.register_statement(
+    "captain_team",
+    "SELECT team_id, team_nick FROM teams WHERE captain_discord_id = $1 AND archived = FALSE",
+)
+
+# Claims the slot and returns its details in one statement. The unique
+# slot_id makes concurrent reserves race-free: exactly one INSERT wins and
+# the rest come back with reserved = FALSE. No row means no such slot.
+RESERVE_SLOT_SQL = """
+WITH slot AS (
+    SELECT rs.slot_id, r.room_name, rs.start_time, rs.end_time
+    FROM room_slots rs
+    JOIN rooms r ON r.room_id = rs.room_id
+    WHERE rs.slot_id = $1
+), claimed AS (
+    INSERT INTO room_reservations (slot_id, team_id)
+    SELECT slot_id, $2 FROM slot
+    ON CONFLICT (slot_id) DO NOTHING
+    RETURNING slot_id
+)
+SELECT slot.*, claimed.slot_id IS NOT NULL AS reserved
+FROM slot
+LEFT JOIN claimed ON claimed.slot_id = slot.slot_id
+"""
+
+# Deletes the team's own reservation. holder_team_id is read from the
+# statement's snapshot, so it tells "not reserved" apart from "another team's".
+CANCEL_RESERVATION_SQL = """
+WITH deleted AS (
+    DELETE FROM room_reservations
+    WHERE slot_id = $1 AND team_id = $2
+    RETURNING reservation_id
+)
+SELECT
+    EXISTS (SELECT 1 FROM deleted) AS cancelled,
+    (SELECT team_id FROM room_reservations WHERE slot_id = $1) AS holder_team_id
+"""
+
+# One page of unreserved slots after the keyset ($1, $2), optionally
+# bounded by $3 and filtered by room name pattern $4. The row comparison
+# matches room_slots_start_time_idx, and the anti-join probes the unique
+# index on room_reservations.slot_id.
+AVAILABLE_SLOTS_SQL = """
+SELECT rs.slot_id, r.room_name, rs.start_time, rs.end_time
+FROM room_slots rs
+JOIN rooms r ON r.room_id = rs.room_id
+WHERE (rs.start_time, rs.slot_id) > ($1, $2)
+  AND ($3::timestamptz IS NULL OR rs.start_time < $3)
+  AND ($4::text IS NULL OR r.room_name ILIKE $4)
+  AND NOT EXISTS (
+      SELECT 1 FROM room_reservations rr WHERE rr.slot_id = rs.slot_id
+  )
+ORDER BY rs.start_time, rs.slot_id
+LIMIT $5
+"""
+
+# Rows per /list_rooms page; keeps the table well under 2000 characters.
+PAGE_SIZE = 20
+
+db.register_statement("reserve_slot", RESERVE_SLOT_SQL)
+db.register_statement("cancel_reservation", CANCEL_RESERVATION_SQL)
+db.register_statement("available_slots", AVAILABLE_SLOTS_SQL)
+
+
+class SlotPages(discord.ui.View):
+    """
+    Previous/Next buttons over the available slots. Pages are fetched by
+    keyset on (start_time, slot_id), so each page is an index range scan no
+    matter how far in the user has paged.
+    """
+
+    def __init__(self, owner_id: int, start: datetime, room_name: str = "", until: Optional[datetime] = None):
+        super().__init__(timeout=300)
+        self.owner_id = owner_id
+        self.room_name = room_name
+        self.pattern = f"%{room_name}%" if room_name else None
+        self.until = until
+        # The key each visited page starts after; the last one is the current page.
+        self.cursors: List[Tuple[datetime, int]] = [(start, 0)]
+        self.records = []
+        self.has_more = False
+        self.message: Optional[discord.Message] = None
+
+    async def load(self):
+        after_time, after_id = self.cursors[-1]
+        rows = await db.execute_named(
+            "available_slots", after_time, after_id, self.until, self.pattern, PAGE_SIZE + 1
+        )
+        self.records = rows[:PAGE_SIZE]
+        self.has_more = len(rows) > PAGE_SIZE
+        self.previous_button.disabled = len(self.cursors) == 1
+        self.next_button.disabled = not self.has_more
+
+    def render(self) -> str:
+        title = "**Available Room Slots**"
+        if self.room_name:
+            title += f" for `{self.room_name}`"
+        title += f" (page {len(self.cursors)})"
+        if not self.records:
+            return f"{title}\nNo more available slots."
+
+        lines = [title, "```"]
+        lines.append(f"{'#':<6} {'Room':<20} {'Start':<18} {'End':<10}")
+        lines.append("-" * 56)
+        for r in self.records:
+            start = r["start_time"].strftime("%Y-%m-%d %H:%M")
+            end = r["end_time"].strftime("%H:%M")
+            lines.append(f"{r['slot_id']:<6} {r['room_name'][:20]:<20} {start:<18} {end:<10}")
+        lines.append("```")
+        return "\n".join(lines)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message("This is not for you. Run `/list_rooms` yourself.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary)
+    async def previous_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.cursors.pop()
+        await self.load()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.primary)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        last = self.records[-1]
+        self.cursors.append((last["start_time"], last["slot_id"]))
+        await self.load()
+        await interaction.response.edit_message(content=self.render(), view=self)
+
+    async def on_timeout(self):
+        if self.message is None:
+            return
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
 
 
 class Reservations(commands.Cog):
@@ -11,10 +153,7 @@ class Reservations(commands.Cog):
 
     async def _get_captain_team(self, user_id: int):
         """Return the active team record for which this user is captain, or None."""
-        teams = await db.execute(
-            "SELECT team_id, team_nick FROM teams WHERE captain_discord_id = $1 AND archived = FALSE",
-            user_id,
-        )
+        teams = await db.execute_named("captain_team", user_id)
         return teams[0] if teams else None
 
     @app_commands.command(name="reserve", description="Reserve a room slot for your team (captains only).")
@@ -30,35 +169,18 @@ class Reservations(commands.Cog):
             return
 
         try:
-            slot = await db.execute(
-                """
-                SELECT rs.slot_id, r.room_name, rs.start_time, rs.end_time
-                FROM room_slots rs
-                JOIN rooms r ON r.room_id = rs.room_id
-                WHERE rs.slot_id = $1
-                """,
-                slot_id,
-            )
-            if not slot:
+            rows = await db.execute_named("reserve_slot", slot_id, team["team_id"])
+            if not rows:
                 await interaction.followup.send(f"Slot `#{slot_id}` not found.")
                 return
 
-            slot = slot[0]
-
-            existing = await db.execute(
-                "SELECT reservation_id FROM room_reservations WHERE slot_id = $1", slot_id
-            )
-            if existing:
+            slot = rows[0]
+            if not slot["reserved"]:
                 await interaction.followup.send(
                     f"Slot `#{slot_id}` is already reserved."
                 )
                 return
 
-            await db.execute(
-                "INSERT INTO room_reservations (slot_id, team_id) VALUES ($1, $2)",
-                slot_id,
-                team["team_id"],
-            )
             start = slot["start_time"].strftime("%Y-%m-%d %H:%M")
             end = slot["end_time"].strftime("%H:%M")
             await interaction.followup.send(
@@ -80,75 +202,53 @@ class Reservations(commands.Cog):
             return
 
         try:
-            reservation = await db.execute(
-                "SELECT reservation_id, team_id FROM room_reservations WHERE slot_id = $1",
-                slot_id,
-            )
-            if not reservation:
-                await interaction.followup.send(f"No reservation found for slot `#{slot_id}`.")
-                return
-
-            if reservation[0]["team_id"] != team["team_id"]:
-                await interaction.followup.send(
-                    "You can only cancel reservations made by your own team."
-                )
+            rows = await db.execute_named("cancel_reservation", slot_id, team["team_id"])
+            result = rows[0]
+            if not result["cancelled"]:
+                if result["holder_team_id"] is None:
+                    await interaction.followup.send(f"No reservation found for slot `#{slot_id}`.")
+                else:
+                    await interaction.followup.send(
+                        "You can only cancel reservations made by your own team."
+                    )
                 return
 
-            await db.execute(
-                "DELETE FROM room_reservations WHERE slot_id = $1", slot_id
-            )
             await interaction.followup.send(
                 f"Reservation for slot `#{slot_id}` cancelled."
             )
         except Exception as e:
             await interaction.followup.send(f"Error: {e}")
 
-    @app_commands.command(name="list_rooms", description="View all available (unreserved) room slots.")
-    @app_commands.describe(room_name="Filter by room name (optional)")
-    async def list_rooms(self, interaction: discord.Interaction, room_name: str = ""):
+    @app_commands.command(name="list_rooms", description="View available (unreserved) upcoming room slots.")
+    @app_commands.describe(
+        room_name="Filter by room name (optional)",
+        days="Only show slots starting within this many days (optional)",
+    )
+    async def list_rooms(
+        self,
+        interaction: discord.Interaction,
+        room_name: str = "",
+        days: Optional[app_commands.Range[int, 1, 365]] = None,
+    ):
         await interaction.response.defer()
 
         try:
-            if room_name:
-                records = await db.execute(
-                    """
-                    SELECT rs.slot_id, r.room_name, rs.start_time, rs.end_time
-                    FROM room_slots rs
-                    JOIN rooms r ON r.room_id = rs.room_id
-                    LEFT JOIN room_reservations rr ON rr.slot_id = rs.slot_id
-                    WHERE rr.slot_id IS NULL AND r.room_name ILIKE $1
-                    ORDER BY rs.start_time
-                    """,
-                    f"%{room_name}%",
-                )
-            else:
-                records = await db.execute(
-                    """
-                    SELECT rs.slot_id, r.room_name, rs.start_time, rs.end_time
-                    FROM room_slots rs
-                    JOIN rooms r ON r.room_id = rs.room_id
-                    LEFT JOIN room_reservations rr ON rr.slot_id = rs.slot_id
-                    WHERE rr.slot_id IS NULL
-                    ORDER BY rs.start_time
-                    """
-                )
+            now = discord.utils.utcnow()
+            until = now + timedelta(days=days) if days else None
+            pages = SlotPages(interaction.user.id, now, room_name, until)
+            await pages.load()
 
-            if not records:
+            if not pages.records:
                 msg = "No available slots"
-                msg += f" for `{room_name}`." if room_name else "."
+                msg += f" for `{room_name}`" if room_name else ""
+                msg += f" in the next {days} days." if days else "."
                 await interaction.followup.send(msg)
                 return
 
-            lines = ["**Available Room Slots**", "```"]
-            lines.append(f"{'#':<6} {'Room':<20} {'Start':<18} {'End':<10}")
-            lines.append("-" * 56)
-            for r in records:
-                start = r["start_time"].strftime("%Y-%m-%d %H:%M")
-                end = r["end_time"].strftime("%H:%M")
-                lines.append(f"{r['slot_id']:<6} {r['room_name']:<20} {start:<18} {end:<10}")
-            lines.append("```")
-
-            await interaction.followup.send("\n".join(lines))
+            if pages.has_more:
+                pages.message = await interaction.followup.send(pages.render(), view=pages)
+            else:
+                await interaction.followup.send(pages.render())
         except Exception as e:
             await interaction.followup.send(f"Error: {e}")
 
@@ -156,14 +256,7 @@ class Reservations(commands.Cog):
     async def room_name_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        records = await db.execute(
-            "SELECT room_name FROM rooms WHERE room_name ILIKE $1 LIMIT 25",
-            f"%{current}%",
-        )
-        return [
-            app_commands.Choice(name=r["room_name"], value=r["room_name"])
-            for r in records
-        ]
+        return await room_names.choices(current)
 
 
 async def setup(bot: commands.Bot):
@@ -1,10 +1,38 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-from typing import List, cast
+from datetime import date, datetime, time, timedelta
+from typing import List, Set, Tuple, cast
 from utils.db import db
+from utils.name_index import room_names
+from utils.search import find_by_name, did_you_mean
 from Admin.admin import Admin
 
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MAX_BULK_SLOTS = 500  # Upper bound on slots created by one add_weekly_slots
+
+
+def parse_weekdays(text: str) -> Set[int]:
+    """Parse `mon,wed,fri` (any case; full names or 3+ letter prefixes) into weekday numbers."""
+    days = set()
+    for part in text.replace(" ", "").lower().split(","):
+        matches = [i for i, name in enumerate(WEEKDAYS) if len(part) >= 3 and name.startswith(part)]
+        if not matches:
+            raise ValueError(part)
+        days.add(matches[0])
+    return days
+
+
+def weekly_slots(first_day: date, last_day: date, weekdays: Set[int], start: time, end: time) -> List[Tuple[datetime, datetime]]:
+    """Every (start, end) on the given weekdays from first_day to last_day inclusive."""
+    slots = []
+    day = first_day
+    while day <= last_day:
+        if day.weekday() in weekdays:
+            slots.append((datetime.combine(day, start), datetime.combine(day, end)))
+        day += timedelta(days=1)
+    return slots
+
 
 class Rooms(commands.Cog):
     def __init__(self, bot: commands.Bot):
@@ -50,6 +78,7 @@ class Rooms(commands.Cog):
                 name,
                 description or None,
             )
+            room_names.add(name)
             await interaction.followup.send(f"Room `{name}` added.")
         except Exception as e:
             await interaction.followup.send(f"Error: {e}")
@@ -89,11 +118,13 @@ class Rooms(commands.Cog):
             return
 
         try:
-            room = await db.execute(
-                "SELECT room_id FROM rooms WHERE room_name = $1", room_name
+            room, room_name, suggestions = await find_by_name(
+                "rooms",
+                room_name,
+                lambda name: db.execute("SELECT room_id FROM rooms WHERE room_name = $1", name),
             )
             if not room:
-                await interaction.followup.send(f"Room `{room_name}` not found.")
+                await interaction.followup.send(f"Room `{room_name}` not found." + did_you_mean(suggestions))
                 return
 
             room_id = room[0]["room_id"]
@@ -110,6 +141,131 @@ class Rooms(commands.Cog):
         except Exception as e:
             await interaction.followup.send(f"Error: {e}")
 
+    @room.command(name="add_weekly_slots", description="(Admin) Add a slot to a room on the same weekdays every week.")
+    @app_commands.describe(
+        room_name="Name of the room",
+        weekdays="Days of the week, comma-separated (e.g. mon,wed,fri)",
+        first_date="First date to create slots on (YYYY-MM-DD)",
+        last_date="Last date to create slots on, inclusive (YYYY-MM-DD)",
+        start_time="Start time each day (HH:MM)",
+        end_time="End time each day (HH:MM)",
+    )
+    async def add_weekly_slots(
+        self,
+        interaction: discord.Interaction,
+        room_name: str,
+        weekdays: str,
+        first_date: str,
+        last_date: str,
+        start_time: str,
+        end_time: str,
+    ):
+        if not await self._is_admin(interaction):
+            await interaction.response.send_message(
+                "You do not have permission to use this command.", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        try:
+            days = parse_weekdays(weekdays)
+        except ValueError as e:
+            await interaction.followup.send(
+                f"Unknown weekday `{e}`. Use names like `mon,wed,fri`."
+            )
+            return
+        try:
+            first_day = date.fromisoformat(first_date)
+            last_day = date.fromisoformat(last_date)
+            start = time.fromisoformat(start_time)
+            end = time.fromisoformat(end_time)
+        except ValueError:
+            await interaction.followup.send(
+                "Invalid date or time format. Use `YYYY-MM-DD` for dates and `HH:MM` for times."
+            )
+            return
+
+        if end <= start:
+            await interaction.followup.send("End time must be after start time.")
+            return
+        if last_day < first_day:
+            await interaction.followup.send("The last date must not be before the first date.")
+            return
+
+        slots = weekly_slots(first_day, last_day, days, start, end)
+        if not slots:
+            await interaction.followup.send("No dates in that range fall on the given weekdays.")
+            return
+        if len(slots) > MAX_BULK_SLOTS:
+            await interaction.followup.send(
+                f"That would create {len(slots)} slots; the limit is {MAX_BULK_SLOTS} per command."
+            )
+            return
+
+        starts = [slot[0] for slot in slots]
+        ends = [slot[1] for slot in slots]
+
+        async def create(connection, room_name):
+            # Locking the room row serializes bulk adds to the same room.
+            room = await connection.fetchrow(
+                "SELECT room_id FROM rooms WHERE room_name = $1 FOR UPDATE", room_name
+            )
+            if room is None:
+                return None
+            conflicts = await connection.fetch(
+                """
+                SELECT DISTINCT rs.slot_id, rs.start_time, rs.end_time
+                FROM room_slots rs
+                JOIN unnest($2::timestamptz[], $3::timestamptz[]) AS new (start_time, end_time)
+                  ON rs.start_time < new.end_time AND rs.end_time > new.start_time
+                WHERE rs.room_id = $1
+                ORDER BY rs.start_time
+                """,
+                room["room_id"], starts, ends,
+            )
+            if conflicts:
+                return conflicts, []
+            created = await connection.fetch(
+                """
+                INSERT INTO room_slots (room_id, start_time, end_time)
+                SELECT $1, * FROM unnest($2::timestamptz[], $3::timestamptz[])
+                RETURNING slot_id
+                """,
+                room["room_id"], starts, ends,
+            )
+            return [], created
+
+        try:
+            result, room_name, suggestions = await find_by_name(
+                "rooms",
+                room_name,
+                lambda name: db.run_in_transaction(lambda c: create(c, name)),
+            )
+        except Exception as e:
+            await interaction.followup.send(f"Error: {e}")
+            return
+
+        if result is None:
+            await interaction.followup.send(f"Room `{room_name}` not found." + did_you_mean(suggestions))
+            return
+        conflicts, created = result
+        if conflicts:
+            lines = [f"No slots were added: {len(conflicts)} existing slot(s) in `{room_name}` overlap."]
+            for c in conflicts[:10]:
+                lines.append(
+                    f"• `#{c['slot_id']}` {c['start_time'].strftime('%Y-%m-%d %H:%M')} — {c['end_time'].strftime('%H:%M')}"
+                )
+            if len(conflicts) > 10:
+                lines.append(f"...and {len(conflicts) - 10} more.")
+            await interaction.followup.send("\n".join(lines))
+            return
+
+        slot_ids = [r["slot_id"] for r in created]
+        await interaction.followup.send(
+            f"Added {len(slot_ids)} slots to `{room_name}` (`#{min(slot_ids)}`–`#{max(slot_ids)}`), "
+            f"{first_day} to {last_day}, {start_time} — {end_time}."
+        )
+
     @room.command(name="remove_slot", description="(Admin) Remove a time slot (and its reservation if any).")
     @app_commands.describe(slot_id="Slot ID to remove")
     async def remove_slot(self, interaction: discord.Interaction, slot_id: int):
@@ -134,17 +290,11 @@ class Rooms(commands.Cog):
             await interaction.followup.send(f"Error: {e}")
 
     @add_slot.autocomplete("room_name")
+    @add_weekly_slots.autocomplete("room_name")
     async def room_name_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        records = await db.execute(
-            "SELECT room_name FROM rooms WHERE room_name ILIKE $1 LIMIT 25",
-            f"%{current}%",
-        )
-        return [
-            app_commands.Choice(name=r["room_name"], value=r["room_name"])
-            for r in records
-        ]
+        return await room_names.choices(current)
 
 
 async def setup(bot: commands.Bot):
@@ -2,31 +2,17 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from utils.db import db
+from utils.settings import settings_cache
+from utils.jobs import Job, job_manager
+from utils.user_init import add_users
+from utils.concurrency import bounded_gather
+from utils.role_utils import ROLE_EDIT_LIMIT
 from Admin.admin import Admin
 
-async def add_user(user_id: int, years_remaining: int = None):
-    """
-    Adds or updates a user in the database.
-
-    Args:
-        user_id (int): The Discord ID of the user.
-        years_remaining (int, optional): The number of years remaining for the user. Defaults to None.
-    """
-    await db.execute(
-        """
-        INSERT INTO users (discord_id, years_remaining)
-        VALUES ($1, $2)
-        ON CONFLICT (discord_id) DO UPDATE SET
-        years_remaining = EXCLUDED.years_remaining;
-        """,
-        user_id,
-        years_remaining
-    )
-
-
-async def _backfill_users(guild: discord.Guild, role_objects: dict, engineer_channel: discord.TextChannel, assign_verified_role=False):
+async def _backfill_users(guild: discord.Guild, role_objects: dict, assign_verified_role=False, job: Job = None) -> str:
     """
     Backfills the DB. If assign_verified_role is True, grants 'Verified' to users with no role.
+    Returns the log message; progress is reported to `job` when one is given.
     """
     logs = ["**Starting Database Backfill**\n---"]
     
@@ -43,11 +29,23 @@ async def _backfill_users(guild: discord.Guild, role_objects: dict, engineer_cha
     logs.append(f"Found `{len(existing_user_ids)}` users in DB.")
     logs.append("---")
     
-    backfill_count = 0
     verified_role = role_objects.get('Verified')
     managed_roles = {role for role in role_objects.values() if role is not None}
 
-    for member in guild.members:
+    # Status role -> years_remaining, checked in priority order.
+    status_years = [
+        (role_objects.get('Student'), 1, "Found existing **Student** `{}` and added to DB."),
+        (role_objects.get('Alumni'), 0, "Found existing **Alumni** `{}` and added to DB."),
+        (role_objects.get('Friend'), -1, "Found existing **Friend** `{}` and added to DB."),
+        (verified_role, -2, "Found existing **Verified** user `{}` and added to DB."),
+    ]
+
+    users = []
+    needs_verified = []
+    members = list(guild.members)
+    for index, member in enumerate(members, 1):
+        if job is not None:
+            await job.report(index, len(members), "scanning members")
         if member.bot or member.id in existing_user_ids:
             continue
 
@@ -56,42 +54,44 @@ async def _backfill_users(guild: discord.Guild, role_objects: dict, engineer_cha
         if not member_has_managed_role:
             if assign_verified_role:
                 if verified_role:
-                    try:
-                        await member.add_roles(verified_role)
-                        await add_user(member.id, -2)
-                        backfill_count += 1
-                        logs.append(f"User `{member.name}` had no role. Granted **Verified**.")
-                    except discord.Forbidden:
-                        logs.append(f"Could not grant Verified to `{member.name}`. Check permissions.")
+                    needs_verified.append(member)
                 else:
                     logs.append(f"Could not grant Verified to `{member.name}` (role not configured).")
         else:
-            if role_objects.get('Student') in member.roles:
-                await add_user(member.id, 1)
-                logs.append(f"Found existing **Student** `{member.name}` and added to DB.")
-                backfill_count += 1
-            elif role_objects.get('Alumni') in member.roles:
-                await add_user(member.id, 0)
-                logs.append(f"Found existing **Alumni** `{member.name}` and added to DB.")
-                backfill_count += 1
-            elif role_objects.get('Friend') in member.roles:
-                await add_user(member.id, -1)
-                logs.append(f"Found existing **Friend** `{member.name}` and added to DB.")
-                backfill_count += 1
-            elif verified_role in member.roles:
-                 await add_user(member.id, -2)
-                 logs.append(f"Found existing **Verified** user `{member.name}` and added to DB.")
-                 backfill_count += 1
+            for role, years, message in status_years:
+                if role is not None and role in member.roles:
+                    users.append((member.id, years))
+                    logs.append(message.format(member.name))
+                    break
+
+    if needs_verified:
+        async def report_grants(done):
+            if job is not None:
+                await job.report(done, len(needs_verified), "granting Verified")
+
+        results = await bounded_gather(
+            lambda member: member.add_roles(verified_role),
+            needs_verified,
+            limit=ROLE_EDIT_LIMIT,
+            on_done=report_grants,
+        )
+        for member, result in zip(needs_verified, results):
+            if isinstance(result, discord.Forbidden):
+                logs.append(f"Could not grant Verified to `{member.name}`. Check permissions.")
+            elif isinstance(result, Exception):
+                logs.append(f"Could not grant Verified to `{member.name}`: {result}")
+            else:
+                users.append((member.id, -2))
+                logs.append(f"User `{member.name}` had no role. Granted **Verified**.")
+
+    # One round trip for every new user instead of one per member.
+    await add_users(users)
+    backfill_count = len(users)
 
     logs.append("---\n**Database backfill complete.**")
     logs.append(f"Processed and added `{backfill_count}` users to the database.")
     
-    log_message = "\n".join(logs)
-    if len(log_message) > 2000:
-        await engineer_channel.send(log_message[:2000])
-        await engineer_channel.send(log_message[2000:])
-    else:
-        await engineer_channel.send(log_message)
+    return "\n".join(logs)
 
 
 class Backfill(commands.Cog):
@@ -115,26 +115,29 @@ class Backfill(commands.Cog):
 
         try:
             # We need the role objects and the engineer channel to run the backfill
-            settings_records = await db.execute("SELECT * FROM server_settings WHERE guild_id = $1", interaction.guild.id)
-            if not settings_records:
-                return "Server settings not found. Please ensure the bot has been set up correctly."
+            settings = await settings_cache.get(interaction.guild)
+            if settings is None:
+                return await interaction.followup.send("Server settings not found. Please ensure the bot has been set up correctly.")
                 
-            settings = settings_records[0]
-            engineer_channel = interaction.guild.get_channel(settings.get('engineer_channel_id'))
+            engineer_channel = settings.engineer_channel
             
             if not engineer_channel:
-                return "Could not find the engineer channel. Please ensure the bot has been set up correctly."
+                return await interaction.followup.send("Could not find the engineer channel. Please ensure the bot has been set up correctly.")
 
-            # Create a dictionary of the role objects needed by the backfill function
-            role_objects = {
-                'Student': interaction.guild.get_role(settings.get('student_id')),
-                'Alumni': interaction.guild.get_role(settings.get('alumni_id')),
-                'Friend': interaction.guild.get_role(settings.get('friend_id')),
-                'Verified': interaction.guild.get_role(settings.get('verified_id')),
-            }
+            # The role objects needed by the backfill function
+            role_objects = settings.status_roles()
             
-            await _backfill_users(interaction.guild, role_objects, engineer_channel, assign_verified_role=True)
-            await interaction.followup.send( "Backfill process complete. Check the engineer channel for detailed logs.")
+            guild = interaction.guild
+            job = job_manager.submit(
+                "backfill",
+                lambda job: _backfill_users(guild, role_objects, assign_verified_role=True, job=job),
+                guild_id=guild.id,
+                user_id=interaction.user.id,
+                channel=engineer_channel,
+            )
+            await interaction.followup.send(
+                f"Backfill started as job `#{job.id}`. Progress and logs will be posted in {engineer_channel.mention}."
+            )
         
         except Exception as e:
             await interaction.followup.send(f"An error occurred: {e}")
@@ -1,14 +1,16 @@
 import discord
 from utils.db import db
+from utils.settings import settings_cache
 from utils.verification import post_verification_message
 
 async def _init_guild_db(guild: discord.Guild):
     """Initializes the guild in the database."""
     await db.execute("INSERT INTO server_settings (guild_id) VALUES ($1) ON CONFLICT (guild_id) DO NOTHING", guild.id)
+    settings_cache.invalidate(guild.id)
 
 async def _create_initial_engineer_channel(guild: discord.Guild):
     """Creates or finds the engineer channel, setting initial bot-only permissions."""
-    settings_records = await db.execute("SELECT engineer_channel_id FROM server_settings WHERE guild_id = $1", guild.id)
+    settings_records = await db.execute_named("server_settings", guild.id)
     engineer_channel = None
     if settings_records and settings_records[0]['engineer_channel_id']:
         engineer_channel = guild.get_channel(settings_records[0]['engineer_channel_id'])
@@ -31,6 +33,7 @@ async def _create_initial_engineer_channel(guild: discord.Guild):
         await engineer_channel.send("This channel will be used for setup logs and leadership communication.")
 
     await db.execute("UPDATE server_settings SET engineer_channel_id = $1 WHERE guild_id = $2", engineer_channel.id, guild.id)
+    settings_cache.invalidate(guild.id)
     return engineer_channel
 
 async def _setup_roles(guild: discord.Guild, log_channel: discord.TextChannel):
@@ -62,6 +65,7 @@ async def _setup_roles(guild: discord.Guild, log_channel: discord.TextChannel):
         if role:
             role_objects[name] = role
             await db.execute(f"UPDATE server_settings SET {role_columns[name]} = $1 WHERE guild_id = $2", role.id, guild.id)
+    settings_cache.invalidate(guild.id)
     return role_objects
 
 async def _update_engineer_channel_perms(engineer_channel: discord.TextChannel, role_objects: dict):
@@ -81,7 +85,7 @@ async def _update_engineer_channel_perms(engineer_channel: discord.TextChannel,
 
 async def _create_verify_channel(guild: discord.Guild, engineer_channel: discord.TextChannel):
     """Creates or finds the verfiy channel."""
-    settings_records = await db.execute("SELECT verify_channel_id FROM server_settings WHERE guild_id = $1", guild.id)
+    settings_records = await db.execute_named("server_settings", guild.id)
     verify_channel = None
 
     # Check if verify channel exists, if not create it
@@ -112,6 +116,7 @@ async def _create_verify_channel(guild: discord.Guild, engineer_channel: discord
         await engineer_channel.send("Created #verify channel.")
 
     await db.execute("UPDATE server_settings SET verify_channel_id = $1 WHERE guild_id = $2", verify_channel.id, guild.id)
+    settings_cache.invalidate(guild.id)
     return verify_channel
 
 async def _update_verify_channel_perms(verify_channel: discord.TextChannel, role_objects: dict):
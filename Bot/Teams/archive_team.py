@@ -3,6 +3,8 @@ from discord import app_commands
 from discord.ext import commands
 from typing import List, cast
 from utils.db import db
+from utils.name_index import active_team_nicks
+from utils.search import find_by_name, did_you_mean
 from Admin.admin import Admin
 
 
@@ -42,12 +44,20 @@ class ArchiveTeam(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         # Find team
-        teams = await db.execute(
-            "SELECT * FROM teams WHERE team_nick = $1 AND archived = FALSE", team_nick
-        )
+        try:
+            teams, team_nick, suggestions = await find_by_name(
+                "active_teams",
+                team_nick,
+                lambda nick: db.execute(
+                    "SELECT * FROM teams WHERE team_nick = $1 AND archived = FALSE", nick
+                ),
+            )
+        except Exception as e:
+            await interaction.followup.send(f"Error looking up team: {e}")
+            return
         if not teams:
             await interaction.followup.send(
-                f"Active team with nickname `{team_nick}` not found."
+                f"Active team with nickname `{team_nick}` not found." + did_you_mean(suggestions)
             )
             return
 
@@ -64,6 +74,7 @@ class ArchiveTeam(commands.Cog):
 
         # Archive in DB
         await db.execute("UPDATE teams SET archived = TRUE WHERE team_id = $1", team_id)
+        active_team_nicks.discard(team_nick)
 
         msg = f"Team `{team_nick}` has been archived."
 
@@ -127,12 +138,7 @@ class ArchiveTeam(commands.Cog):
     async def archive_team_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> List[app_commands.Choice[str]]:
-        query = "SELECT team_nick FROM teams WHERE team_nick ILIKE $1 AND archived = FALSE LIMIT 25"
-        records = await db.execute(query, f"%{current}%")
-        return [
-            app_commands.Choice(name=r["team_nick"], value=r["team_nick"])
-            for r in records
-        ]
+        return await active_team_nicks.choices(current)
 
 
 async def setup(bot: commands.Bot):
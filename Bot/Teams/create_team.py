@@ -8,6 +8,9 @@ from discord import app_commands
 from discord.ext import commands
 
 from utils.db import db
+from utils.concurrency import bounded_gather
+from utils.role_utils import ROLE_EDIT_LIMIT
+from utils.name_index import active_team_nicks
 from Admin.admin import Admin
 
 EXIT_KEYWORDS = {"exit", "(exit)"}
@@ -39,6 +42,94 @@ class TeamCreationError(Exception):
     pass
 
 
+async def insert_team(connection, draft: TeamCreationData) -> int:
+    """
+    Insert the team, its players and its roster using the caller's
+    transaction, and return the new team_id. Raises TeamCreationError if an
+    active team already uses the same role, category and channel.
+    """
+    conflict = await connection.fetch(
+        """
+        SELECT team_id
+        FROM teams
+        WHERE role_id = $1 AND category_id = $2 AND channel_id = $3 AND archived IS NOT TRUE
+        """,
+        draft.role.id,
+        draft.category.id,
+        draft.channel.id,
+    )
+    if conflict:
+        raise TeamCreationError(
+            "Another active team already uses this role, category, and channel. Archive it before creating a new one."
+        )
+
+    team_rows = await connection.fetch(
+        """
+        INSERT INTO teams (team_nick, role_id, channel_id, category_id, captain_discord_id, year, semester, seniority)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+        RETURNING team_id
+        """,
+        draft.team_nick,
+        draft.role.id,
+        draft.channel.id,
+        draft.category.id,
+        draft.captain.id,
+        draft.year,
+        draft.semester,
+        draft.seniority,
+    )
+    if not team_rows:
+        raise TeamCreationError("Failed to insert the team record.")
+    team_id = team_rows[0]["team_id"]
+
+    # One statement per table however large the roster. Someone listed twice
+    # keeps their last status (substitute over starter), as separate upserts did.
+    statuses = {member.id: "starter" for member in draft.starters}
+    statuses.update({member.id: "sub" for member in draft.substitutes})
+    player_ids = list({draft.captain.id, *statuses})
+
+    await connection.execute(
+        """
+        INSERT INTO players (player_discord_id)
+        SELECT * FROM unnest($1::bigint[])
+        ON CONFLICT (player_discord_id) DO NOTHING
+        """,
+        player_ids,
+    )
+    await connection.execute(
+        """
+        INSERT INTO team_members (team_id, player_discord_id, member_status)
+        SELECT $1, m.player_discord_id, m.member_status::member_status_type
+        FROM unnest($2::bigint[], $3::text[]) AS m (player_discord_id, member_status)
+        ON CONFLICT (team_id, player_discord_id)
+        DO UPDATE SET member_status = EXCLUDED.member_status
+        """,
+        team_id,
+        list(statuses),
+        list(statuses.values()),
+    )
+    return team_id
+
+
+async def assign_team_role(role: discord.Role, members: List[discord.Member]) -> List[str]:
+    """
+    Give every member the team role, a few requests at a time. Returns a
+    warning for each member who could not be given it.
+    """
+    results = await bounded_gather(
+        lambda member: member.add_roles(role, reason="Team creation assignment"),
+        members,
+        limit=ROLE_EDIT_LIMIT,
+    )
+    warnings: List[str] = []
+    for member, result in zip(members, results):
+        if isinstance(result, discord.Forbidden):
+            warnings.append(f"Missing permission to assign role to {member.display_name}.")
+        elif isinstance(result, Exception):
+            warnings.append(f"Failed to assign role to {member.display_name}: {result}")
+    return warnings
+
+
 class SemesterSelect(discord.ui.View):
     def __init__(self, user_id: int):
         super().__init__(timeout=120)
@@ -609,99 +700,14 @@ class create_team(commands.Cog):
             and draft.semester is not None
             and draft.seniority is not None
         )
-        warnings: List[str] = []
-
-        role = draft.role
-        channel = draft.channel
-        category = draft.category
-        captain = draft.captain
-        year = draft.year
-        semester = draft.semester
-        seniority = draft.seniority
-
-        async def db_transaction(connection):
-            conflict = await connection.fetch(
-                """
-                SELECT team_id
-                FROM teams
-                WHERE role_id = $1 AND category_id = $2 AND channel_id = $3 AND archived IS NOT TRUE
-                """,
-                role.id,
-                category.id,
-                channel.id,
-            )
-            if conflict:
-                raise TeamCreationError(
-                    "Another active team already uses this role, category, and channel. Archive it before creating a new one."
-                )
-
-            team_rows = await connection.fetch(
-                """
-                INSERT INTO teams (team_nick, role_id, channel_id, category_id, captain_discord_id, year, semester, seniority)
-                VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                RETURNING team_id
-                """,
-                draft.team_nick,
-                role.id,
-                channel.id,
-                category.id,
-                captain.id,
-                year,
-                semester,
-                seniority,
-            )
-            if not team_rows:
-                raise TeamCreationError("Failed to insert the team record.")
-            team_id = team_rows[0]["team_id"]
-
-            async def upsert_player(discord_id: int) -> None:
-                await connection.execute(
-                    "INSERT INTO players (player_discord_id) VALUES ($1) ON CONFLICT (player_discord_id) DO NOTHING",
-                    discord_id,
-                )
-
-            async def upsert_member(discord_id: int, status: str) -> None:
-                await connection.execute(
-                    """
-                    INSERT INTO team_members (team_id, player_discord_id, member_status)
-                    VALUES ($1, $2, $3)
-                    ON CONFLICT (team_id, player_discord_id)
-                    DO UPDATE SET member_status = EXCLUDED.member_status
-                    """,
-                    team_id,
-                    discord_id,
-                    status,
-                )
-
-            for member in draft.starters + draft.substitutes:
-                await upsert_player(member.id)
-
-            await upsert_player(captain.id)
-
-            for member in draft.starters:
-                await upsert_member(member.id, "starter")
-            for member in draft.substitutes:
-                await upsert_member(member.id, "sub")
-
-        await db.run_in_transaction(db_transaction)
+        await db.run_in_transaction(lambda connection: insert_team(connection, draft))
+        active_team_nicks.add(draft.team_nick)
 
         # Assign the team role to everyone involved.
-        involved_members = {captain, *draft.starters, *draft.substitutes}
-        for member in involved_members:
-            if member is None:
-                continue
-            try:
-                await member.add_roles(role, reason="Team creation assignment")
-            except discord.Forbidden:
-                warnings.append(
-                    f"Missing permission to assign role to {member.display_name}."
-                )
-            except discord.HTTPException as exc:
-                warnings.append(
-                    f"Failed to assign role to {member.display_name}: {exc}"
-                )
-
-        return warnings
+        involved_members = self._dedupe_members(
+            [draft.captain, *draft.starters, *draft.substitutes]
+        )
+        return await assign_team_role(draft.role, involved_members)
 
     async def _ask_question(
         self,
@@ -0,0 +1,519 @@
+import asyncio
+import csv
+import re
+from dataclasses import dataclass, field
+from io import BytesIO, StringIO
+from typing import Dict, List, Optional, Tuple
+
+import discord
+import openpyxl
+from discord import app_commands
+from discord.ext import commands
+
+from utils.db import db
+from utils.concurrency import bounded_gather
+from utils.jobs import Job, job_manager, split_message
+from utils.member_index import member_index
+from utils.name_index import active_team_nicks
+from utils.settings import settings_cache
+from Admin.admin import Admin
+from Teams.create_team import TeamCreationData, insert_team, assign_team_role
+
+MAX_IMPORT_BYTES = 1_000_000
+SEMESTERS = ["Fall", "Summer", "Spring"]
+STATUSES = {"starter": "starter", "starters": "starter", "sub": "sub", "subs": "sub", "substitute": "sub"}
+CAPTAIN_MARKS = {"x", "y", "yes", "true", "1", "captain"}
+
+# Roster CSV columns, after lower-casing and turning spaces into underscores.
+REQUIRED_COLUMNS = ("team", "category", "discord")
+COLUMN_ALIASES = {"discord_username": "discord", "team_name": "team", "team_nick": "team"}
+
+db.register_statement(
+    "active_team_resources",
+    "SELECT role_id, category_id, channel_id FROM teams WHERE archived = FALSE",
+)
+
+
+@dataclass
+class RosterRow:
+    """One member line from the import file."""
+
+    where: str  # Location for error messages, e.g. "line 4"
+    team: str
+    category: str
+    player: str  # Username, global display name, mention or ID
+    status: str
+    captain: bool
+    team_role: str = ""
+    channel: str = ""
+    seniority: str = ""
+
+
+@dataclass
+class TeamPlan:
+    """A validated team: the draft to insert and which Discord objects it needs created."""
+
+    draft: TeamCreationData
+    category_name: str
+    role_name: str
+    channel_name: str
+    members: List[discord.Member] = field(default_factory=list)
+    new_category: bool = False
+    new_role: bool = False
+    new_channel: bool = False
+
+    @property
+    def name(self) -> str:
+        return self.draft.team_nick or ""
+
+
+def channel_slug(name: str) -> str:
+    """A text channel name the way Discord stores it."""
+    return re.sub(r"\s+", "-", name.strip().lower())
+
+
+def sheet_safe(name: str) -> str:
+    """A category name as /generate_dues writes it into a sheet title."""
+    return "".join(c for c in name if c.isalnum() or c in " -_")[:30]
+
+
+# --- Parsing ---
+
+
+def parse_roster_csv(text: str) -> Tuple[List[RosterRow], List[str]]:
+    """
+    Parse a roster CSV with one row per member. Columns: team, category,
+    discord, and optionally status (starter/sub), captain, team_role,
+    channel and seniority.
+    """
+    reader = csv.reader(StringIO(text))
+    header = next(reader, None)
+    if not header:
+        return [], ["The file is empty."]
+    columns = []
+    for name in header:
+        key = re.sub(r"\s+", "_", name.strip().lower())
+        columns.append(COLUMN_ALIASES.get(key, key))
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        return [], [f"Missing column(s): {', '.join(missing)}."]
+
+    rows, errors = [], []
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        record = {column: (values[i].strip() if i < len(values) else "") for i, column in enumerate(columns)}
+        where = f"line {reader.line_num}"
+        if not record["team"] or not record["category"] or not record["discord"]:
+            errors.append(f"{where}: team, category and discord are required.")
+            continue
+        rows.append(
+            RosterRow(
+                where=where,
+                team=record["team"],
+                category=record["category"],
+                player=record["discord"],
+                status=record.get("status") or "starter",
+                captain=record.get("captain", "").lower() in CAPTAIN_MARKS,
+                team_role=record.get("team_role", ""),
+                channel=record.get("channel", ""),
+                seniority=record.get("seniority", ""),
+            )
+        )
+    return rows, errors
+
+
+def _is_captain_cell(cell) -> bool:
+    # /generate_dues highlights the captain's row; accept a plain yellow fill too.
+    if cell.style == "dues_captain":
+        return True
+    color = cell.fill.fgColor.rgb if cell.fill is not None and cell.fill.fill_type == "solid" else None
+    return isinstance(color, str) and color.upper().endswith("FFFF00")
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def parse_dues_workbook(data: bytes) -> Tuple[List[RosterRow], List[str]]:
+    """
+    Parse a workbook in the /generate_dues layout: one sheet per category,
+    a "Team Name:" block per team and a member table under the "Full Name"
+    header, with the captain's row highlighted.
+    """
+    try:
+        workbook = openpyxl.load_workbook(BytesIO(data))
+    except Exception as e:
+        return [], [f"Could not read the workbook: {e}"]
+
+    rows, errors = [], []
+    for sheet in workbook.worksheets:
+        team: Optional[str] = None
+        in_members = False
+        for cells in sheet.iter_rows():
+            values = [_text(cell.value) for cell in cells]
+            first = values[0] if values else ""
+            where = f"sheet `{sheet.title}` row {cells[0].row}" if cells else sheet.title
+            if first == "Team Name:":
+                team = values[1] if len(values) > 1 else ""
+                in_members = False
+                if not team:
+                    errors.append(f"{where}: the team has no name.")
+                continue
+            if first == "Full Name":
+                in_members = team is not None
+                continue
+            if not any(values):
+                in_members = False
+                continue
+            if not in_members or not team:
+                continue
+            username = values[1] if len(values) > 1 else ""
+            rows.append(
+                RosterRow(
+                    where=where,
+                    team=team,
+                    category=sheet.title,
+                    player=username or first,
+                    status=values[3] if len(values) > 3 else "",
+                    captain=_is_captain_cell(cells[0]),
+                )
+            )
+    return rows, errors
+
+
+def parse_import_file(filename: str, data: bytes) -> Tuple[List[RosterRow], List[str]]:
+    if filename.lower().endswith(".xlsx"):
+        return parse_dues_workbook(data)
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return [], ["The CSV file must be UTF-8 encoded."]
+    return parse_roster_csv(text)
+
+
+# --- Validation ---
+
+
+def _resolve_member(guild: discord.Guild, text: str) -> Optional[discord.Member]:
+    match = re.fullmatch(r"<@!?(\d+)>|(\d{15,20})", text.strip())
+    if match:
+        return guild.get_member(int(match.group(1) or match.group(2)))
+    return member_index.lookup(guild, text)
+
+
+def _find_category(guild: discord.Guild, name: str) -> Optional[discord.CategoryChannel]:
+    wanted = name.lower()
+    for category in guild.categories:
+        if category.name.lower() == wanted or sheet_safe(category.name).lower() == wanted:
+            return category
+    return None
+
+
+async def plan_import(
+    guild: discord.Guild,
+    rows: List[RosterRow],
+    year: int,
+    semester: str,
+    seniority: int,
+) -> Tuple[List[TeamPlan], List[str]]:
+    """
+    Check every row in one pass and group them into teams. Members, roles,
+    categories and channels come from the guild cache and the member index;
+    the database is read once for the resources active teams already use.
+    Returns the plans and every problem found; import only when there are none.
+    """
+    errors: List[str] = []
+    grouped: Dict[str, List[RosterRow]] = {}
+    for row in rows:
+        grouped.setdefault(row.team.lower(), []).append(row)
+
+    active = {name.lower() for name in await active_team_nicks.names()}
+    in_use = {
+        (r["role_id"], r["category_id"], r["channel_id"])
+        for r in await db.execute_named("active_team_resources")
+    }
+    roles_by_name = {role.name.lower(): role for role in guild.roles}
+
+    plans: List[TeamPlan] = []
+    claimed_roles: Dict[str, str] = {}
+    for team_rows in grouped.values():
+        first = team_rows[0]
+        name = first.team
+        label = f"Team `{name}`"
+        if name.lower() in active:
+            errors.append(f"{label}: an active team already has this name.")
+        if len({row.category.lower() for row in team_rows}) > 1:
+            errors.append(f"{label}: rows list more than one category.")
+
+        draft = TeamCreationData(team_nick=name, year=year, semester=semester, seniority=seniority)
+        seniority_text = next((row.seniority for row in team_rows if row.seniority), "")
+        if seniority_text:
+            if seniority_text.isdigit():
+                draft.seniority = int(seniority_text)
+            else:
+                errors.append(f"{label}: seniority `{seniority_text}` is not a whole number.")
+
+        role_name = next((row.team_role for row in team_rows if row.team_role), name)
+        channel_name = channel_slug(next((row.channel for row in team_rows if row.channel), name))
+        draft.role = roles_by_name.get(role_name.lower())
+        draft.category = _find_category(guild, first.category)
+        if draft.category is not None:
+            draft.channel = discord.utils.get(draft.category.text_channels, name=channel_name)
+        if role_name.lower() in claimed_roles:
+            errors.append(f"{label}: role `{role_name}` is also used by team `{claimed_roles[role_name.lower()]}`.")
+        claimed_roles[role_name.lower()] = name
+        if draft.role is not None and draft.role.managed:
+            errors.append(f"{label}: role `{role_name}` is managed by an integration and cannot be assigned.")
+        if (
+            draft.role is not None
+            and draft.category is not None
+            and draft.channel is not None
+            and (draft.role.id, draft.category.id, draft.channel.id) in in_use
+        ):
+            errors.append(f"{label}: an active team already uses this role, category and channel.")
+
+        members: Dict[int, discord.Member] = {}
+        captains = []
+        for row in team_rows:
+            status = STATUSES.get(row.status.strip().lower())
+            if status is None:
+                errors.append(f"{row.where}: unknown status `{row.status}` (use starter or sub).")
+                continue
+            member = _resolve_member(guild, row.player)
+            if member is None:
+                errors.append(f"{row.where}: member `{row.player}` was not found in this server.")
+                continue
+            if member.id in members:
+                errors.append(f"{row.where}: {member.display_name} is listed twice for `{name}`.")
+                continue
+            members[member.id] = member
+            (draft.starters if status == "starter" else draft.substitutes).append(member)
+            if row.captain:
+                captains.append(member)
+
+        if len(captains) != 1:
+            errors.append(f"{label}: mark exactly one captain (found {len(captains)}).")
+        else:
+            draft.captain = captains[0]
+        if not draft.starters:
+            errors.append(f"{label}: at least one starter is required.")
+
+        plans.append(
+            TeamPlan(
+                draft=draft,
+                category_name=draft.category.name if draft.category else first.category,
+                role_name=role_name,
+                channel_name=channel_name,
+                members=list(members.values()),
+                new_category=draft.category is None,
+                new_role=draft.role is None,
+                new_channel=draft.channel is None,
+            )
+        )
+    return plans, errors
+
+
+def format_plan(plans: List[TeamPlan], heading: str) -> str:
+    lines = [heading]
+    for plan in plans:
+        draft = plan.draft
+        role = f"`{plan.role_name}`" + (" (new)" if plan.new_role else "")
+        channel = f"#{plan.channel_name}" + (" (new)" if plan.new_channel else "")
+        category = f"`{plan.category_name}`" + (" (new)" if plan.new_category else "")
+        lines.append(
+            f"- `{plan.name}` in {category}: {len(draft.starters)} starter(s), "
+            f"{len(draft.substitutes)} sub(s), captain {draft.captain.display_name}; "
+            f"role {role}, channel {channel}, seniority {draft.seniority}"
+        )
+    new_categories = {plan.category_name.lower() for plan in plans if plan.new_category}
+    new_roles = sum(1 for plan in plans if plan.new_role)
+    new_channels = sum(1 for plan in plans if plan.new_channel)
+    lines.append(
+        f"New Discord objects: {len(new_categories)} categories, {new_roles} roles, {new_channels} channels."
+    )
+    return "\n".join(lines)
+
+
+# --- Import ---
+
+
+async def _create_missing(guild: discord.Guild, plans: List[TeamPlan]) -> List[str]:
+    """
+    Create the categories, roles and channels the plans still need. Returns
+    one failure message per team that could not be provisioned; those teams
+    have their draft role, category or channel left as None.
+    """
+    failures: List[str] = []
+    categories: Dict[str, Optional[discord.CategoryChannel]] = {}
+    for plan in plans:
+        if plan.draft.category is None:
+            key = plan.category_name.lower()
+            if key not in categories:
+                try:
+                    categories[key] = await guild.create_category(
+                        name=plan.category_name, reason="Team import category"
+                    )
+                except discord.HTTPException as e:
+                    categories[key] = None
+                    failures.append(f"Could not create category `{plan.category_name}`: {e}")
+            plan.draft.category = categories[key]
+
+    async def provision(plan: TeamPlan):
+        if plan.draft.category is None:
+            return
+        if plan.draft.role is None:
+            plan.draft.role = await guild.create_role(name=plan.role_name, reason="Team import role")
+        if plan.draft.channel is None:
+            plan.draft.channel = await guild.create_text_channel(
+                name=plan.channel_name, category=plan.draft.category, reason="Team import channel"
+            )
+
+    results = await bounded_gather(provision, plans)
+    for plan, result in zip(plans, results):
+        if isinstance(result, Exception):
+            failures.append(f"Could not create the role or channel for `{plan.name}`: {result}")
+    return failures
+
+
+async def run_import(job: Job, guild: discord.Guild, plans: List[TeamPlan]) -> str:
+    """
+    Create the Discord objects the plans need, insert every team in one
+    transaction, then grant the team roles. Runs as a background job and
+    returns the report.
+    """
+    await job.report(0, len(plans), "creating roles and channels")
+    failures = await _create_missing(guild, plans)
+    ready = [
+        plan for plan in plans
+        if plan.draft.role is not None and plan.draft.category is not None and plan.draft.channel is not None
+    ]
+
+    async def insert_all(connection):
+        for plan in ready:
+            await insert_team(connection, plan.draft)
+
+    await job.report(0, len(ready), "saving teams")
+    try:
+        await db.run_in_transaction(insert_all)
+    except Exception as e:
+        lines = [f"**Team import failed.** No teams were saved: {e}"]
+        if any(plan.new_category or plan.new_role or plan.new_channel for plan in plans):
+            lines.append("Roles, categories and channels created for the import were left in place.")
+        return "\n".join(lines + [f"- {failure}" for failure in failures])
+
+    for plan in ready:
+        active_team_nicks.add(plan.name)
+
+    warnings: List[str] = []
+    for done, plan in enumerate(ready, start=1):
+        warnings.extend(await assign_team_role(plan.draft.role, plan.members))
+        await job.report(done, len(ready), "assigning roles")
+
+    report = [format_plan(ready, f"**Imported {len(ready)} of {len(plans)} teams.**")]
+    if failures:
+        report.append("Not imported:\n" + "\n".join(f"- {failure}" for failure in failures))
+    if warnings:
+        report.append("Warnings:\n" + "\n".join(f"- {warning}" for warning in warnings))
+    return "\n\n".join(report)
+
+
+class ImportTeams(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+
+    @app_commands.command(
+        name="import_teams",
+        description="(Admin) Create teams in bulk from a roster CSV or a dues workbook.",
+    )
+    @app_commands.describe(
+        file="A roster .csv, or an .xlsx in the /generate_dues layout",
+        year="Competition year for every imported team",
+        semester="Semester for every imported team",
+        seniority="Seniority for teams the file gives none (default 0)",
+        dry_run="Only check the file and show what would be created",
+    )
+    @app_commands.choices(
+        semester=[app_commands.Choice(name=name, value=name) for name in SEMESTERS]
+    )
+    async def import_teams(
+        self,
+        interaction: discord.Interaction,
+        file: discord.Attachment,
+        year: app_commands.Range[int, 2000, 2100],
+        semester: str,
+        seniority: int = 0,
+        dry_run: bool = False,
+    ):
+        admin_cog = self.bot.get_cog("Admin")
+        if (
+            not isinstance(admin_cog, Admin)
+            or not isinstance(interaction.user, discord.Member)
+            or not await admin_cog.is_admin(interaction.user)
+        ):
+            await interaction.response.send_message(
+                "You do not have permission to use this command.", ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        guild = interaction.guild
+        if not file.filename.lower().endswith((".csv", ".xlsx")):
+            await interaction.followup.send("Upload a `.csv` or `.xlsx` file.")
+            return
+        if file.size > MAX_IMPORT_BYTES:
+            await interaction.followup.send(
+                f"The file is too large ({file.size} bytes); the limit is {MAX_IMPORT_BYTES}."
+            )
+            return
+
+        try:
+            data = await file.read()
+            loop = asyncio.get_event_loop()
+            rows, errors = await loop.run_in_executor(None, parse_import_file, file.filename, data)
+            plans, problems = await plan_import(guild, rows, year, semester, seniority)
+        except Exception as e:
+            await interaction.followup.send(f"Error reading the import: {e}")
+            return
+        errors.extend(problems)
+
+        if not errors and not plans:
+            errors.append("The file lists no teams.")
+        if errors:
+            await self._send_report(
+                interaction,
+                f"**Nothing was imported.** Fix these {len(errors)} problem(s) and try again:\n"
+                + "\n".join(f"- {error}" for error in errors),
+            )
+            return
+        if dry_run:
+            await self._send_report(
+                interaction, format_plan(plans, f"**Dry run: {len(plans)} teams are ready to import.**")
+            )
+            return
+
+        settings = await settings_cache.get(guild)
+        engineer_channel = settings.engineer_channel if settings else None
+        if not engineer_channel:
+            await interaction.followup.send(
+                "Could not find the engineer channel. Please ensure the bot has been set up correctly."
+            )
+            return
+        job = job_manager.submit(
+            "team import",
+            lambda job: run_import(job, guild, plans),
+            guild_id=guild.id,
+            user_id=interaction.user.id,
+            channel=engineer_channel,
+        )
+        await interaction.followup.send(
+            f"Importing {len(plans)} teams as job `#{job.id}`. The report will be posted in {engineer_channel.mention}."
+        )
+
+    async def _send_report(self, interaction: discord.Interaction, text: str):
+        for chunk in split_message(text):
+            await interaction.followup.send(chunk)
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(ImportTeams(bot))
@@ -4,9 +4,14 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from utils.db import db
+from utils.settings import settings_cache
 from SetUp.setup import setup_guild
 from utils.email import email_sender
 from utils.verification import refresh_verification_message
+from utils.conversations import conversation_router
+from utils.member_index import member_index
+from verification_utils.conversation import restore_verification
+from verification_utils.sessions import session_store
 
 TOKEN = os.getenv("DISCORD_TOKEN")
 
@@ -21,13 +26,23 @@ class MyClient(commands.Bot):
     async def setup_hook(self):
         await db.connect()
         await email_sender.start()
+        # DM replies for verification flows are routed by (channel, user).
+        # Saved sessions are rebuilt on the user's next DM after a restart.
+        await session_store.start(self)
+        conversation_router.resolver = restore_verification
+        self.add_listener(conversation_router.dispatch, "on_message")
+        # Username -> member index used by friend verification.
+        for event in ("on_member_join", "on_member_update", "on_member_remove", "on_user_update", "on_guild_remove"):
+            self.add_listener(getattr(member_index, event), event)
 
         # Load extensions first so their commands are registered
         await self.load_extension("Teams.create_team")
+        await self.load_extension("Teams.import_teams")
         await self.load_extension("Teams.archive_team")
         await self.load_extension("Teams.list_teams")
         await self.load_extension("Admin.admin")
         await self.load_extension("Admin.set_captain")
+        await self.load_extension("Admin.jobs")
         await self.load_extension("Dues.set-dues")
         await self.load_extension("Dues.generate")
         await self.load_extension("Webscrape.webscrape")
@@ -53,10 +68,10 @@ class MyClient(commands.Bot):
 
         for guild in self.guilds:
             print(f'Connected to target guild: {guild.name} (ID: {guild.id})')
-            settings_records = await db.execute("SELECT * FROM server_settings WHERE guild_id = $1", guild.id)
+            settings = await settings_cache.get(guild)
             
             # Check if server settings exist for this guild, if not run setup
-            if not settings_records:
+            if settings is None:
                 print ("Server settings not found. Setting up server.")
                 try:
                     await setup_guild(guild=guild)
@@ -65,17 +80,15 @@ class MyClient(commands.Bot):
                 continue
 
             # The server has a record in the database
-            settings = settings_records[0]
-            engineer_channel = guild.get_channel(settings.get('engineer_channel_id'))
-            verify_channel = guild.get_channel(settings.get('verify_channel_id'))
+            engineer_channel = settings.engineer_channel
+            verify_channel = settings.verify_channel
 
             # Check if channels exist for this guild, if not run setup
-            if (not engineer_channel or not settings_records[0]['engineer_channel_id'] or
-                not verify_channel or not settings_records[0]['verify_channel_id']):
+            if not engineer_channel or not verify_channel:
 
-                if not engineer_channel or not settings_records[0]['engineer_channel_id']:
+                if not engineer_channel:
                     print("Engineer channel not found. Running setup.")
-                elif not verify_channel or not settings_records[0]['verify_channel_id']:
+                elif not verify_channel:
                     print("Verify channel not found. Running setup.")       
 
                 try:
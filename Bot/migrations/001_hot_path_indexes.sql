@@ -0,0 +1,18 @@
+-- Secondary indexes for the lookups the cogs run on every command; until now
+-- only primary keys were indexed.
+
+-- The reservation commands find the caller's team by captain among active teams.
+CREATE INDEX IF NOT EXISTS teams_captain_active_idx ON teams (captain_discord_id) WHERE archived = FALSE;
+CREATE INDEX IF NOT EXISTS teams_archived_idx ON teams (archived);
+
+-- The primary key leads with team_id, so it cannot serve lookups by player
+-- (or the ON DELETE CASCADE from players).
+CREATE INDEX IF NOT EXISTS team_members_player_idx ON team_members (player_discord_id);
+
+-- A room's slots by time, for the add_weekly_slots overlap check; it also
+-- serves room_id alone, so it replaces room_slots_room_id_idx.
+CREATE INDEX IF NOT EXISTS room_slots_room_start_idx ON room_slots (room_id, start_time);
+DROP INDEX IF EXISTS room_slots_room_id_idx;
+
+-- /list_rooms pages through upcoming slots by (start_time, slot_id).
+CREATE INDEX IF NOT EXISTS room_slots_start_time_idx ON room_slots (start_time, slot_id);
@@ -0,0 +1,5 @@
+-- Trigram indexes for typo-tolerant name search (utils/search.py).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS teams_team_nick_trgm_idx ON teams USING GIN (team_nick gin_trgm_ops) WHERE archived = FALSE;
+CREATE INDEX IF NOT EXISTS rooms_room_name_trgm_idx ON rooms USING GIN (room_name gin_trgm_ops);
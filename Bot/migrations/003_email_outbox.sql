@@ -0,0 +1,20 @@
+-- Outbound mail waiting to be sent, and the daily sending count (utils/email.py).
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id              SERIAL PRIMARY KEY,
+    recipient       VARCHAR(255) NOT NULL,
+    subject         VARCHAR(255) NOT NULL,
+    body            TEXT NOT NULL,
+    priority        SMALLINT NOT NULL DEFAULT 10,
+    status          VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts        INT NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_error      TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS email_outbox_due_idx ON email_outbox (priority, id) WHERE status = 'pending';
+
+CREATE TABLE IF NOT EXISTS email_quota (
+    day  DATE PRIMARY KEY,
+    sent INT NOT NULL DEFAULT 0
+);
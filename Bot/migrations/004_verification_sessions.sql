@@ -0,0 +1,15 @@
+-- In-progress DM verifications (verification_utils/sessions.py).
+CREATE TABLE IF NOT EXISTS verification_sessions (
+    user_id    BIGINT PRIMARY KEY,
+    guild_id   BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    flow       VARCHAR(20) NOT NULL,
+    step       VARCHAR(30) NOT NULL,
+    code_salt  BYTEA,
+    code_hash  BYTEA,
+    attempts   INT NOT NULL DEFAULT 0,
+    friend_id  BIGINT,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS verification_sessions_expires_idx ON verification_sessions (expires_at);
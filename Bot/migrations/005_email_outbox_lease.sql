@@ -0,0 +1,5 @@
+-- When a dispatcher claimed each in-flight message, so a restart only requeues
+-- rows whose sender has had time to finish (utils/email.py).
+ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+UPDATE email_outbox SET claimed_at = created_at WHERE status = 'sending' AND claimed_at IS NULL;
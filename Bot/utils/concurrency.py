@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Discord allows bursts of a few requests per route bucket; discord.py waits
+# out 429s per bucket, so a small cap keeps us from queueing hundreds of
+# requests behind the same bucket while still overlapping round trips.
+DEFAULT_LIMIT = 5
+
+
+async def bounded_gather(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    limit: int = DEFAULT_LIMIT,
+    on_done: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> List[object]:
+    """
+    Run `func(item)` for every item with at most `limit` calls in flight.
+
+    Returns results in input order. A call that raises yields its exception in
+    place of a result, so one failed member does not abort the batch.
+    `on_done(count)` is awaited after each call finishes, for progress reporting.
+    """
+    semaphore = asyncio.Semaphore(limit)
+    finished = 0
+
+    async def run(item):
+        nonlocal finished
+        async with semaphore:
+            try:
+                return await func(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                return e
+            finally:
+                finished += 1
+                if on_done is not None:
+                    await on_done(finished)
+
+    return await asyncio.gather(*(run(item) for item in items))
@@ -0,0 +1,200 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import discord
+
+
+class Conversation(ABC):
+    """
+    A DM conversation with one user, driven by ConversationRouter instead of
+    chained `client.wait_for` calls.
+
+    The current step names the coroutine that receives the next message:
+    step "code" is handled by `on_code(message)`, and an optional
+    `accepts_code(message)` filters which messages count (others are ignored,
+    like a wait_for check). Each handler must call `expect()` to continue;
+    a handler that returns without doing so ends the conversation.
+
+    A step that waits on something other than the user's DMs (e.g. a button
+    another user presses) must not define `on_<step>`: give its handler a
+    private name and run it through `ConversationRouter.resume()`.
+    """
+
+    def __init__(self, user: discord.abc.User):
+        self.user = user
+        self.channel: Optional[discord.DMChannel] = None
+        self.step: Optional[str] = None
+        self.timeout: float = 300.0
+        self.router: Optional["ConversationRouter"] = None
+        self.busy = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return (self.channel.id, self.user.id)
+
+    def expect(self, step: str, timeout: float = 300.0):
+        """Wait for the next message in `step`, for at most `timeout` seconds."""
+        self.step = step
+        self.timeout = timeout
+        self.router._arm(self)
+
+    def finish(self):
+        """End the conversation and stop routing messages to it."""
+        if self.router is not None:
+            self.router.end(self)
+
+    @abstractmethod
+    async def start(self):
+        """Send the first prompt and expect() the first step."""
+
+    async def on_timeout(self):
+        """
+        Called when no accepted message arrived before the step's timeout.
+        `self.step` still names the step that timed out.
+        """
+
+    async def on_error(self, error: Exception):
+        """Called when a handler raises; the conversation has already ended."""
+        print(f"Error in {type(self).__name__}: {error}")
+
+    async def save(self):
+        """Called after each handler that leaves the conversation waiting on a step."""
+
+    async def discard(self):
+        """Called once the conversation has ended for any reason."""
+
+
+class ConversationRouter:
+    """
+    Routes DM messages to the active conversation for (channel_id, user_id) with
+    one dict lookup, so the cost per message does not grow with the number of
+    people mid-conversation.
+    """
+
+    def __init__(self):
+        self._by_key: Dict[Tuple[int, int], Conversation] = {}
+        self._by_user: Dict[int, Conversation] = {}
+        # Rebuilds a conversation for a DM that has no live one (e.g. after a
+        # restart). Returns None when there is nothing to resume.
+        self.resolver: Optional[Callable[[discord.Message], Awaitable[Optional[Conversation]]]] = None
+
+    def get(self, user_id: int) -> Optional[Conversation]:
+        return self._by_user.get(user_id)
+
+    def is_active(self, user_id: int) -> bool:
+        return user_id in self._by_user
+
+    async def begin(self, conversation: Conversation):
+        """Register a conversation and run its start() step."""
+        existing = self._by_user.get(conversation.user.id)
+        if existing is not None:
+            self.end(existing)
+        conversation.router = self
+        self._by_user[conversation.user.id] = conversation
+        await self._run(conversation, conversation.start)
+
+    def restore(self, conversation: Conversation):
+        """
+        Register a rebuilt conversation without starting it. Follow up with
+        resume() to run a handler that expect()s the saved step.
+        """
+        conversation.router = self
+        self._by_user[conversation.user.id] = conversation
+
+    async def resume(self, conversation: Conversation, handler, *args):
+        """
+        Run a handler for an event other than a DM message (e.g. a button press),
+        with the same error handling and step rules as dispatch().
+        """
+        if self._by_user.get(conversation.user.id) is not conversation or conversation.busy:
+            return
+        await self._run(conversation, handler, *args)
+
+    async def dispatch(self, message: discord.Message) -> bool:
+        """Route a message to its conversation. Returns True if it was consumed."""
+        if message.author.bot:
+            return False
+        conversation = self._by_key.get((message.channel.id, message.author.id))
+        if (
+            conversation is None
+            and self.resolver is not None
+            and message.guild is None
+            and not self.is_active(message.author.id)
+        ):
+            conversation = await self.resolver(message)
+        if conversation is None or conversation.busy or conversation.step is None:
+            return False
+        handler = getattr(conversation, f"on_{conversation.step}", None)
+        if handler is None:
+            return False
+        accepts = getattr(conversation, f"accepts_{conversation.step}", None)
+        if accepts is not None and not accepts(message):
+            return False
+        await self._run(conversation, handler, message)
+        return True
+
+    async def _run(self, conversation: Conversation, handler, *args):
+        self._disarm(conversation)
+        conversation.step = None
+        conversation.busy = True
+        try:
+            await handler(*args)
+            if conversation.step is not None and self._by_user.get(conversation.user.id) is conversation:
+                await conversation.save()
+                return
+        except Exception as e:
+            self.end(conversation)
+            try:
+                await conversation.on_error(e)
+            except Exception as inner:
+                print(f"Error while reporting a conversation error: {inner}")
+        finally:
+            conversation.busy = False
+        self.end(conversation)
+        await self._discard(conversation)
+
+    def end(self, conversation: Conversation):
+        self._disarm(conversation)
+        if self._by_user.get(conversation.user.id) is conversation:
+            del self._by_user[conversation.user.id]
+        if conversation.channel is not None:
+            if self._by_key.get(conversation.key) is conversation:
+                del self._by_key[conversation.key]
+
+    def _arm(self, conversation: Conversation):
+        """Index the conversation by channel and (re)start its step timer."""
+        self._by_key[conversation.key] = conversation
+        self._disarm(conversation)
+        loop = asyncio.get_running_loop()
+        conversation._timer = loop.call_later(
+            conversation.timeout,
+            lambda: asyncio.create_task(self._expire(conversation)),
+        )
+
+    def _disarm(self, conversation: Conversation):
+        if conversation._timer is not None:
+            conversation._timer.cancel()
+            conversation._timer = None
+
+    async def _expire(self, conversation: Conversation):
+        if self._by_user.get(conversation.user.id) is not conversation or conversation.busy:
+            return
+        self.end(conversation)
+        try:
+            await conversation.on_timeout()
+        except Exception as e:
+            print(f"Error while expiring a conversation: {e}")
+        await self._discard(conversation)
+
+    async def _discard(self, conversation: Conversation):
+        # A newer conversation for the same user owns the saved state now.
+        if self._by_user.get(conversation.user.id) is not None:
+            return
+        try:
+            await conversation.discard()
+        except Exception as e:
+            print(f"Error while discarding a conversation: {e}")
+
+
+conversation_router = ConversationRouter()
@@ -1,26 +1,87 @@
 import asyncio
 import asyncpg
 import os
+import re
+import time
+from dataclasses import dataclass
+from .migrations import apply_migrations
+
+# Plain SELECTs are safe to run outside an explicit transaction; row-locking
+# reads and SELECT INTO still need one.
+_READONLY_RE = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+_WRITE_RE = re.compile(
+    r"\bFOR\s+(UPDATE|SHARE|NO\s+KEY|KEY)\b|\bINTO\b", re.IGNORECASE
+)
+
+
+def is_readonly_query(query: str) -> bool:
+    """Return True if the statement is a plain SELECT without row locks."""
+    return bool(_READONLY_RE.match(query)) and not _WRITE_RE.search(query)
+
+
+@dataclass
+class DatabaseMetrics:
+    """Running counters for the DB queue, used to size the worker pool."""
+
+    enqueued: int = 0
+    readonly: int = 0
+    completed: int = 0
+    failed: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    total_run: float = 0.0
+    max_run: float = 0.0
+    max_queue_depth: int = 0
+
+    def record_enqueue(self, queue_depth: int):
+        self.enqueued += 1
+        if queue_depth > self.max_queue_depth:
+            self.max_queue_depth = queue_depth
+
+    def record_wait(self, wait: float):
+        self.total_wait += wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def record_run(self, run: float, failed: bool):
+        self.total_run += run
+        if run > self.max_run:
+            self.max_run = run
+        if failed:
+            self.failed += 1
+        else:
+            self.completed += 1
 
 
 class Database:
-    def __init__(self):
+    def __init__(self, workers: int = None):
         self._pool = None
         self.queue = asyncio.Queue()
+        self.worker_count = workers or int(os.getenv("DB_WORKERS", "5"))
+        self._workers = []
+        self._statements = {}
+        self.metrics = DatabaseMetrics()
 
     async def connect(self):
         retries = 5
         delay = 3
         for i in range(retries):
             try:
+                # One pooled connection per worker so no worker waits on acquire.
                 self._pool = await asyncpg.create_pool(
                     user=os.getenv("POSTGRES_USER"),
                     password=os.getenv("POSTGRES_PASSWORD"),
                     database=os.getenv("POSTGRES_DB"),
                     host="db",
+                    min_size=self.worker_count,
+                    max_size=self.worker_count,
+                )
+                async with self._pool.acquire() as connection:
+                    await apply_migrations(connection)
+                self._start_workers()
+                print(
+                    f"Database connection successful. Started {self.worker_count} DB workers."
                 )
-                asyncio.create_task(self._worker())
-                print("Database connection successful.")
                 return
             except (
                 ConnectionRefusedError,
@@ -35,30 +96,52 @@ class Database:
                     print("Database connection failed after multiple retries.")
                     raise e
 
+    def _start_workers(self):
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.worker_count:
+            self._workers.append(asyncio.create_task(self._worker()))
+
     async def _worker(self):
         while True:
-            future, task_type, data = await self.queue.get()
+            future, task_type, data, enqueued_at = await self.queue.get()
             try:
                 if self._pool is None:
                     await asyncio.sleep(0.1)  # Wait for pool to be initialized
                     # Re-queue the item if the pool is not ready
-                    await self.queue.put((future, task_type, data))
-                    self.queue.task_done()
+                    await self.queue.put((future, task_type, data, enqueued_at))
                     continue
 
+                if future.done():
+                    # The caller went away (e.g. cancelled) while the item was queued.
+                    continue
+
+                self.metrics.record_wait(time.perf_counter() - enqueued_at)
+                started_at = time.perf_counter()
+                failed = False
+
                 async with self._pool.acquire() as connection:
-                    async with connection.transaction():
-                        try:
-                            if task_type == "query":
-                                query, params = data
-                                result = await connection.fetch(query, *params)
-                                future.set_result(result)
-                            elif task_type == "callback":
-                                callback = data
-                                result = await callback(connection)
-                                future.set_result(result)
-                        except Exception as e:
+                    try:
+                        if task_type == "readonly":
+                            # Single statement in autocommit: no BEGIN/COMMIT round trips.
+                            query, params = data
+                            self.metrics.readonly += 1
+                            result = await connection.fetch(query, *params)
+                        elif task_type == "named_readonly":
+                            self.metrics.readonly += 1
+                            result = await self._fetch_named(connection, *data)
+                        else:
+                            # Raising inside the block rolls the transaction back.
+                            result = await self._run_in_transaction(
+                                connection, task_type, data
+                            )
+                        if not future.done():
+                            future.set_result(result)
+                    except Exception as e:
+                        failed = True
+                        if not future.done():
                             future.set_exception(e)
+
+                self.metrics.record_run(time.perf_counter() - started_at, failed)
             except Exception as e:
                 print(f"Error in DB worker: {e}")
                 if not future.done():
@@ -66,24 +149,98 @@ class Database:
             finally:
                 self.queue.task_done()
 
-    async def execute(self, query, *params):
+    async def _run_in_transaction(self, connection, task_type, data):
+        async with connection.transaction():
+            if task_type == "query":
+                query, params = data
+                return await connection.fetch(query, *params)
+            elif task_type == "named":
+                return await self._fetch_named(connection, *data)
+            elif task_type == "callback":
+                callback = data
+                return await callback(connection)
+
+    async def _fetch_named(self, connection, name, params):
+        # Go through asyncpg's per-connection statement cache rather than
+        # holding PreparedStatement objects: those are invalidated when the
+        # connection is released back to the pool, while the cache survives
+        # and already re-prepares stale plans outside transactions.
+        return await connection.fetch(self._statements[name], *params)
+
+    async def _submit(self, task_type, data):
         future = asyncio.get_event_loop().create_future()
-        await self.queue.put((future, "query", (query, params)))
+        await self.queue.put((future, task_type, data, time.perf_counter()))
+        self.metrics.record_enqueue(self.queue.qsize())
         return await future
 
+    async def execute(self, query, *params):
+        if is_readonly_query(query):
+            return await self._submit("readonly", (query, params))
+        return await self._submit("query", (query, params))
+
+    async def fetch_readonly(self, query, *params):
+        """
+        Run a single read-only statement without an explicit transaction.
+        execute() already takes this path for plain SELECTs.
+        """
+        return await self._submit("readonly", (query, params))
+
+    def register_statement(self, name, query):
+        """
+        Register a fixed SQL statement under a name so it can be run with
+        execute_named(). asyncpg prepares it once per pooled connection and
+        reuses the plan from its statement cache.
+        """
+        existing = self._statements.get(name)
+        if existing is not None and existing != query:
+            raise ValueError(f"Statement `{name}` is already registered with different SQL.")
+        self._statements[name] = query
+
+    async def execute_named(self, name, *params):
+        """Run a statement registered with register_statement()."""
+        query = self._statements.get(name)
+        if query is None:
+            raise KeyError(f"No statement registered under `{name}`.")
+        task_type = "named_readonly" if is_readonly_query(query) else "named"
+        return await self._submit(task_type, (name, params))
+
     async def run_in_transaction(self, callback):
         """
         Run a callback function within a database transaction.
         The callback should accept a single argument: the database connection.
         """
-        future = asyncio.get_event_loop().create_future()
-        await self.queue.put((future, "callback", callback))
-        return await future
+        return await self._submit("callback", callback)
+
+    def stats(self) -> dict:
+        """Return a snapshot of queue depth, wait and run times for sizing the pool."""
+        m = self.metrics
+        finished = m.completed + m.failed
+        return {
+            "workers": self.worker_count,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": m.max_queue_depth,
+            "enqueued": m.enqueued,
+            "readonly": m.readonly,
+            "completed": m.completed,
+            "failed": m.failed,
+            "avg_wait_ms": (m.total_wait / finished * 1000) if finished else 0.0,
+            "max_wait_ms": m.max_wait * 1000,
+            "avg_run_ms": (m.total_run / finished * 1000) if finished else 0.0,
+            "max_run_ms": m.max_run * 1000,
+        }
 
     async def close(self):
         await self.queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
         if self._pool:
             await self._pool.close()
 
 
 db = Database()
+
+# Statements shared by several cogs.
+db.register_statement(
+    "server_settings", "SELECT * FROM server_settings WHERE guild_id = $1"
+)
@@ -1,69 +1,384 @@
 import smtplib
 import ssl
 import os
+import time
 import asyncio
+from datetime import datetime, timedelta, timezone
 from email.message import EmailMessage
+from typing import Dict, Optional
+from .db import db
+
+# Errors that mean the session is gone and a fresh connection may succeed.
+_DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class SmtpPool:
+    """
+    Keeps up to `max_connections` authenticated SMTP sessions open and reuses
+    them across sends. smtplib is blocking, so all network work runs in the
+    default executor.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        use_ssl: bool = True,
+        username: str = None,
+        password: str = None,
+        max_connections: int = 3,
+        idle_timeout: float = 120.0,
+    ):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.username = username
+        self.password = password
+        self.max_connections = max_connections
+        # Providers drop idle sessions after a few minutes; reconnect rather than
+        # discover that mid-send.
+        self.idle_timeout = idle_timeout
+        self._idle = []  # [(server, last_used)]
+        self._semaphore = asyncio.Semaphore(max_connections)
+
+    def _connect(self):
+        context = ssl.create_default_context()
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port, context=context, timeout=30)
+        else:
+            server = smtplib.SMTP(self.host, self.port, timeout=30)
+            server.ehlo()
+            if server.has_extn("starttls"):
+                server.starttls(context=context)
+                server.ehlo()
+        try:
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            self._close(server)
+            raise
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _take_idle(self):
+        """Pop the most recently used live session, returning expired ones to close."""
+        expired = []
+        now = time.monotonic()
+        while self._idle:
+            server, last_used = self._idle.pop()
+            if now - last_used < self.idle_timeout:
+                return server, expired
+            expired.append(server)
+        return None, expired
+
+    async def send(self, msg: EmailMessage):
+        """Send a message on a pooled session, reconnecting once if it was dropped."""
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            server, expired = self._take_idle()
+            for stale in expired:
+                await loop.run_in_executor(None, self._close, stale)
+
+            try:
+                if server is None:
+                    server = await loop.run_in_executor(None, self._connect)
+                    await loop.run_in_executor(None, server.send_message, msg)
+                else:
+                    try:
+                        await loop.run_in_executor(None, server.send_message, msg)
+                    except _DISCONNECT_ERRORS:
+                        await loop.run_in_executor(None, server.close)
+                        server = await loop.run_in_executor(None, self._connect)
+                        await loop.run_in_executor(None, server.send_message, msg)
+            except Exception:
+                if server is not None:
+                    await loop.run_in_executor(None, self._close, server)
+                raise
+
+            self._idle.append((server, time.monotonic()))
+
+    async def close(self):
+        """Log out of every idle session."""
+        loop = asyncio.get_running_loop()
+        idle, self._idle = self._idle, []
+        for server, _ in idle:
+            await loop.run_in_executor(None, self._close, server)
+
+
+# Lower values are sent first.
+PRIORITY_VERIFICATION = 0
+PRIORITY_BULK = 10
+
+# Claim due messages, highest priority first. SKIP LOCKED keeps two
+# dispatchers (e.g. during a rolling restart) from sending the same row.
+_CLAIM_SQL = """
+    UPDATE email_outbox SET status = 'sending', attempts = attempts + 1, claimed_at = now()
+    WHERE id IN (
+        SELECT id FROM email_outbox
+        WHERE status = 'pending' AND next_attempt_at <= now()
+        ORDER BY priority, id
+        LIMIT $1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, recipient, subject, body, priority, attempts
+"""
+
+# Requeue messages whose dispatcher stopped mid-send. Rows claimed within the
+# lease may still be in flight on another instance, so they are left alone.
+_RECLAIM_SQL = """
+    UPDATE email_outbox SET status = 'pending'
+    WHERE status = 'sending' AND claimed_at < now() - make_interval(secs => $1)
+"""
+
+
+def _quota_day():
+    """The quota resets at midnight UTC, independent of when the bot started."""
+    return datetime.now(timezone.utc).date()
+
+
+def _next_quota_reset():
+    return datetime.combine(_quota_day() + timedelta(days=1), datetime.min.time(), timezone.utc)
+
 
 class EmailSender:
+    """
+    Sends mail through a persisted outbox (the email_outbox table). A background
+    dispatcher claims due rows, sends them on the SMTP pool, and retries failures
+    with exponential backoff. The daily quota is counted in email_quota so it
+    survives restarts.
+    """
+
+    MAX_ATTEMPTS = 5
+    RETRY_BASE = 10  # Seconds before the first retry; doubles each attempt
+    DELIVERY_TIMEOUT = 60  # How long send_email waits for confirmation
+    POLL_INTERVAL = 30  # How often the dispatcher checks for due retries
+    SENDING_LEASE = 300  # Seconds before a claimed message counts as abandoned
+
     def __init__(self):
         self.limit = 495
-        self.counter = self.limit
-        self.smtp_server = "smtp.gmail.com"
-        self.port = 465  # For SSL
+        self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
+        self.port = int(os.getenv("SMTP_PORT", "465"))
+        self.use_ssl = os.getenv("SMTP_SSL", "true").lower() != "false"
         self.sender_email = os.getenv("GMAIL_ADDRESS")
         self.password = os.getenv("GMAIL_APP_PASSWORD")
-        self.lock = asyncio.Lock()
         self._task = None
+        self._wakeup = asyncio.Event()
+        # Outbox id -> future resolved with (success, message) once delivered or dropped.
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self.pool = SmtpPool(
+            self.smtp_server,
+            self.port,
+            use_ssl=self.use_ssl,
+            username=self.sender_email,
+            password=self.password,
+            max_connections=int(os.getenv("SMTP_MAX_CONNECTIONS", "3")),
+        )
 
     async def start(self):
-        """Starts the background task to reset the counter daily."""
+        """Recover the outbox after a restart and start the dispatcher."""
         if self._task is None:
-            self._task = asyncio.create_task(self._reset_counter_daily())
+            # A verification session is saved at its `email` step until the code is
+            # delivered, so a resumed session asks for the address again and sends a
+            # fresh code. Codes still queued from before the restart are never awaited.
+            await db.execute(
+                "DELETE FROM email_outbox WHERE priority = $1", PRIORITY_VERIFICATION
+            )
+            await self._reclaim_abandoned()
+            self._task = asyncio.create_task(self._dispatch_loop())
 
-    async def _reset_counter_daily(self):
-        while True:
-            await asyncio.sleep(86400)  # 24 hours
-            async with self.lock:
-                self.counter = self.limit
-            print("Email counter has been reset.")
-
-    async def send_email(self, receiver_email, subject, body):
-        async with self.lock:
-            if self.counter <= 0:
-                return False, "Daily email limit reached. Please try again in 24 hours."
-            
-            # New detailed check for environment variables
-            missing_vars = []
-            if not self.sender_email:
-                missing_vars.append("GMAIL_ADDRESS")
-            if not self.password:
-                missing_vars.append("GMAIL_APP_PASSWORD")
-
-            if missing_vars:
-                error_message = f"Email service is not configured. Missing environment variables: {', '.join(missing_vars)}."
-                print(f"ERROR: {error_message}") # Also print to console for debugging
-                return False, error_message
-
-            msg = EmailMessage()
-            msg.set_content(body)
-            msg['Subject'] = subject
-            msg['From'] = self.sender_email
-            msg['To'] = receiver_email
+    async def _reclaim_abandoned(self):
+        await db.execute(_RECLAIM_SQL, float(self.SENDING_LEASE))
+
+    def _missing_config(self) -> Optional[str]:
+        # New detailed check for environment variables
+        missing_vars = []
+        if not self.sender_email:
+            missing_vars.append("GMAIL_ADDRESS")
+        if not self.password:
+            missing_vars.append("GMAIL_APP_PASSWORD")
+
+        if missing_vars:
+            error_message = f"Email service is not configured. Missing environment variables: {', '.join(missing_vars)}."
+            print(f"ERROR: {error_message}") # Also print to console for debugging
+            return error_message
+        return None
+
+    async def queue_email(self, receiver_email, subject, body, priority=PRIORITY_BULK, waiter=None) -> int:
+        """Add a message to the outbox and return its id without waiting for delivery."""
+        rows = await db.execute(
+            """
+            INSERT INTO email_outbox (recipient, subject, body, priority)
+            VALUES ($1, $2, $3, $4)
+            RETURNING id
+            """,
+            receiver_email,
+            subject,
+            body,
+            priority,
+        )
+        email_id = rows[0]["id"]
+        if waiter is not None:
+            self._waiters[email_id] = waiter
+        self._wakeup.set()
+        return email_id
 
+    async def send_email(self, receiver_email, subject, body, priority=PRIORITY_VERIFICATION):
+        """Queue a message and wait until it is delivered or dropped. Returns (success, message)."""
+        error_message = self._missing_config()
+        if error_message:
+            return False, error_message
+
+        waiter = asyncio.get_running_loop().create_future()
+        try:
+            email_id = await self.queue_email(receiver_email, subject, body, priority, waiter=waiter)
+        except Exception as e:
+            print(f"Error queueing email: {e}")
+            return False, "Failed to send verification email."
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), self.DELIVERY_TIMEOUT)
+        except asyncio.TimeoutError:
+            # Don't deliver a code the caller has already given up on.
+            self._waiters.pop(email_id, None)
+            await db.execute(
+                "DELETE FROM email_outbox WHERE id = $1 AND status = 'pending'", email_id
+            )
+            return False, "Email delivery is delayed. Please try again later."
+
+    def _resolve(self, email_id: int, success: bool, message: str):
+        waiter = self._waiters.pop(email_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result((success, message))
+
+    async def _dispatch_loop(self):
+        while True:
+            # Clear before claiming so a message queued mid-batch still wakes us.
+            self._wakeup.clear()
             try:
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(None, self._send_smtp, msg)
-                self.counter -= 1
-                print(f"Email sent to {receiver_email}. Remaining emails: {self.counter}")
-                return True, "Email sent successfully."
+                claimed = await self._dispatch_batch()
             except Exception as e:
-                print(f"Error sending email: {e}")
-                return False, "Failed to send verification email."
-    
-    def _send_smtp(self, msg):
-        context = ssl.create_default_context()
-        with smtplib.SMTP_SSL(self.smtp_server, self.port, context=context) as server:
-            server.login(self.sender_email, self.password)
-            server.send_message(msg)
+                print(f"Error in email dispatcher: {e}")
+                claimed = 0
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Idle: pick up anything a stopped instance left mid-send.
+                    try:
+                        await self._reclaim_abandoned()
+                    except Exception as e:
+                        print(f"Error reclaiming abandoned emails: {e}")
+
+    async def _dispatch_batch(self) -> int:
+        """Claim up to one message per SMTP session and send them concurrently."""
+        rows = await db.execute(_CLAIM_SQL, self.pool.max_connections)
+        if rows:
+            results = await asyncio.gather(
+                *(self._deliver(row) for row in rows), return_exceptions=True
+            )
+            for row, result in zip(rows, results):
+                if isinstance(result, Exception):
+                    await self._delivery_failed(row, result)
+        return len(rows)
+
+    async def _delivery_failed(self, row, error: Exception):
+        """
+        A delivery raised outside the SMTP send (e.g. a quota query failed).
+        Treat it as a failed attempt so the row leaves 'sending' and its waiter
+        is answered once retries run out.
+        """
+        print(f"Error delivering email {row['id']}: {error}")
+        try:
+            await self._retry_or_drop(row, error)
+        except Exception as e:
+            # The row stays 'sending' until its lease expires; don't leave the
+            # caller waiting for it.
+            print(f"Error rescheduling email {row['id']}: {e}")
+            self._resolve(row["id"], False, "Failed to send verification email.")
+
+    async def _reserve_quota(self) -> Optional[int]:
+        """Count one send against today's quota. Returns today's total, or None if exhausted."""
+        rows = await db.execute(
+            """
+            INSERT INTO email_quota (day, sent) VALUES ($1, 1)
+            ON CONFLICT (day) DO UPDATE SET sent = email_quota.sent + 1
+            WHERE email_quota.sent < $2
+            RETURNING sent
+            """,
+            _quota_day(),
+            self.limit,
+        )
+        return rows[0]["sent"] if rows else None
+
+    async def _release_quota(self):
+        await db.execute(
+            "UPDATE email_quota SET sent = sent - 1 WHERE day = $1 AND sent > 0",
+            _quota_day(),
+        )
+
+    async def _deliver(self, row):
+        email_id = row["id"]
+        sent_today = await self._reserve_quota()
+        if sent_today is None:
+            if row["priority"] == PRIORITY_VERIFICATION:
+                await db.execute("DELETE FROM email_outbox WHERE id = $1", email_id)
+                self._resolve(email_id, False, "Daily email limit reached. Please try again tomorrow.")
+            else:
+                # Bulk mail waits for the quota to reset; this attempt doesn't count.
+                await db.execute(
+                    """
+                    UPDATE email_outbox
+                    SET status = 'pending', attempts = attempts - 1, next_attempt_at = $2
+                    WHERE id = $1
+                    """,
+                    email_id,
+                    _next_quota_reset(),
+                )
+            return
+
+        msg = EmailMessage()
+        msg.set_content(row["body"])
+        msg['Subject'] = row["subject"]
+        msg['From'] = self.sender_email
+        msg['To'] = row["recipient"]
+
+        try:
+            await self.pool.send(msg)
+        except Exception as e:
+            print(f"Error sending email {email_id} (attempt {row['attempts']}): {e}")
+            await self._release_quota()
+            await self._retry_or_drop(row, e)
+            return
+
+        # Delivered mail is not kept; the outbox only holds messages in flight.
+        await db.execute("DELETE FROM email_outbox WHERE id = $1", email_id)
+        print(f"Email sent to {row['recipient']}. Sent today: {sent_today}/{self.limit}")
+        self._resolve(email_id, True, "Email sent successfully.")
+
+    async def _retry_or_drop(self, row, error: Exception):
+        email_id = row["id"]
+        if row["attempts"] >= self.MAX_ATTEMPTS:
+            await db.execute("DELETE FROM email_outbox WHERE id = $1", email_id)
+            self._resolve(email_id, False, "Failed to send verification email.")
+            return
+
+        delay = self.RETRY_BASE * 2 ** (row["attempts"] - 1)
+        await db.execute(
+            """
+            UPDATE email_outbox
+            SET status = 'pending', last_error = $2,
+                next_attempt_at = now() + make_interval(secs => $3)
+            WHERE id = $1
+            """,
+            email_id,
+            str(error),
+            float(delay),
+        )
 
 email_sender = EmailSender()
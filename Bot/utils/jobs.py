@@ -0,0 +1,180 @@
+import asyncio
+import itertools
+import time
+import traceback
+from typing import Awaitable, Callable, Dict, List, Optional
+import discord
+
+MESSAGE_LIMIT = 2000
+
+
+def split_message(text: str, limit: int = MESSAGE_LIMIT) -> List[str]:
+    """Split text into chunks under Discord's message limit, preferring line breaks."""
+    chunks = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def send_chunked(channel: discord.abc.Messageable, text: str):
+    """Send a long message as several messages under the 2000 character limit."""
+    for chunk in split_message(text):
+        await channel.send(chunk)
+
+
+class Job:
+    """
+    A long-running admin task. Progress is reported by editing a single message
+    in the job's channel, so nothing depends on the 15-minute interaction token.
+    """
+
+    PROGRESS_INTERVAL = 5.0  # Minimum seconds between progress message edits
+
+    def __init__(self, job_id: int, name: str, guild_id: int, user_id: int, channel):
+        self.id = job_id
+        self.name = name
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.channel = channel
+        self.status = "queued"  # queued, running, done, failed, cancelled
+        self.done = 0
+        self.total: Optional[int] = None
+        self.note = ""
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._progress_message = None
+        self._last_publish = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+    def describe(self) -> str:
+        """One-line status for progress messages and /job status."""
+        line = f"Job `#{self.id}` **{self.name}**: {self.status}"
+        if self.total:
+            percent = self.done * 100 // self.total
+            line += f" ({self.done}/{self.total}, {percent}%)"
+        elif self.done:
+            line += f" ({self.done})"
+        if self.note:
+            line += f" - {self.note}"
+        if self.error:
+            line += f"\nError: {self.error}"
+        return line
+
+    async def report(self, done: int, total: Optional[int] = None, note: str = ""):
+        """Record progress; the channel message is refreshed at most every PROGRESS_INTERVAL."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if note:
+            self.note = note
+        if time.monotonic() - self._last_publish >= self.PROGRESS_INTERVAL:
+            await self.publish()
+
+    async def publish(self):
+        """Post or edit this job's progress message."""
+        self._last_publish = time.monotonic()
+        if self.channel is None:
+            return
+        try:
+            if self._progress_message is None:
+                self._progress_message = await self.channel.send(self.describe())
+            else:
+                await self._progress_message.edit(content=self.describe())
+        except discord.HTTPException as e:
+            print(f"Failed to publish progress for job #{self.id}: {e}")
+
+
+class JobManager:
+    """Runs admin work in background tasks with a cap on concurrent jobs."""
+
+    HISTORY = 50  # Finished jobs kept for /job status
+
+    def __init__(self, max_concurrent: int = 2):
+        self._jobs: Dict[int, Job] = {}
+        self._ids = itertools.count(1)
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def submit(
+        self,
+        name: str,
+        work: Callable[[Job], Awaitable[Optional[str]]],
+        *,
+        guild_id: int,
+        user_id: int,
+        channel,
+    ) -> Job:
+        """
+        Start `work(job)` in the background and return the job immediately.
+        The string `work` returns is posted to the channel when it finishes.
+        """
+        job = Job(next(self._ids), name, guild_id, user_id, channel)
+        self._jobs[job.id] = job
+        job._task = asyncio.create_task(self._run(job, work))
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[Optional[str]]]):
+        try:
+            async with self._semaphore:
+                job.status = "running"
+                await job.publish()
+                job.result = await work(job)
+                job.status = "done"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            traceback.print_exc()
+        finally:
+            job.finished_at = time.time()
+            await job.publish()
+            if job.result and job.channel is not None:
+                try:
+                    await send_chunked(job.channel, job.result)
+                except discord.HTTPException as e:
+                    print(f"Failed to post result for job #{job.id}: {e}")
+            self._prune()
+
+    def get(self, job_id: int) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self, guild_id: int) -> List[Job]:
+        """Jobs for a guild, newest first."""
+        jobs = [job for job in self._jobs.values() if job.guild_id == guild_id]
+        return sorted(jobs, key=lambda job: job.id, reverse=True)
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished or job._task is None:
+            return False
+        job._task.cancel()
+        return True
+
+    def _prune(self):
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda job: job.id)[: -self.HISTORY]:
+            self._jobs.pop(job.id, None)
+
+
+job_manager = JobManager()
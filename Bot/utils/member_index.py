@@ -0,0 +1,130 @@
+import discord
+from typing import Dict, Optional, Set
+
+
+class _GuildMembers:
+    """Lower-cased username and global name -> member IDs for one guild."""
+
+    def __init__(self):
+        self.by_name: Dict[str, int] = {}
+        self.by_global_name: Dict[str, Set[int]] = {}
+        self.keys: Dict[int, tuple] = {}
+
+    def add(self, member: discord.abc.User):
+        self.remove(member.id)
+        name = member.name.lower()
+        global_name = member.global_name.lower() if member.global_name else None
+        self.by_name[name] = member.id
+        if global_name:
+            self.by_global_name.setdefault(global_name, set()).add(member.id)
+        self.keys[member.id] = (name, global_name)
+
+    def remove(self, member_id: int):
+        keys = self.keys.pop(member_id, None)
+        if keys is None:
+            return
+        name, global_name = keys
+        if self.by_name.get(name) == member_id:
+            del self.by_name[name]
+        if global_name:
+            ids = self.by_global_name.get(global_name)
+            if ids:
+                ids.discard(member_id)
+                if not ids:
+                    del self.by_global_name[global_name]
+
+
+class MemberIndex:
+    """
+    Per-guild index for finding a member by username without scanning
+    guild.members. A guild is indexed on its first lookup after it has been
+    chunked and then kept current from the member and user gateway events
+    registered in main.py; misses are checked against guild.members.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, _GuildMembers] = {}
+
+    def _index(self, guild: discord.Guild) -> Optional[_GuildMembers]:
+        index = self._guilds.get(guild.id)
+        # Before chunking, guild.members holds only the members seen so far, so
+        # an index built from it would miss everyone else until it was rebuilt.
+        if index is None and guild.chunked:
+            index = self._rebuild(guild)
+        return index
+
+    def _rebuild(self, guild: discord.Guild) -> _GuildMembers:
+        index = _GuildMembers()
+        for member in guild.members:
+            index.add(member)
+        self._guilds[guild.id] = index
+        return index
+
+    @staticmethod
+    def _scan(guild: discord.Guild, key: str) -> Optional[discord.Member]:
+        """The index lookup done by walking guild.members."""
+        by_global_name = []
+        for member in guild.members:
+            if member.name.lower() == key:
+                return member
+            if member.global_name and member.global_name.lower() == key:
+                by_global_name.append(member)
+        return by_global_name[0] if len(by_global_name) == 1 else None
+
+    def lookup(self, guild: discord.Guild, query: str) -> Optional[discord.Member]:
+        """
+        Find a member by username, ignoring case and a leading '@'. Falls back
+        to the global display name when exactly one member has it.
+        """
+        key = query.strip().lstrip("@").lower()
+        if not key:
+            return None
+
+        index = self._index(guild)
+        if index is not None:
+            member_id = index.by_name.get(key)
+            if member_id is None:
+                ids = index.by_global_name.get(key, ())
+                if len(ids) == 1:
+                    member_id = next(iter(ids))
+            if member_id is not None:
+                member = guild.get_member(member_id)
+                if member is not None:
+                    return member
+
+        # Not indexed yet, or the index missed an event: check the member list,
+        # and rebuild if it knew someone the index didn't.
+        member = self._scan(guild, key)
+        if member is not None and guild.chunked:
+            self._rebuild(guild)
+        return member
+
+    def invalidate(self, guild_id: int):
+        self._guilds.pop(guild_id, None)
+
+    # --- Gateway listeners ---
+
+    async def on_member_join(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.add(member)
+
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        await self.on_member_join(after)
+
+    async def on_member_remove(self, member: discord.Member):
+        index = self._guilds.get(member.guild.id)
+        if index is not None:
+            index.remove(member.id)
+
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # Username and global name changes arrive as user updates, not member updates.
+        for index in self._guilds.values():
+            if after.id in index.keys:
+                index.add(after)
+
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.invalidate(guild.id)
+
+
+member_index = MemberIndex()
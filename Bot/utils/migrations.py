@@ -0,0 +1,57 @@
+import re
+from pathlib import Path
+from typing import List, Tuple
+
+# init.sql only runs when the database volume is first created. Schema changes
+# after that ship as numbered files here and are applied on startup, so
+# existing deployments pick them up too. Write each file so it also succeeds
+# on a fresh database (IF NOT EXISTS), where init.sql already made the change.
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+_FILENAME_RE = re.compile(r"^\d{3}_\w+\.sql$")
+
+# Held while migrating, so two bot processes starting together take turns.
+_LOCK_KEY = 5_176_023
+
+
+def migration_files(directory: Path = MIGRATIONS_DIR) -> List[Tuple[str, str]]:
+    """(version, sql) for every migration file, in the order they apply."""
+    return [
+        (path.stem, path.read_text())
+        for path in sorted(directory.iterdir())
+        if _FILENAME_RE.match(path.name)
+    ]
+
+
+async def apply_migrations(connection, directory: Path = MIGRATIONS_DIR) -> List[str]:
+    """
+    Apply every migration not yet recorded in schema_migrations, each in its
+    own transaction, and return the versions applied. A failing migration
+    raises and leaves the later ones pending.
+    """
+    await connection.execute("SELECT pg_advisory_lock($1)", _LOCK_KEY)
+    try:
+        await connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version    VARCHAR(100) PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+        rows = await connection.fetch("SELECT version FROM schema_migrations")
+        applied = {r["version"] for r in rows}
+
+        newly_applied = []
+        for version, sql in migration_files(directory):
+            if version in applied:
+                continue
+            async with connection.transaction():
+                await connection.execute(sql)
+                await connection.execute(
+                    "INSERT INTO schema_migrations (version) VALUES ($1)", version
+                )
+            print(f"Applied database migration {version}.")
+            newly_applied.append(version)
+        return newly_applied
+    finally:
+        await connection.execute("SELECT pg_advisory_unlock($1)", _LOCK_KEY)
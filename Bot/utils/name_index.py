@@ -0,0 +1,73 @@
+import asyncio
+from collections import Counter
+from typing import List, Optional
+from discord import app_commands
+from .db import db
+
+
+class NameIndex:
+    """
+    In-memory list of names for autocomplete. Loaded with one query on first
+    use; the commands that change the underlying table call add()/discard()
+    (or invalidate() to force a reload), so keystrokes never reach Postgres.
+
+    Names need not be unique (two active teams can share a nick), so each is
+    counted and only leaves the list when its last row is discarded.
+    """
+
+    def __init__(self, query: str, column: str):
+        self.query = query
+        self.column = column
+        self._names: Optional[List[str]] = None
+        self._counts: Counter = Counter()
+        self._lock = asyncio.Lock()
+
+    async def names(self) -> List[str]:
+        if self._names is None:
+            async with self._lock:
+                if self._names is None:
+                    rows = await db.execute(self.query)
+                    self._counts = Counter(r[self.column] for r in rows)
+                    self._names = sorted(self._counts, key=str.lower)
+        return self._names
+
+    async def complete(self, current: str, limit: int = 25) -> List[str]:
+        """Names containing `current` (case-insensitive), prefix matches first."""
+        needle = current.strip().lower()
+        names = await self.names()
+        if not needle:
+            return names[:limit]
+        prefix, substring = [], []
+        for name in names:
+            position = name.lower().find(needle)
+            if position == 0:
+                prefix.append(name)
+            elif position > 0:
+                substring.append(name)
+        return (prefix + substring)[:limit]
+
+    async def choices(self, current: str) -> List[app_commands.Choice[str]]:
+        return [app_commands.Choice(name=name, value=name) for name in await self.complete(current)]
+
+    def add(self, name: Optional[str]):
+        if self._names is None or not name:
+            return
+        self._counts[name] += 1
+        if self._counts[name] == 1:
+            self._names = sorted([*self._names, name], key=str.lower)
+
+    def discard(self, name: str):
+        if self._names is None or name not in self._counts:
+            return
+        self._counts[name] -= 1
+        if self._counts[name] <= 0:
+            del self._counts[name]
+            self._names = [n for n in self._names if n != name]
+
+    def invalidate(self):
+        self._names = None
+        self._counts = Counter()
+
+
+room_names = NameIndex("SELECT room_name FROM rooms", "room_name")
+active_team_nicks = NameIndex("SELECT team_nick FROM teams WHERE archived = FALSE", "team_nick")
@@ -1,31 +1,72 @@
 import discord
-from typing import Dict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+from .concurrency import bounded_gather
+
+# Every member edit in a guild shares one rate-limit bucket, so extra
+# concurrency only queues behind discord.py's bucket lock.
+ROLE_EDIT_LIMIT = 2
+
+
+def status_role_set(member: discord.Member, new_role: discord.Role, all_status_roles: Dict[str, discord.Role]) -> Optional[List[discord.Role]]:
+    """
+    The member's roles with every other status role swapped for `new_role`,
+    or None if they already have exactly that.
+    """
+    all_status_role_ids = {role.id for role in all_status_roles.values() if role is not None}
+    # @everyone shares the guild's ID and cannot be sent in a role list.
+    current = [role for role in member.roles if role.id != member.guild.id]
+    roles = [role for role in current if role.id not in all_status_role_ids or role.id == new_role.id]
+    if all(role.id != new_role.id for role in roles):
+        roles.append(new_role)
+    if {role.id for role in roles} == {role.id for role in current}:
+        return None
+    return roles
+
+
+async def set_status_role(member: discord.Member, new_role: discord.Role, all_status_roles: Dict[str, discord.Role], reason: Optional[str] = None) -> bool:
+    """
+    Give a member `new_role` as their only status role with a single
+    member.edit(roles=...). Returns False if nothing needed to change.
+    """
+    roles = status_role_set(member, new_role, all_status_roles)
+    if roles is None:
+        return False
+    await member.edit(roles=roles, reason=reason)
+    return True
+
+
+async def bulk_set_status_role(
+    members: Iterable[discord.Member],
+    new_role: discord.Role,
+    all_status_roles: Dict[str, discord.Role],
+    reason: Optional[str] = None,
+    on_done: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> List[object]:
+    """
+    set_status_role for many members, at most ROLE_EDIT_LIMIT edits in flight.
+    Results follow bounded_gather: one entry per member, exceptions in place.
+    """
+    return await bounded_gather(
+        lambda member: set_status_role(member, new_role, all_status_roles, reason),
+        members,
+        limit=ROLE_EDIT_LIMIT,
+        on_done=on_done,
+    )
+
 
 async def handle_role_change(guild: discord.Guild, member_id: int, new_role: discord.Role, all_status_roles: Dict[str, discord.Role]):
     """
     Manages a user's status roles, ensuring they only have one at a time.
-    Fetches a fresh member object to ensure roles are up-to-date.
-    Removes all other status roles before adding the new one.
-    """
-    try:
-        member = await guild.fetch_member(member_id)
-    except discord.NotFound:
-        # If the member is no longer in the server, we can't do anything.
-        print(f"Could not find member with ID {member_id} in guild {guild.name} to perform role change.")
-        return
-
-    roles_to_remove = []
-    
-    # Create a set of all status role IDs for efficient lookup
-    all_status_role_ids = {role.id for role in all_status_roles.values() if role is not None}
+    Uses the gateway member cache, which the members intent keeps current,
+    and only fetches the member when they are not cached.
+    """
+    member = guild.get_member(member_id)
+    if member is None:
+        try:
+            member = await guild.fetch_member(member_id)
+        except discord.NotFound:
+            # If the member is no longer in the server, we can't do anything.
+            print(f"Could not find member with ID {member_id} in guild {guild.name} to perform role change.")
+            return
 
-    for role in member.roles:
-        # If the member has a status role that is not the new one, mark it for removal
-        if role.id in all_status_role_ids and role.id != new_role.id:
-            roles_to_remove.append(role)
-    
-    if roles_to_remove:
-        await member.remove_roles(*roles_to_remove)
-    
-    if new_role not in member.roles:
-        await member.add_roles(new_role)
+    await set_status_role(member, new_role, all_status_roles)
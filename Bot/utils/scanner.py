@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import os
+import struct
+from collections import OrderedDict
+from typing import Optional, Tuple
+import discord
+
+# (is_clean, message): True/False for a verdict, None if the scan failed.
+ScanResult = Tuple[Optional[bool], str]
+
+
+class ClamdError(Exception):
+    """clamd answered, but with an error instead of a verdict."""
+
+
+class ClamAVScanner:
+    """
+    Scans uploads with a long-running clamd over its local socket, streaming the
+    bytes with INSTREAM so nothing touches disk and signatures stay loaded.
+    Falls back to the clamscan CLI (fed on stdin) when clamd is unavailable.
+    Verdicts are cached by SHA-256 of the content.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        socket_path: str = None,
+        max_concurrent: int = None,
+        cache_size: int = 256,
+        timeout: float = 60.0,
+    ):
+        self.socket_path = socket_path or os.getenv("CLAMD_SOCKET", "/run/clamav/clamd.ctl")
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._semaphore = asyncio.Semaphore(
+            max_concurrent or int(os.getenv("CLAMD_MAX_SCANS", "2"))
+        )
+        self._cache: "OrderedDict[str, ScanResult]" = OrderedDict()
+
+    async def scan_attachment(self, attachment: discord.Attachment) -> ScanResult:
+        try:
+            data = await attachment.read()
+        except discord.HTTPException as e:
+            print(f"Could not download attachment for scanning: {e}")
+            return None, "An unexpected error occurred while scanning the file."
+        return await self.scan_bytes(data)
+
+    async def scan_bytes(self, data: bytes) -> ScanResult:
+        digest = hashlib.sha256(data).hexdigest()
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            return cached
+
+        async with self._semaphore:
+            try:
+                result = await self._scan_clamd(data)
+            except (OSError, asyncio.TimeoutError, ClamdError) as e:
+                print(f"clamd scan failed, falling back to clamscan: {e}")
+                result = await self._scan_cli(data)
+
+        # Only cache verdicts; a failed scan should be retried next time.
+        if result[0] is not None:
+            self._cache[digest] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    async def _scan_clamd(self, data: bytes) -> ScanResult:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_unix_connection(self.socket_path), self.timeout
+        )
+        try:
+            writer.write(b"zINSTREAM\0")
+            for start in range(0, len(data), self.CHUNK_SIZE):
+                chunk = data[start:start + self.CHUNK_SIZE]
+                writer.write(struct.pack("!L", len(chunk)) + chunk)
+                await writer.drain()
+            writer.write(struct.pack("!L", 0))
+            await writer.drain()
+            reply = await asyncio.wait_for(reader.readuntil(b"\0"), self.timeout)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        return self.parse_reply(reply.rstrip(b"\0").decode(errors="replace"))
+
+    @staticmethod
+    def parse_reply(reply: str) -> ScanResult:
+        """Parse a clamd reply such as `stream: OK` or `stream: Eicar-Signature FOUND`."""
+        status = reply.split(": ", 1)[-1].strip()
+        if status == "OK":
+            return True, "Clean"
+        if status.endswith(" FOUND"):
+            return False, f"Infected with `{status[:-len(' FOUND')]}`"
+        raise ClamdError(reply)
+
+    async def _scan_cli(self, data: bytes) -> ScanResult:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                'clamscan', '--no-summary', '-',
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await proc.communicate(data)
+        except Exception as e:
+            print(f"Clamscan execution error: {e}")
+            return None, "An unexpected error occurred while scanning the file."
+
+        if proc.returncode == 0:
+            return True, "Clean"
+        elif proc.returncode == 1:
+            output = stdout.decode().strip()
+            virus_name = output.split(': ')[1].replace(' FOUND', '')
+            return False, f"Infected with `{virus_name}`"
+        else:
+            error_details = stderr.decode().strip()
+            print(f"Clamscan error (exit code {proc.returncode}): {error_details}")
+            return None, "An error occurred during the local file scan."
+
+
+scanner = ClamAVScanner()
@@ -0,0 +1,89 @@
+import asyncpg
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+from .db import db
+
+SEARCH_LIMIT = 5
+
+T = TypeVar("T")
+
+# kind -> (table, name column, row filter). Both columns have pg_trgm GIN
+# indexes (init.sql, and migrations/002_name_search_trgm.sql for existing
+# databases), which serve the % similarity operator and the leading-wildcard
+# ILIKE alike.
+_TARGETS = {
+    "active_teams": ("teams", "team_nick", "archived = FALSE"),
+    "rooms": ("rooms", "room_name", "TRUE"),
+}
+
+for _kind, (_table, _column, _condition) in _TARGETS.items():
+    db.register_statement(
+        f"search_{_kind}",
+        f"""
+        SELECT {_column} AS name, similarity({_column}, $1) AS score
+        FROM {_table}
+        WHERE {_condition} AND ({_column} % $1 OR {_column} ILIKE $2)
+        ORDER BY lower({_column}) = lower($1) DESC, score DESC, {_column}
+        LIMIT $3
+        """,
+    )
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+async def search_names(kind: str, query: str, limit: int = SEARCH_LIMIT) -> List[str]:
+    """
+    Names similar to `query`, best first: a case-insensitive exact match,
+    then by trigram similarity. Substring matches are always included, so
+    short queries still find names that contain them.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    try:
+        rows = await db.execute_named(f"search_{kind}", query, _like_pattern(query), limit)
+    except asyncpg.exceptions.UndefinedFunctionError as e:
+        # pg_trgm is not installed in this database; lookups stay exact-only.
+        print(f"Name search unavailable: {e}")
+        return []
+    return [r["name"] for r in rows]
+
+
+async def resolve_name(kind: str, query: str) -> Tuple[Optional[str], List[str]]:
+    """
+    Return (name, suggestions). `name` is the stored spelling when exactly one
+    name matches `query` ignoring case; otherwise it is None and
+    `suggestions` holds the closest names for a "did you mean" reply.
+    """
+    matches = await search_names(kind, query)
+    exact = [name for name in matches if name.lower() == query.strip().lower()]
+    if len(exact) == 1:
+        return exact[0], []
+    return None, matches
+
+
+async def find_by_name(
+    kind: str, name: str, fetch: Callable[[str], Awaitable[Optional[T]]]
+) -> Tuple[Optional[T], str, List[str]]:
+    """
+    Run `fetch(name)`, an exact lookup that returns something falsy on a miss.
+    On a miss, retry once with the stored spelling when resolve_name() finds
+    one; a fuzzy match is never used. Returns (result, name, suggestions): the
+    last result, the name it was fetched with, and the suggestions to show if
+    the result is still empty.
+    """
+    result = await fetch(name)
+    if result:
+        return result, name, []
+    resolved, suggestions = await resolve_name(kind, name)
+    if resolved:
+        return await fetch(resolved), resolved, suggestions
+    return result, name, suggestions
+
+
+def did_you_mean(suggestions: List[str]) -> str:
+    if not suggestions:
+        return ""
+    return " Did you mean " + ", ".join(f"`{name}`" for name in suggestions) + "?"
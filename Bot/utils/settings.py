@@ -0,0 +1,99 @@
+import discord
+from typing import Dict, Optional, Set
+from .db import db
+
+
+class GuildSettings:
+    """
+    A guild's server_settings row with its IDs resolved against the gateway cache.
+    Lookups go through guild.get_role/get_channel, so deleted roles resolve to None.
+    """
+
+    def __init__(self, guild: discord.Guild, record: dict):
+        self.guild = guild
+        self.record = record
+
+    def get(self, key: str):
+        """Return a raw column value (e.g. `student_id`)."""
+        return self.record.get(key)
+
+    def _role(self, key: str) -> Optional[discord.Role]:
+        role_id = self.record.get(key)
+        return self.guild.get_role(role_id) if role_id else None
+
+    def _channel(self, key: str):
+        channel_id = self.record.get(key)
+        return self.guild.get_channel(channel_id) if channel_id else None
+
+    @property
+    def engineer_channel(self) -> Optional[discord.TextChannel]:
+        return self._channel("engineer_channel_id")
+
+    @property
+    def verify_channel(self) -> Optional[discord.TextChannel]:
+        return self._channel("verify_channel_id")
+
+    @property
+    def co_president_role(self) -> Optional[discord.Role]:
+        return self._role("co_president_id")
+
+    @property
+    def representative_role(self) -> Optional[discord.Role]:
+        return self._role("representative_id")
+
+    @property
+    def student_role(self) -> Optional[discord.Role]:
+        return self._role("student_id")
+
+    @property
+    def alumni_role(self) -> Optional[discord.Role]:
+        return self._role("alumni_id")
+
+    @property
+    def friend_role(self) -> Optional[discord.Role]:
+        return self._role("friend_id")
+
+    @property
+    def verified_role(self) -> Optional[discord.Role]:
+        return self._role("verified_id")
+
+    def status_roles(self) -> Dict[str, Optional[discord.Role]]:
+        """The mutually exclusive status roles, keyed the way handle_role_change expects."""
+        return {
+            "Student": self.student_role,
+            "Alumni": self.alumni_role,
+            "Friend": self.friend_role,
+            "Verified": self.verified_role,
+        }
+
+    def status_role_ids(self) -> Set[int]:
+        """IDs of the status roles that still exist; holding any of them means verified."""
+        return {role.id for role in self.status_roles().values() if role}
+
+
+class SettingsCache:
+    """
+    In-process cache of server_settings rows. Rows are loaded on first use and
+    only change during SetUp.setup.setup_guild, which invalidates the guild.
+    """
+
+    def __init__(self):
+        self._records: Dict[int, dict] = {}
+
+    async def get(self, guild: discord.Guild) -> Optional[GuildSettings]:
+        """Return the guild's settings, or None if the guild has not been set up."""
+        record = self._records.get(guild.id)
+        if record is None:
+            rows = await db.execute_named("server_settings", guild.id)
+            if not rows:
+                return None
+            record = dict(rows[0])
+            self._records[guild.id] = record
+        return GuildSettings(guild, record)
+
+    def invalidate(self, guild_id: int):
+        """Drop a guild's cached row so the next get() reloads it."""
+        self._records.pop(guild_id, None)
+
+
+settings_cache = SettingsCache()
@@ -18,3 +18,26 @@ async def add_user(user_id: int, years_remaining: int = None):
         user_id,
         years_remaining
     )
+
+
+async def add_users(users):
+    """
+    Adds or updates many users in one statement.
+
+    Args:
+        users (list[tuple[int, int]]): (discord_id, years_remaining) pairs.
+    """
+    if not users:
+        return
+    discord_ids = [user_id for user_id, _ in users]
+    years = [years_remaining for _, years_remaining in users]
+    await db.execute(
+        """
+        INSERT INTO users (discord_id, years_remaining)
+        SELECT * FROM unnest($1::bigint[], $2::int[])
+        ON CONFLICT (discord_id) DO UPDATE SET
+        years_remaining = EXCLUDED.years_remaining;
+        """,
+        discord_ids,
+        years
+    )
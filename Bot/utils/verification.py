@@ -1,13 +1,11 @@
 import discord
 from discord import app_commands
-from utils.db import db
+from utils.settings import settings_cache
 from verification_utils.student import start_student_verification
 from verification_utils.alumni import start_alumni_verification
 from verification_utils.friend import start_friend_verification
 from verification_utils.general import start_general_verification
-
-# This set will act as a lock to prevent users from starting multiple verification processes at once.
-VERIFYING_USERS = set()
+from utils.conversations import conversation_router
 
 class VerificationView(discord.ui.View):
     def __init__(self):
@@ -27,21 +25,16 @@ class VerificationView(discord.ui.View):
             print(error)
 
     async def _handle_verification(self, interaction: discord.Interaction, verification_function):
-        """A wrapper to handle the user verification lock."""
-        if interaction.user.id in VERIFYING_USERS:
+        """Start a verification flow unless the user is already in one."""
+        # The router holds each user's active conversation until it finishes or times out.
+        if conversation_router.is_active(interaction.user.id):
             await interaction.response.send_message(
                 "You already have a verification process active. Please complete or cancel it in your DMs.",
                 ephemeral=True
             )
             return
-        
-        VERIFYING_USERS.add(interaction.user.id)
-        try:
-            await verification_function(interaction)
-        finally:
-            # Ensure the user is always removed from the set when the process ends.
-            if interaction.user.id in VERIFYING_USERS:
-                VERIFYING_USERS.remove(interaction.user.id)
+
+        await verification_function(interaction)
 
     @discord.ui.button(label="Student", style=discord.ButtonStyle.primary, custom_id="student_verify")
     @app_commands.checks.cooldown(1, 600.0, key=lambda i: i.user.id)
@@ -80,21 +73,21 @@ async def _send_verification_embed(channel: discord.TextChannel):
 
 async def post_verification_message(guild: discord.Guild):
     """Posts the verification message in the guild's verification channel."""
-    settings = await db.execute("SELECT verify_channel_id FROM server_settings WHERE guild_id = $1", guild.id)
-    if not settings or not settings[0]['verify_channel_id']:
+    settings = await settings_cache.get(guild)
+    if settings is None:
         return
 
-    channel = guild.get_channel(settings[0]['verify_channel_id'])
+    channel = settings.verify_channel
     if channel:
         await _send_verification_embed(channel)
 
 async def refresh_verification_message(guild: discord.Guild):
     """Clears old verification messages and posts a new one."""
-    settings = await db.execute("SELECT verify_channel_id FROM server_settings WHERE guild_id = $1", guild.id)
-    if not settings or not settings[0]['verify_channel_id']:
+    settings = await settings_cache.get(guild)
+    if settings is None:
         return
 
-    channel = guild.get_channel(settings[0]['verify_channel_id'])
+    channel = settings.verify_channel
     if channel:
         async for message in channel.history(limit=100):
             if message.author == guild.me:
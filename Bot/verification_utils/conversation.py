@@ -0,0 +1,173 @@
+import discord
+from abc import abstractmethod
+import random
+import string
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from utils.conversations import Conversation, conversation_router
+from utils.email import email_sender
+from .sessions import session_store, new_code_hash, code_matches
+
+
+async def _send_ephemeral_error(interaction: discord.Interaction, message: str):
+    if interaction.response.is_done():
+        await interaction.followup.send(message, ephemeral=True)
+    else:
+        await interaction.response.send_message(message, ephemeral=True)
+
+
+# Flow name -> class, for rebuilding saved sessions.
+FLOWS: Dict[str, type] = {}
+
+
+class VerificationFlow(Conversation):
+    """
+    Base for the DM verification flows. Handles the opening DM, timeouts and
+    errors, the email code steps shared by the student, alumni and general
+    flows, and saving each step to the session store. Subclasses implement
+    `prompt()` and their own steps, and override `on_email_verified()` if
+    they send a code.
+    """
+
+    name = "verification"
+    MAX_CODE_ATTEMPTS = 3
+    privacy_notice = (
+        "**Privacy Notice:** The only information that will be stored is your Discord ID. "
+        "No other personal information is stored."
+    )
+    forbidden_message = (
+        "The bot encountered a permissions error. This could be because it cannot create DMs, or because its role "
+        "is not high enough in the server's role hierarchy to assign the 'Verified' role. Please check your "
+        "privacy settings and ask an administrator to check the bot's role position."
+    )
+
+    def __init__(self, user: discord.abc.User, guild: discord.Guild, interaction: Optional[discord.Interaction] = None):
+        super().__init__(user)
+        self.interaction = interaction
+        self.guild = guild
+        # Persisted state; the code itself and the email address never are.
+        self.code_salt: Optional[bytes] = None
+        self.code_hash: Optional[bytes] = None
+        self.attempts = 0
+        self.friend_id: Optional[int] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        FLOWS[cls.name] = cls
+
+    async def save(self):
+        await session_store.save(self)
+
+    async def discard(self):
+        await session_store.delete(self.user.id)
+
+    async def resumed(self, step: str, timeout: float):
+        """
+        Called when a saved session is rebuilt from the user's next DM.
+        Must expect() a step to continue, like any other handler.
+        """
+        await self.channel.send("Resuming your verification where you left off.")
+        self.expect(step, timeout=timeout)
+
+    async def start(self):
+        await self.interaction.response.send_message(
+            f"I've sent you a DM to begin the {self.name} verification process.", ephemeral=True
+        )
+        self.channel = await self.user.create_dm()
+        await self.channel.send(self.privacy_notice)
+        await self.prompt()
+
+    @abstractmethod
+    async def prompt(self):
+        """Send the first question and expect() the first step."""
+
+    async def on_timeout(self):
+        await self.channel.send("You took too long to respond. The verification process has expired. Please try again.")
+
+    async def on_error(self, error: Exception):
+        if isinstance(error, discord.errors.Forbidden):
+            if self.channel:
+                await self.channel.send(self.forbidden_message)
+            else:
+                await _send_ephemeral_error(
+                    self.interaction,
+                    "I couldn't send you a DM to start the process. Please check your privacy settings and allow DMs from server members.",
+                )
+            return
+
+        print(f"Error in {self.name} verification: {error}")
+        if self.channel:
+            await self.channel.send("An unexpected error occurred. Please contact an administrator.")
+        else:
+            await _send_ephemeral_error(
+                self.interaction,
+                "An unexpected error occurred. Please contact an administrator.",
+            )
+
+    # --- Email code steps ---
+
+    async def send_code(self, email_address: str, subject: str):
+        """Email a verification code and wait for it in the `code` step."""
+        verification_code = ''.join(random.choices(string.digits, k=6))
+        self.code_salt, self.code_hash = new_code_hash(verification_code)
+        self.attempts = 0
+
+        success, message = await email_sender.send_email(
+            email_address,
+            subject,
+            f"Your verification code is: {verification_code}"
+        )
+
+        if not success:
+            await self.channel.send(f"There was an error sending your verification email: {message}")
+            return
+
+        await self.channel.send(f"A verification code has been sent to `{email_address}`. Please enter the 6-digit code below. You have 5 minutes.")
+        self.expect("code")
+
+    def accepts_code(self, message: discord.Message) -> bool:
+        return message.content.strip().isdigit()
+
+    async def on_code(self, message: discord.Message):
+        if not code_matches(message.content.strip(), self.code_salt, self.code_hash):
+            self.attempts += 1
+            remaining = self.MAX_CODE_ATTEMPTS - self.attempts
+            if remaining <= 0:
+                await self.channel.send("Incorrect code. Please start the verification process again.")
+                return
+            await self.channel.send(f"Incorrect code. You have {remaining} attempt(s) left.")
+            self.expect("code", timeout=self.timeout)
+            return
+        await self.on_email_verified()
+
+    async def on_email_verified(self):
+        """
+        Continue the flow once the emailed code has been entered. By default
+        the user is told the email checked out and the conversation ends.
+        """
+        await self.channel.send("Email verification successful!")
+
+
+async def restore_verification(message: discord.Message) -> Optional[VerificationFlow]:
+    """Rebuild a saved verification session when its user sends the next DM."""
+    row = session_store.get(message.author.id)
+    if row is None or row["channel_id"] != message.channel.id:
+        return None
+
+    flow_cls = FLOWS.get(row["flow"])
+    guild = session_store.bot.get_guild(row["guild_id"]) if session_store.bot else None
+    if flow_cls is None or guild is None:
+        await session_store.delete(message.author.id)
+        return None
+
+    flow = flow_cls(message.author, guild)
+    flow.channel = message.channel
+    flow.code_salt = row["code_salt"]
+    flow.code_hash = row["code_hash"]
+    flow.attempts = row["attempts"]
+    flow.friend_id = row["friend_id"]
+
+    remaining = (row["expires_at"] - datetime.now(timezone.utc)).total_seconds()
+    conversation_router.restore(flow)
+    await conversation_router.resume(flow, flow.resumed, row["step"], max(remaining, 1.0))
+    return flow if conversation_router.get(flow.user.id) is flow else None
@@ -1,109 +1,108 @@
 import discord
-import asyncio
-from utils.db import db
+from utils.settings import settings_cache
 from utils.user_init import add_user
-from .friend_confirmation_view import FriendConfirmationView
 from utils.role_utils import handle_role_change
+from utils.conversations import conversation_router
+from utils.member_index import member_index
+from .friend_confirmation_view import FriendConfirmationView
+from .conversation import VerificationFlow
 
 
-async def _send_ephemeral_error(interaction: discord.Interaction, message: str):
-    if interaction.response.is_done():
-        await interaction.followup.send(message, ephemeral=True)
-    else:
-        await interaction.response.send_message(message, ephemeral=True)
+class FriendVerification(VerificationFlow):
+    """Friend's username -> the friend confirms with a button -> Friend role."""
 
-async def start_friend_verification(interaction: discord.Interaction):
-    """Initiates the friend verification process with confirmation from the friend."""
-    user_dm_channel = None
-    try:
-        user_dm_channel = await interaction.user.create_dm()
-        await interaction.response.send_message("I've sent you a DM to begin the friend verification process.", ephemeral=True)
+    name = "friend"
+    forbidden_message = (
+        "The bot encountered a permissions error. This is most likely because its role is not high enough "
+        "in the server's role hierarchy to assign the 'Friend' role. Please ask an administrator to move the bot's role up."
+    )
 
-        privacy_notice = (
-            "**Privacy Notice:** The only information that will be stored is your Discord ID. "
-            "No other personal information is stored."
-        )
-        await user_dm_channel.send(privacy_notice)
-        
-        await user_dm_channel.send("Please provide the exact Discord username (e.g., `username`) of a friend who is already a verified member of this server.")
+    @property
+    def friend_member(self):
+        return self.guild.get_member(self.friend_id) if self.friend_id else None
 
-        def check_username(m):
-            return m.channel == user_dm_channel and m.author == interaction.user
+    async def prompt(self):
+        await self.channel.send("Please provide the Discord username (e.g., `username`) of a friend who is already a verified member of this server.")
+        self.expect("username")
 
-        username_message = await interaction.client.wait_for('message', check=check_username, timeout=300.0)
-        friend_username = username_message.content.strip()
+    async def on_username(self, message: discord.Message):
+        friend_username = message.content.strip()
 
-        friend_member = discord.utils.get(interaction.guild.members, name=friend_username)
+        friend_member = member_index.lookup(self.guild, friend_username)
 
-        if not friend_member or friend_member.id == interaction.user.id:
-            await user_dm_channel.send(f"I couldn't find a valid member with that username. Please check the spelling and try again.")
+        if not friend_member or friend_member.id == self.user.id:
+            await self.channel.send(f"I couldn't find a valid member with that username. Please check the spelling and try again.")
             return
 
-        settings = await db.execute("SELECT student_id, verified_id, alumni_id, friend_id FROM server_settings WHERE guild_id = $1", interaction.guild.id)
-        if not settings:
-            await user_dm_channel.send("Role info is not configured. Please contact an admin.")
+        settings = await settings_cache.get(self.guild)
+        if settings is None:
+            await self.channel.send("Role info is not configured. Please contact an admin.")
             return
 
-        valid_role_ids = {settings[0][key] for key in ['student_id', 'verified_id', 'alumni_id', 'friend_id'] if settings[0].get(key)}
+        valid_role_ids = settings.status_role_ids()
         if not any(role.id in valid_role_ids for role in friend_member.roles):
-            await user_dm_channel.send(f"`{friend_username}` is not a verified member. Please provide the username of a verified member.")
+            await self.channel.send(f"`{friend_username}` is not a verified member. Please provide the username of a verified member.")
             return
 
-        await user_dm_channel.send(f"I have found `{friend_username}`. I will now ask for their confirmation. They have 30 minutes to respond.")
+        await self.channel.send(f"I have found `{friend_member.name}`. I will now ask for their confirmation. They have 30 minutes to respond.")
+        self.friend_id = friend_member.id
+        await self._request_confirmation(timeout=1800.0)
 
+    async def _request_confirmation(self, timeout: float):
+        friend_member = self.friend_member
         try:
             friend_dm_channel = await friend_member.create_dm()
-            confirmation_view = FriendConfirmationView(interaction.user, friend_member)
+            confirmation_view = FriendConfirmationView(self.user, friend_member, on_result=self._on_friend_result)
             await friend_dm_channel.send(
-                f"Hello! {interaction.user.mention} has requested to be verified as your friend in the `{interaction.guild.name}` server. "
+                f"Hello! {self.user.mention} has requested to be verified as your friend in the `{self.guild.name}` server. "
                 "Do you know this person?",
                 view=confirmation_view
             )
-            
-            await confirmation_view.wait() # Wait for the friend to click a button or for the view to time out
-
-            if confirmation_view.result is True:
-                friend_role = interaction.guild.get_role(settings[0].get('friend_id'))
-                if friend_role:
-                    all_status_roles = {
-                        'Student': interaction.guild.get_role(settings[0].get('student_id')),
-                        'Alumni': interaction.guild.get_role(settings[0].get('alumni_id')),
-                        'Friend': friend_role,
-                        'Verified': interaction.guild.get_role(settings[0].get('verified_id')),
-                    }
-                    await handle_role_change(interaction.guild, interaction.user.id, friend_role, all_status_roles)
-                    await add_user(interaction.user.id, -1)
-                    await user_dm_channel.send(f"`{friend_username}` has confirmed your request! Your previous status roles have been removed and you have been granted the {friend_role.name} role.")
-                else:
-                    await user_dm_channel.send("Your friend confirmed, but the 'Friend' role is not configured on this server.")
-            elif confirmation_view.result is False:
-                await user_dm_channel.send(f"Your verification request was denied by `{friend_username}`.")
-            else: # Timeout
-                await user_dm_channel.send(f"`{friend_username}` did not respond in time. Your verification request has expired.")
-
         except discord.Forbidden:
-            await user_dm_channel.send(f"I could not send a DM to `{friend_username}`. They may have DMs disabled. Please ask them to enable DMs and try again.")
+            await self.channel.send(f"I could not send a DM to `{friend_member.name}`. They may have DMs disabled. Please ask them to enable DMs and try again.")
+            return
+
+        # Deliberately no on_friend_confirmation: the router would hand it the
+        # requester's own DMs. Only the friend's button press resumes the flow.
+        self.expect("friend_confirmation", timeout=timeout)
+
+    async def resumed(self, step: str, timeout: float):
+        if step != "friend_confirmation":
+            await super().resumed(step, timeout)
+            return
+        # The confirmation buttons did not survive the restart, so ask again.
+        if self.friend_member is None:
+            await self.channel.send("Your friend is no longer in the server. Please start the verification process again.")
             return
+        await self.channel.send(f"I've re-sent your confirmation request to `{self.friend_member.name}`.")
+        await self._request_confirmation(timeout=timeout)
 
-    except asyncio.TimeoutError:
-        if user_dm_channel:
-            await user_dm_channel.send("You took too long to respond. The verification process has expired. Please try again.")
+    async def _on_friend_result(self, result: bool):
+        await self.router.resume(self, self._apply_friend_result, result)
+
+    async def _apply_friend_result(self, result: bool):
+        friend_username = self.friend_member.name if self.friend_member else "Your friend"
+        if result:
+            settings = await settings_cache.get(self.guild)
+            friend_role = settings.friend_role if settings else None
+            if friend_role:
+                all_status_roles = settings.status_roles()
+                await handle_role_change(self.guild, self.user.id, friend_role, all_status_roles)
+                await add_user(self.user.id, -1)
+                await self.channel.send(f"`{friend_username}` has confirmed your request! Your previous status roles have been removed and you have been granted the {friend_role.name} role.")
+            else:
+                await self.channel.send("Your friend confirmed, but the 'Friend' role is not configured on this server.")
         else:
-            await _send_ephemeral_error(
-                interaction,
-                "The verification process timed out before a DM channel was established. Please try again.",
-            )
-    except discord.errors.Forbidden:
-        await _send_ephemeral_error(
-            interaction,
-            "I couldn't send you a DM to start the process. Please check your privacy settings.",
-        )
-    except Exception as e:
-        print(f"Error in friend verification: {e}")
-        if user_dm_channel:
-            await user_dm_channel.send("An unexpected error occurred. Please contact an administrator.")
+            await self.channel.send(f"Your verification request was denied by `{friend_username}`.")
+
+    async def on_timeout(self):
+        if self.step == "friend_confirmation":
+            friend_username = self.friend_member.name if self.friend_member else "Your friend"
+            await self.channel.send(f"`{friend_username}` did not respond in time. Your verification request has expired.")
         else:
-            await _send_ephemeral_error(
-                interaction,
-                "An unexpected error occurred. Please contact an administrator.",
-            )
+            await super().on_timeout()
+
+
+async def start_friend_verification(interaction: discord.Interaction):
+    """Initiates the friend verification process with confirmation from the friend."""
+    await conversation_router.begin(FriendVerification(interaction.user, interaction.guild, interaction))
@@ -1,11 +1,14 @@
 import discord
+from typing import Awaitable, Callable, Optional
 
 class FriendConfirmationView(discord.ui.View):
-    def __init__(self, author: discord.Member, friend: discord.Member):
+    def __init__(self, author: discord.Member, friend: discord.Member, on_result: Optional[Callable[[bool], Awaitable[None]]] = None):
         super().__init__(timeout=1800.0)  # 30-minute timeout
         self.author = author
         self.friend = friend
         self.result = None
+        # Awaited with the friend's answer after the buttons are disabled.
+        self.on_result = on_result
 
     @discord.ui.button(label="Yes", style=discord.ButtonStyle.success)
     async def yes_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -19,6 +22,8 @@ class FriendConfirmationView(discord.ui.View):
         for item in self.children:
             item.disabled = True
         await interaction.response.edit_message(content=f"You have confirmed that you know {self.author.mention}. Thank you!", view=self)
+        if self.on_result:
+            await self.on_result(True)
 
     @discord.ui.button(label="No", style=discord.ButtonStyle.danger)
     async def no_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -31,6 +36,8 @@ class FriendConfirmationView(discord.ui.View):
         for item in self.children:
             item.disabled = True
         await interaction.response.edit_message(content=f"You have denied the request from {self.author.mention}. Thank you.", view=self)
+        if self.on_result:
+            await self.on_result(False)
 
     async def on_timeout(self):
         # This is called if the friend doesn't respond in time
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import hmac
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import discord
+from utils.db import db
+from utils.conversations import conversation_router
+
+
+def hash_code(code: str, salt: bytes) -> bytes:
+    return hashlib.sha256(salt + code.encode()).digest()
+
+
+def new_code_hash(code: str):
+    """Return (salt, hash) for a verification code; the code itself is never stored."""
+    salt = os.urandom(16)
+    return salt, hash_code(code, salt)
+
+
+def code_matches(code: str, salt: bytes, expected: bytes) -> bool:
+    return hmac.compare_digest(hash_code(code, salt), expected)
+
+
+class VerificationSessionStore:
+    """
+    Persists in-progress verification sessions to verification_sessions so a
+    restart does not lose them, with an in-memory index of the stored rows.
+    Only the step, a salted hash of the emailed code, the expiry and attempt
+    count are kept; email addresses and RCSIDs are not.
+    """
+
+    SWEEP_INTERVAL = 60  # Seconds between expiry sweeps
+    SWEEP_BATCH = 500  # Rows deleted per sweep statement
+
+    def __init__(self):
+        self._index: Dict[int, dict] = {}
+        self._task = None
+        self.bot: Optional[discord.Client] = None
+
+    async def start(self, bot: discord.Client):
+        """Load unexpired sessions and start the sweeper."""
+        self.bot = bot
+        rows = await db.execute(
+            "SELECT * FROM verification_sessions WHERE expires_at > now()"
+        )
+        self._index = {row["user_id"]: dict(row) for row in rows}
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+        print(f"Loaded {len(self._index)} verification sessions.")
+
+    def get(self, user_id: int) -> Optional[dict]:
+        row = self._index.get(user_id)
+        if row is None or row["expires_at"] <= datetime.now(timezone.utc):
+            return None
+        return row
+
+    async def save(self, flow) -> dict:
+        """Insert or update the session for a flow at its current step."""
+        row = {
+            "user_id": flow.user.id,
+            "guild_id": flow.guild.id,
+            "channel_id": flow.channel.id,
+            "flow": flow.name,
+            "step": flow.step,
+            "code_salt": flow.code_salt,
+            "code_hash": flow.code_hash,
+            "attempts": flow.attempts,
+            "friend_id": flow.friend_id,
+            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=flow.timeout),
+        }
+        await db.execute(
+            """
+            INSERT INTO verification_sessions
+                (user_id, guild_id, channel_id, flow, step, code_salt, code_hash, attempts, friend_id, expires_at)
+            VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+            ON CONFLICT (user_id) DO UPDATE SET
+                guild_id = EXCLUDED.guild_id,
+                channel_id = EXCLUDED.channel_id,
+                flow = EXCLUDED.flow,
+                step = EXCLUDED.step,
+                code_salt = EXCLUDED.code_salt,
+                code_hash = EXCLUDED.code_hash,
+                attempts = EXCLUDED.attempts,
+                friend_id = EXCLUDED.friend_id,
+                expires_at = EXCLUDED.expires_at
+            """,
+            *row.values(),
+        )
+        self._index[flow.user.id] = row
+        return row
+
+    async def delete(self, user_id: int):
+        if self._index.pop(user_id, None) is not None:
+            await db.execute("DELETE FROM verification_sessions WHERE user_id = $1", user_id)
+
+    async def sweep(self) -> List[dict]:
+        """Delete expired sessions in batches and return the removed rows."""
+        expired = []
+        while True:
+            rows = await db.execute(
+                """
+                DELETE FROM verification_sessions
+                WHERE user_id IN (
+                    SELECT user_id FROM verification_sessions
+                    WHERE expires_at <= now()
+                    LIMIT $1
+                )
+                RETURNING user_id, channel_id
+                """,
+                self.SWEEP_BATCH,
+            )
+            expired.extend(rows)
+            if len(rows) < self.SWEEP_BATCH:
+                break
+        for row in expired:
+            self._index.pop(row["user_id"], None)
+        return expired
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.SWEEP_INTERVAL)
+            try:
+                expired = await self.sweep()
+            except Exception as e:
+                print(f"Error sweeping verification sessions: {e}")
+                continue
+            # Live conversations expire on their own timers; these are sessions
+            # restored after a restart that the user never came back to.
+            for row in expired:
+                if conversation_router.is_active(row["user_id"]):
+                    continue
+                try:
+                    channel = self.bot.get_partial_messageable(row["channel_id"])
+                    await channel.send("Your verification process has expired. Please start again from the verification channel.")
+                except discord.HTTPException:
+                    pass
+
+
+session_store = VerificationSessionStore()
@@ -2,7 +2,10 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from utils.db import db
-from utils.role_utils import handle_role_change
+from utils.settings import settings_cache
+from utils.role_utils import ROLE_EDIT_LIMIT, set_status_role, bulk_set_status_role
+from utils.jobs import Job, job_manager
+from utils.concurrency import bounded_gather
 from Admin.admin import Admin
 
 class Year(commands.Cog):
@@ -27,81 +30,124 @@ class Year(commands.Cog):
         
         await interaction.response.defer(ephemeral=True)
 
-        guild = interaction.guild  
-              
-        users_in_db = await db.execute("SELECT discord_id, years_remaining FROM users")
-        settings_records = await db.execute("SELECT * FROM server_settings WHERE guild_id = $1", guild.id)
-        
-       
+        guild = interaction.guild
+
+        settings = await settings_cache.get(guild)
 
-        if not settings_records:
-            return interaction.followup.send(f"Server settings not found. Please run the setup.")
+        if settings is None:
+            return await interaction.followup.send(f"Server settings not found. Please run the setup.")
         
-        settings = settings_records[0]
-        engineer_channel = interaction.guild.get_channel(settings.get('engineer_channel_id'))
+        engineer_channel = settings.engineer_channel
+
+        if not engineer_channel:
+            return await interaction.followup.send(f"Engineer channel not found. Please run the setup.")
 
-        student_role = guild.get_role(settings.get('student_id'))
-        alumni_role = guild.get_role(settings.get('alumni_id'))
+        student_role = settings.student_role
+        alumni_role = settings.alumni_role
 
         if not student_role or not alumni_role:
-            return interaction.followup.send(f"Student or Alumni role is not configured on this server.")
-
-        all_status_roles = {
-            'Student': student_role,
-            'Alumni': alumni_role,
-            'Friend': guild.get_role(settings.get('friend_id')),
-            'Verified': guild.get_role(settings.get('verified_id')),
-        }
-        
-        logs = []
-
-        for user_record in users_in_db:
-            member = guild.get_member(user_record['discord_id'])
-            
-            if not member:
-                await db.execute("DELETE FROM users WHERE discord_id = $1", user_record['discord_id'])
-                logs.append(f"Removed user `{user_record['discord_id']}` from database (not found in server).")
-                continue
-                
-            years = user_record['years_remaining']
-            
-            if years > 1:
-                await db.execute("UPDATE users SET years_remaining = $1 WHERE discord_id = $2", years - 1, member.id)
-                logs.append(f"Decremented years for `{member.display_name}` to `{years - 1}`.")
-                
-            elif years == 1:
-                await db.execute("UPDATE users SET years_remaining = 0 WHERE discord_id = $1", member.id)
-                await handle_role_change(guild, member.id, alumni_role, all_status_roles)
-                
-                try:
-                    dm_channel = await member.create_dm()
-                    await dm_channel.send(
-                        f"Congratulations! Your status in the `{guild.name}` server has been updated from Student to Alumni. "
-                        "If this is a mistake, you can re-verify as a student at any time."
-                    )
-                    logs.append(f"Graduated `{member.display_name}`. Roles updated and DM sent.")
-                except discord.Forbidden:
-                    logs.append(f"Graduated `{member.display_name}`. Roles updated, but could not send DM.")
-            
-            elif years == 0:
-                if alumni_role not in member.roles:
-                    await handle_role_change(guild, member.id, alumni_role, all_status_roles)
-                    logs.append(f"Ensured `{member.display_name}` has the Alumni role (and no other status roles).")
-
-        if not logs:
-             logs.append("Year-end process complete. No changes were made.")
-        else:
-             logs.insert(0,"Year-end process complete.\n\n**Log:**\n" + "\n")
-
-        log_message = "\n".join(logs)
-
-        if len(log_message) > 2000:
-            await engineer_channel.send(log_message[:2000])
-            await engineer_channel.send(log_message[2000:])
-        else:
-            await engineer_channel.send(log_message)
-            
-        return await interaction.followup.send("Year-end process complete. Check the engineer channel for details.")
+            return await interaction.followup.send(f"Student or Alumni role is not configured on this server.")
+
+        job = job_manager.submit(
+            "year rollover",
+            lambda job: self._run_year(job, guild, alumni_role, settings.status_roles()),
+            guild_id=guild.id,
+            user_id=interaction.user.id,
+            channel=engineer_channel,
+        )
+        return await interaction.followup.send(
+            f"Year-end process started as job `#{job.id}`. Progress and logs will be posted in {engineer_channel.mention}."
+        )
+
+    async def _run_year(self, job: Job, guild: discord.Guild, alumni_role: discord.Role, all_status_roles: dict) -> str:
+        """
+        Update student years, graduate students, and clean up the database.
+        Runs as a background job and returns a summary report.
+        """
+        if not guild.chunked:
+            await guild.chunk(cache=True)
+        member_ids = [member.id for member in guild.members if not member.bot]
+        if not member_ids:
+            # Without a member list every user would look departed.
+            raise RuntimeError("No members are cached. Please enable the Server Members Intent.")
+
+        async def rollover(connection):
+            removed = await connection.fetch(
+                "DELETE FROM users WHERE discord_id <> ALL($1::bigint[]) RETURNING discord_id",
+                member_ids,
+            )
+            decremented = await connection.fetch(
+                """
+                UPDATE users SET years_remaining = years_remaining - 1
+                WHERE years_remaining >= 1
+                RETURNING discord_id, years_remaining
+                """
+            )
+            alumni = await connection.fetch(
+                "SELECT discord_id FROM users WHERE years_remaining = 0"
+            )
+            return removed, decremented, alumni
+
+        await job.report(0, note="updating database")
+        removed, decremented, alumni = await db.run_in_transaction(rollover)
+
+        graduate_ids = {r['discord_id'] for r in decremented if r['years_remaining'] == 0}
+        graduates = [m for m in map(guild.get_member, graduate_ids) if m is not None]
+        # Existing alumni only need attention if they lost the role.
+        missing_alumni = [
+            m for m in (guild.get_member(r['discord_id']) for r in alumni if r['discord_id'] not in graduate_ids)
+            if m is not None and alumni_role not in m.roles
+        ]
+
+        async def graduate(member: discord.Member):
+            await set_status_role(member, alumni_role, all_status_roles, reason="Year rollover")
+            try:
+                dm_channel = await member.create_dm()
+                await dm_channel.send(
+                    f"Congratulations! Your status in the `{guild.name}` server has been updated from Student to Alumni. "
+                    "If this is a mistake, you can re-verify as a student at any time."
+                )
+                return True
+            except discord.Forbidden:
+                return False
+
+        total = len(graduates) + len(missing_alumni)
+
+        async def report_graduates(done):
+            await job.report(done, total, "updating graduates")
+
+        async def report_alumni(done):
+            await job.report(len(graduates) + done, total, "restoring alumni roles")
+
+        graduate_results = await bounded_gather(
+            graduate, graduates, limit=ROLE_EDIT_LIMIT, on_done=report_graduates
+        )
+        alumni_results = await bulk_set_status_role(
+            missing_alumni, alumni_role, all_status_roles, reason="Year rollover", on_done=report_alumni
+        )
+
+        failures = [
+            f"`{member.display_name}`: {result}"
+            for member, result in zip(graduates + missing_alumni, graduate_results + alumni_results)
+            if isinstance(result, Exception)
+        ]
+        dms_sent = sum(1 for result in graduate_results if result is True)
+        dms_failed = sum(1 for result in graduate_results if result is False)
+        restored = sum(1 for result in alumni_results if not isinstance(result, Exception))
+
+        report = [
+            "**Year-end process complete.**",
+            f"Removed from database (no longer in the server): `{len(removed)}`",
+            f"Years decremented: `{len(decremented) - len(graduate_ids)}`",
+            f"Graduated to Alumni: `{len(graduates)}` (DM sent: `{dms_sent}`, DM blocked: `{dms_failed}`)",
+            f"Alumni role restored: `{restored}`",
+        ]
+        if failures:
+            report.append(f"\n**Role updates failed ({len(failures)}):**")
+            report.extend(failures[:20])
+            if len(failures) > 20:
+                report.append(f"...and {len(failures) - 20} more.")
+        return "\n".join(report)
     
 async def setup(bot: commands.Bot):
     await bot.add_cog(Year(bot))
\ No newline at end of file
@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import discord
+
+from Admin.admin import Admin
+
+
+@pytest.fixture
+def cog():
+    return Admin(MagicMock())
+
+
+def make_member(*role_ids):
+    member = MagicMock(spec=discord.Member)
+    member.roles = [MagicMock(id=role_id) for role_id in role_ids]
+    return member
+
+
+def make_role(role_id):
+    role = MagicMock(spec=discord.Role)
+    role.id = role_id
+    role.mention = f"<@&{role_id}>"
+    return role
+
+
+def make_owner_interaction():
+    interaction = MagicMock()
+    interaction.response = AsyncMock()
+    interaction.followup = MagicMock()
+    interaction.followup.send = AsyncMock()
+    interaction.guild = MagicMock()
+    interaction.guild.owner_id = 1
+    interaction.user = MagicMock()
+    interaction.user.id = 1
+    return interaction
+
+
+@pytest.mark.asyncio
+async def test_is_admin_loads_roles_once(cog):
+    with patch("Admin.admin.db.execute", new=AsyncMock(return_value=[{"role_id": 5}])) as mock_exec:
+        assert await cog.is_admin(make_member(5))
+        assert not await cog.is_admin(make_member(6))
+    assert mock_exec.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_is_admin_survives_db_error_after_load(cog):
+    with patch("Admin.admin.db.execute", new=AsyncMock(return_value=[{"role_id": 5}])):
+        await cog.cog_load()
+    with patch("Admin.admin.db.execute", new=AsyncMock(side_effect=Exception("DB down"))):
+        assert await cog.is_admin(make_member(5))
+
+
+@pytest.mark.asyncio
+async def test_define_writes_through(cog):
+    interaction = make_owner_interaction()
+    with patch("Admin.admin.db.execute", new=AsyncMock(side_effect=[[], None])):
+        await cog.define.callback(cog, interaction, role=make_role(7))
+    msg = interaction.followup.send.call_args[0][0]
+    assert "has been added" in msg
+    with patch("Admin.admin.db.execute", new=AsyncMock(side_effect=Exception("DB down"))):
+        assert await cog.is_admin(make_member(7))
+
+
+@pytest.mark.asyncio
+async def test_define_existing_role(cog):
+    interaction = make_owner_interaction()
+    with patch("Admin.admin.db.execute", new=AsyncMock(return_value=[{"role_id": 7}])):
+        await cog.define.callback(cog, interaction, role=make_role(7))
+    msg = interaction.followup.send.call_args[0][0]
+    assert "already an admin role" in msg
+
+
+@pytest.mark.asyncio
+async def test_role_delete_evicts(cog):
+    with patch("Admin.admin.db.execute", new=AsyncMock(return_value=[{"role_id": 5}])):
+        await cog.cog_load()
+    with patch("Admin.admin.db.execute", new=AsyncMock()) as mock_exec:
+        await cog.on_guild_role_delete(make_role(5))
+    mock_exec.assert_awaited_once()
+    assert not await cog.is_admin(make_member(5))
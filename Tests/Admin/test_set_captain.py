@@ -68,10 +68,25 @@ async def test_set_captain_no_permission(cog):
 async def test_set_captain_team_not_found(cog):
     interaction = make_interaction()
     _pass_admin_guard(cog, interaction)
-    with patch("Admin.set_captain.db.execute", new=AsyncMock(return_value=[])):
+    with patch("Admin.set_captain.db.execute", new=AsyncMock(return_value=[])), \
+         patch("utils.search.resolve_name", new=AsyncMock(return_value=(None, []))):
         await cog.set_captain.callback(cog, interaction, team_nick="Ghost", member=make_member())
     msg = interaction.followup.send.call_args[0][0]
     assert "not found" in msg.lower()
+    assert "did you mean" not in msg.lower()
+
+
+@pytest.mark.asyncio
+async def test_set_captain_resolves_capitalisation(cog):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    execute = AsyncMock(side_effect=[[], [{"team_id": 7}], None, None])
+    with patch("Admin.set_captain.db.execute", new=execute), \
+         patch("utils.search.resolve_name", new=AsyncMock(return_value=("Dragons", []))):
+        await cog.set_captain.callback(cog, interaction, team_nick="dragons", member=make_member())
+    assert execute.await_args_list[1].args[1] == "Dragons"
+    msg = interaction.followup.send.call_args[0][0]
+    assert "captain of **Dragons**" in msg
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,106 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import discord
+import openpyxl
+
+from Admin.admin import Admin
+from Dues.generate import GenerateDues, _group_rosters, _build_workbook, _generate_report
+
+
+def roster_row(team_id, nick, category_id, captain_id, player_id=None, status=None, rcsid=None):
+    return {
+        "team_id": team_id,
+        "team_nick": nick,
+        "category_id": category_id,
+        "captain_discord_id": captain_id,
+        "player_discord_id": player_id,
+        "member_status": status,
+        "rcsid": rcsid,
+    }
+
+
+ROWS = [
+    roster_row(1, "Dragons", 10, 100, 100, "starter", "turing1"),
+    roster_row(1, "Dragons", 10, 100, 101, "sub", None),
+    roster_row(2, "Empty", 10, 200),
+    roster_row(3, "Knights", 20, 300, 300, "starter", "lovel2"),
+]
+
+
+def make_guild():
+    guild = MagicMock()
+    members = {100: MagicMock(display_name="Alan", name="alan")}
+    members[100].name = "alan"
+    guild.get_member = MagicMock(side_effect=members.get)
+    guild.get_channel = MagicMock(return_value=None)
+    return guild
+
+
+def test_group_rosters_groups_by_category_and_team():
+    grouped = _group_rosters(ROWS, make_guild())
+    assert list(grouped) == [10, 20]
+    dragons, empty = grouped[10]
+    assert [m["player_discord_id"] for m in dragons["members"]] == [100, 101]
+    assert dragons["members"][0]["full_name"] == "Alan"
+    assert dragons["members"][1]["discord_username"] == "Unknown"
+    assert empty["members"] == []
+    assert grouped[20][0]["team_nick"] == "Knights"
+
+
+def test_build_workbook_layout():
+    grouped = _group_rosters(ROWS, make_guild())
+    buffer = _build_workbook([("Cat A", grouped[10]), ("Cat B", grouped[20])], 20, 10)
+    wb = openpyxl.load_workbook(buffer)
+    assert wb.sheetnames == ["Cat A", "Cat B"]
+    ws = wb["Cat A"]
+    assert ws.cell(row=1, column=1).fill.start_color.rgb.endswith("000000")
+    assert ws.cell(row=2, column=2).value == "Dragons"
+    assert ws.cell(row=2, column=6).value == "Starters = $20"
+    assert ws.cell(row=3, column=2).value == "1 + 1"
+    assert ws.cell(row=5, column=1).value == "Full Name"
+    assert ws.cell(row=6, column=1).value == "Alan"
+    assert ws.cell(row=6, column=1).fill.start_color.rgb.endswith("FFFF00")
+    assert ws.cell(row=7, column=5).value == "$10"
+
+
+@pytest.mark.asyncio
+async def test_generate_report_uploads_with_timings():
+    job = MagicMock()
+    job.report = AsyncMock()
+    message = MagicMock()
+    message.edit = AsyncMock()
+    job.channel.send = AsyncMock(return_value=message)
+
+    dues = [{"starters": 20, "substitues": 10, "non_player": 0}]
+    with patch("Dues.generate.db.execute", new=AsyncMock(return_value=dues)), \
+         patch("Dues.generate.db.execute_named", new=AsyncMock(return_value=ROWS)) as mock_named:
+        await _generate_report(job, make_guild())
+
+    mock_named.assert_awaited_once_with("dues_rosters")
+    assert job.channel.send.call_args.kwargs["file"].filename == "dues.xlsx"
+    content = message.edit.call_args.kwargs["content"]
+    assert "3 teams" in content
+    assert "DB:" in content and "Workbook:" in content and "Upload:" in content
+    job.report.assert_awaited_with(3, 3, "uploaded")
+
+
+@pytest.mark.asyncio
+async def test_generate_dues_submits_job():
+    cog = GenerateDues(MagicMock())
+    admin_mock = MagicMock(spec=Admin)
+    admin_mock.is_admin = AsyncMock(return_value=True)
+    cog.bot.get_cog = MagicMock(return_value=admin_mock)
+
+    interaction = MagicMock()
+    interaction.user = MagicMock(spec=discord.Member)
+    interaction.response = AsyncMock()
+    interaction.followup = AsyncMock()
+    settings = MagicMock()
+    job = MagicMock(id=7)
+
+    with patch("Dues.generate.settings_cache.get", new=AsyncMock(return_value=settings)), \
+         patch("Dues.generate.job_manager.submit", return_value=job) as mock_submit:
+        await cog.generate_dues.callback(cog, interaction)
+
+    assert mock_submit.call_args.kwargs["channel"] is settings.engineer_channel
+    assert "`#7`" in interaction.followup.send.call_args.args[0]
@@ -1,8 +1,11 @@
+import asyncio
+import os
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import discord
 
-from Rooms.reservations import Reservations
+from datetime import datetime, timedelta, timezone
+from Rooms.reservations import Reservations, SlotPages, PAGE_SIZE
 
 
 @pytest.fixture
@@ -44,7 +47,7 @@ async def test_reserve_slot_not_found(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=[])):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[])):
             await cog.reserve.callback(cog, interaction, slot_id=99)
     msg = interaction.followup.send.call_args[0][0]
     assert "not found" in msg.lower()
@@ -55,9 +58,8 @@ async def test_reserve_already_reserved(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(side_effect=[
-            [make_fake_slot()],
-            [{"reservation_id": 5}],
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[
+            {**make_fake_slot(), "reserved": False},
         ])):
             await cog.reserve.callback(cog, interaction, slot_id=1)
     msg = interaction.followup.send.call_args[0][0]
@@ -69,12 +71,11 @@ async def test_reserve_success(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(side_effect=[
-            [make_fake_slot()],
-            [],
-            None,
-        ])):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[
+            {**make_fake_slot(), "reserved": True},
+        ])) as mock_exec:
             await cog.reserve.callback(cog, interaction, slot_id=1)
+    mock_exec.assert_awaited_once_with("reserve_slot", 1, 10)
     msg = interaction.followup.send.call_args[0][0]
     assert "reserved" in msg.lower()
     assert "dragons" in msg.lower()
@@ -85,12 +86,40 @@ async def test_reserve_db_error(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(side_effect=Exception("DB down"))):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(side_effect=Exception("DB down"))):
             await cog.reserve.callback(cog, interaction, slot_id=1)
     msg = interaction.followup.send.call_args[0][0]
     assert "error" in msg.lower()
 
 
+@pytest.mark.asyncio
+async def test_reserve_concurrent_captains_get_one_winner(cog):
+    # Stand-in for the unique slot_id: each statement claims the slot atomically.
+    reservations = {}
+
+    async def execute_named(name, slot_id, team_id):
+        await asyncio.sleep(0)
+        claimed = reservations.setdefault(slot_id, team_id) == team_id
+        return [{**make_fake_slot(), "reserved": claimed}]
+
+    async def captain_team(user_id):
+        return {"team_id": user_id, "team_nick": f"Team {user_id}"}
+
+    interactions = []
+    for user_id in range(300):
+        interaction = make_interaction()
+        interaction.user.id = user_id
+        interactions.append(interaction)
+
+    with patch.object(cog, "_get_captain_team", new=captain_team), \
+         patch("Rooms.reservations.db.execute_named", new=execute_named):
+        await asyncio.gather(*(cog.reserve.callback(cog, i, slot_id=1) for i in interactions))
+
+    messages = [i.followup.send.call_args[0][0] for i in interactions]
+    assert sum(m.startswith("Reserved") for m in messages) == 1
+    assert sum("already reserved" in m for m in messages) == 299
+
+
 # --- cancel_reservation ---
 
 @pytest.mark.asyncio
@@ -107,7 +136,9 @@ async def test_cancel_no_reservation(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=[])):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[
+            {"cancelled": False, "holder_team_id": None},
+        ])):
             await cog.cancel_reservation.callback(cog, interaction, slot_id=1)
     msg = interaction.followup.send.call_args[0][0]
     assert "no reservation" in msg.lower()
@@ -117,9 +148,10 @@ async def test_cancel_no_reservation(cog):
 async def test_cancel_wrong_team(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
-    fake_reservation = [{"reservation_id": 3, "team_id": 99}]
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=fake_reservation)):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[
+            {"cancelled": False, "holder_team_id": 99},
+        ])):
             await cog.cancel_reservation.callback(cog, interaction, slot_id=1)
     msg = interaction.followup.send.call_args[0][0]
     assert "own team" in msg.lower()
@@ -129,10 +161,12 @@ async def test_cancel_wrong_team(cog):
 async def test_cancel_success(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
-    fake_reservation = [{"reservation_id": 3, "team_id": 10}]
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(side_effect=[fake_reservation, None])):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[
+            {"cancelled": True, "holder_team_id": 10},
+        ])) as mock_exec:
             await cog.cancel_reservation.callback(cog, interaction, slot_id=1)
+    mock_exec.assert_awaited_once_with("cancel_reservation", 1, 10)
     msg = interaction.followup.send.call_args[0][0]
     assert "cancelled" in msg.lower()
 
@@ -142,7 +176,7 @@ async def test_cancel_db_error(cog):
     interaction = make_interaction()
     fake_team = {"team_id": 10, "team_nick": "Dragons"}
     with patch.object(cog, "_get_captain_team", new=AsyncMock(return_value=fake_team)):
-        with patch("Rooms.reservations.db.execute", new=AsyncMock(side_effect=Exception("DB down"))):
+        with patch("Rooms.reservations.db.execute_named", new=AsyncMock(side_effect=Exception("DB down"))):
             await cog.cancel_reservation.callback(cog, interaction, slot_id=1)
     msg = interaction.followup.send.call_args[0][0]
     assert "error" in msg.lower()
@@ -153,7 +187,7 @@ async def test_cancel_db_error(cog):
 @pytest.mark.asyncio
 async def test_list_rooms_no_slots(cog):
     interaction = make_interaction()
-    with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=[])):
+    with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[])):
         await cog.list_rooms.callback(cog, interaction, room_name="")
     msg = interaction.followup.send.call_args[0][0]
     assert "no available slots" in msg.lower()
@@ -162,31 +196,82 @@ async def test_list_rooms_no_slots(cog):
 @pytest.mark.asyncio
 async def test_list_rooms_no_slots_filtered(cog):
     interaction = make_interaction()
-    with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=[])):
-        await cog.list_rooms.callback(cog, interaction, room_name="Lab A")
+    with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[])):
+        await cog.list_rooms.callback(cog, interaction, room_name="Lab A", days=7)
     msg = interaction.followup.send.call_args[0][0]
     assert "lab a" in msg.lower()
+    assert "next 7 days" in msg
 
 
 @pytest.mark.asyncio
 async def test_list_rooms_with_slots(cog):
     interaction = make_interaction()
-    with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=[make_fake_slot()])):
+    with patch("Rooms.reservations.db.execute_named", new=AsyncMock(return_value=[make_fake_slot()])) as mock_exec:
         await cog.list_rooms.callback(cog, interaction, room_name="")
     msg = interaction.followup.send.call_args[0][0]
     assert "available room slots" in msg.lower()
     assert "lab a" in msg.lower()
+    assert "view" not in interaction.followup.send.call_args.kwargs  # single page, no buttons
+    name, after_time, after_id, until, pattern, limit = mock_exec.call_args.args
+    assert (name, after_id, until, pattern, limit) == ("available_slots", 0, None, None, PAGE_SIZE + 1)
 
 
 @pytest.mark.asyncio
 async def test_list_rooms_db_error(cog):
     interaction = make_interaction()
-    with patch("Rooms.reservations.db.execute", new=AsyncMock(side_effect=Exception("DB down"))):
+    with patch("Rooms.reservations.db.execute_named", new=AsyncMock(side_effect=Exception("DB down"))):
         await cog.list_rooms.callback(cog, interaction, room_name="")
     msg = interaction.followup.send.call_args[0][0]
     assert "error" in msg.lower()
 
 
+def make_slots(count):
+    base = datetime.now(timezone.utc) + timedelta(days=1)
+    return [
+        {"slot_id": i, "room_name": "Lab A", "start_time": base + timedelta(hours=i), "end_time": base + timedelta(hours=i + 1)}
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_rooms_pages_by_keyset(cog):
+    slots = make_slots(45)
+
+    async def execute_named(name, after_time, after_id, until, pattern, limit):
+        rows = [s for s in slots if (s["start_time"], s["slot_id"]) > (after_time, after_id)]
+        return rows[:limit]
+
+    interaction = make_interaction()
+    with patch("Rooms.reservations.db.execute_named", new=execute_named):
+        await cog.list_rooms.callback(cog, interaction, room_name="")
+        view = interaction.followup.send.call_args.kwargs["view"]
+        assert isinstance(view, SlotPages)
+        assert [r["slot_id"] for r in view.records] == list(range(1, 21))
+        assert view.previous_button.disabled and not view.next_button.disabled
+
+        click = make_interaction()
+        click.user.id = interaction.user.id
+        await view.next_button.callback(click)
+        await view.next_button.callback(click)
+        assert [r["slot_id"] for r in view.records] == list(range(41, 46))
+        assert view.next_button.disabled and not view.previous_button.disabled
+        content = click.response.edit_message.call_args.kwargs["content"]
+        assert "page 3" in content
+        assert len(content) < 2000
+
+        await view.previous_button.callback(click)
+        assert [r["slot_id"] for r in view.records] == list(range(21, 41))
+
+
+@pytest.mark.asyncio
+async def test_list_rooms_buttons_only_for_invoker(cog):
+    view = SlotPages(owner_id=100, start=datetime.now(timezone.utc))
+    other = make_interaction()
+    other.user.id = 200
+    assert await view.interaction_check(other) is False
+    other.response.send_message.assert_awaited_once()
+
+
 # --- autocomplete ---
 
 @pytest.mark.asyncio
@@ -205,3 +290,61 @@ async def test_list_rooms_autocomplete_empty(cog):
     with patch("Rooms.reservations.db.execute", new=AsyncMock(return_value=[])):
         choices = await cog.room_name_autocomplete(interaction, "zzz")
     assert choices == []
+
+
+# --- against PostgreSQL (set TEST_DATABASE_URL to run) ---
+
+@pytest.mark.asyncio
+async def test_reserve_sql_race_against_postgres():
+    dsn = os.getenv("TEST_DATABASE_URL")
+    if not dsn:
+        pytest.skip("TEST_DATABASE_URL not set")
+    import asyncpg
+    from Rooms.reservations import RESERVE_SLOT_SQL, CANCEL_RESERVATION_SQL
+
+    schema = f"reserve_test_{os.getpid()}"
+    setup = await asyncpg.connect(dsn)
+    await setup.execute(f"""
+        CREATE SCHEMA {schema};
+        SET search_path TO {schema};
+        CREATE TABLE teams (team_id SERIAL PRIMARY KEY);
+        CREATE TABLE rooms (room_id SERIAL PRIMARY KEY, room_name VARCHAR(100) UNIQUE NOT NULL);
+        CREATE TABLE room_slots (
+            slot_id SERIAL PRIMARY KEY,
+            room_id INT REFERENCES rooms(room_id) ON DELETE CASCADE,
+            start_time TIMESTAMPTZ NOT NULL,
+            end_time TIMESTAMPTZ NOT NULL
+        );
+        CREATE TABLE room_reservations (
+            reservation_id SERIAL PRIMARY KEY,
+            slot_id INT UNIQUE REFERENCES room_slots(slot_id) ON DELETE CASCADE,
+            team_id INT REFERENCES teams(team_id) ON DELETE CASCADE
+        );
+        INSERT INTO teams SELECT generate_series(1, 300);
+        INSERT INTO rooms (room_name) VALUES ('Lab A');
+        INSERT INTO room_slots (room_id, start_time, end_time) VALUES (1, now(), now() + interval '1 hour');
+    """)
+    pool = await asyncpg.create_pool(dsn, min_size=20, max_size=20, server_settings={"search_path": schema})
+    try:
+        async def reserve(team_id):
+            async with pool.acquire() as connection:
+                return await connection.fetch(RESERVE_SLOT_SQL, 1, team_id)
+
+        results = await asyncio.gather(*(reserve(team_id) for team_id in range(1, 301)))
+        winners = [rows[0] for rows in results if rows[0]["reserved"]]
+        assert len(winners) == 1
+        assert all(len(rows) == 1 for rows in results)
+        assert await pool.fetch(RESERVE_SLOT_SQL, 2, 1) == []
+
+        holder = await pool.fetchval("SELECT team_id FROM room_reservations WHERE slot_id = 1")
+        other = holder % 300 + 1
+        denied = await pool.fetchrow(CANCEL_RESERVATION_SQL, 1, other)
+        assert (denied["cancelled"], denied["holder_team_id"]) == (False, holder)
+        cancelled = await pool.fetchrow(CANCEL_RESERVATION_SQL, 1, holder)
+        assert cancelled["cancelled"] is True
+        missing = await pool.fetchrow(CANCEL_RESERVATION_SQL, 1, holder)
+        assert (missing["cancelled"], missing["holder_team_id"]) == (False, None)
+    finally:
+        await pool.close()
+        await setup.execute(f"DROP SCHEMA {schema} CASCADE")
+        await setup.close()
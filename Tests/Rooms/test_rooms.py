@@ -2,7 +2,8 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import discord
 
-from Rooms.rooms import Rooms
+from datetime import date, datetime, time
+from Rooms.rooms import Rooms, parse_weekdays, weekly_slots
 
 
 def _pass_admin_guard(cog, interaction):
@@ -119,10 +120,12 @@ async def test_add_slot_end_before_start(cog):
 async def test_add_slot_room_not_found(cog):
     interaction = make_interaction()
     _pass_admin_guard(cog, interaction)
-    with patch("Rooms.rooms.db.execute", new=AsyncMock(return_value=[])):
+    with patch("Rooms.rooms.db.execute", new=AsyncMock(return_value=[])), \
+         patch("utils.search.resolve_name", new=AsyncMock(return_value=(None, ["Ghost Lab"]))):
         await cog.add_slot.callback(cog, interaction, room_name="Ghost Room", start_time="2026-04-20 10:00", end_time="2026-04-20 12:00")
     msg = interaction.followup.send.call_args[0][0]
     assert "not found" in msg.lower()
+    assert "`Ghost Lab`" in msg
 
 
 @pytest.mark.asyncio
@@ -149,6 +152,128 @@ async def test_add_slot_db_error(cog):
     assert "error" in msg.lower()
 
 
+# --- add_weekly_slots ---
+
+def test_parse_weekdays():
+    assert parse_weekdays("mon, Wed,friday") == {0, 2, 4}
+    with pytest.raises(ValueError):
+        parse_weekdays("mo")
+    with pytest.raises(ValueError):
+        parse_weekdays("mon,funday")
+
+
+def test_weekly_slots_covers_range_inclusive():
+    slots = weekly_slots(date(2026, 9, 1), date(2026, 9, 14), {0, 2}, time(18), time(20))
+    assert [start.date() for start, _ in slots] == [
+        date(2026, 9, 2), date(2026, 9, 7), date(2026, 9, 9), date(2026, 9, 14),
+    ]
+    assert slots[0] == (datetime(2026, 9, 2, 18), datetime(2026, 9, 2, 20))
+
+
+def make_connection(room, conflicts=(), created=()):
+    connection = MagicMock()
+    connection.fetchrow = AsyncMock(return_value=room)
+    connection.fetch = AsyncMock(side_effect=[list(conflicts), list(created)])
+    return connection
+
+
+async def call_weekly(cog, interaction, connection, **overrides):
+    args = dict(room_name="Lab A", weekdays="tue,thu", first_date="2026-09-01",
+                last_date="2026-12-10", start_time="18:00", end_time="20:00")
+    args.update(overrides)
+
+    async def run_in_transaction(callback):
+        return await callback(connection)
+
+    with patch("Rooms.rooms.db.run_in_transaction", new=run_in_transaction):
+        await cog.add_weekly_slots.callback(cog, interaction, **args)
+    return interaction.followup.send.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_add_weekly_slots_inserts_in_one_batch(cog):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    created = [{"slot_id": i} for i in range(100, 130)]
+    connection = make_connection({"room_id": 1}, created=created)
+
+    msg = await call_weekly(cog, interaction, connection)
+
+    assert connection.fetch.await_count == 2  # one overlap check, one insert
+    overlap_call, insert_call = connection.fetch.await_args_list
+    assert "unnest" in overlap_call.args[0] and "INSERT INTO room_slots" in insert_call.args[0]
+    room_id, starts, ends = insert_call.args[1:]
+    assert room_id == 1 and len(starts) == len(ends) == 30
+    assert starts[0] == datetime(2026, 9, 1, 18) and ends[-1] == datetime(2026, 12, 10, 20)
+    assert "Added 30 slots" in msg and "#100" in msg and "#129" in msg
+
+
+@pytest.mark.asyncio
+async def test_add_weekly_slots_rejects_overlaps(cog):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    conflicts = [
+        {"slot_id": i, "start_time": datetime(2026, 9, 1, 19), "end_time": datetime(2026, 9, 1, 21)}
+        for i in range(12)
+    ]
+    connection = make_connection({"room_id": 1}, conflicts=conflicts)
+
+    msg = await call_weekly(cog, interaction, connection)
+
+    assert connection.fetch.await_count == 1
+    assert "No slots were added" in msg
+    assert "...and 2 more." in msg
+
+
+@pytest.mark.asyncio
+async def test_add_weekly_slots_room_not_found(cog):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    connection = make_connection(None)
+
+    with patch("utils.search.resolve_name", new=AsyncMock(return_value=(None, []))):
+        msg = await call_weekly(cog, interaction, connection, room_name="Ghost Room")
+
+    assert "not found" in msg.lower()
+    connection.fetch.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_add_weekly_slots_resolves_capitalisation(cog):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    connection = make_connection(None, created=[{"slot_id": 1}])
+    connection.fetchrow.side_effect = [None, {"room_id": 1}]
+    connection.fetch.side_effect = [[], [{"slot_id": 1}]]
+
+    with patch("utils.search.resolve_name", new=AsyncMock(return_value=("Lab A", []))):
+        msg = await call_weekly(cog, interaction, connection, room_name="lab a", weekdays="tue",
+                                first_date="2026-09-01", last_date="2026-09-01")
+
+    assert connection.fetchrow.await_args_list[1].args[1] == "Lab A"
+    assert "Added 1 slots to `Lab A`" in msg
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("overrides, expected", [
+    ({"weekdays": "mon,someday"}, "unknown weekday"),
+    ({"first_date": "09/01/2026"}, "invalid date or time"),
+    ({"end_time": "17:00"}, "end time must be after"),
+    ({"last_date": "2026-08-01"}, "must not be before"),
+    ({"weekdays": "sat", "first_date": "2026-09-01", "last_date": "2026-09-04"}, "no dates"),
+    ({"first_date": "2026-01-01", "last_date": "2030-01-01", "weekdays": "mon,tue,wed,thu,fri"}, "the limit is"),
+])
+async def test_add_weekly_slots_validation(cog, overrides, expected):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    connection = make_connection({"room_id": 1})
+
+    msg = await call_weekly(cog, interaction, connection, **overrides)
+
+    assert expected in msg.lower()
+    connection.fetchrow.assert_not_awaited()
+
+
 # --- remove_slot ---
 
 @pytest.mark.asyncio
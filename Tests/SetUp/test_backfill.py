@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import discord
+
+from SetUp.backfill import _backfill_users
+from utils.role_utils import ROLE_EDIT_LIMIT
+
+
+def make_member(member_id, roles, add_roles=None):
+    member = MagicMock()
+    member.id = member_id
+    member.name = f"user{member_id}"
+    member.bot = False
+    member.roles = roles
+    member.add_roles = add_roles or AsyncMock()
+    return member
+
+
+@pytest.mark.asyncio
+async def test_backfill_writes_users_in_one_batch():
+    student, alumni, friend, verified = (MagicMock(name=n) for n in ("s", "a", "f", "v"))
+    role_objects = {"Student": student, "Alumni": alumni, "Friend": friend, "Verified": verified}
+
+    forbidden = discord.Forbidden(MagicMock(status=403), "no")
+    members = [
+        make_member(1, [student]),
+        make_member(2, [alumni]),
+        make_member(3, []),
+        make_member(4, [], add_roles=AsyncMock(side_effect=forbidden)),
+        make_member(5, [friend]),  # already in the DB
+    ]
+    guild = MagicMock()
+    guild.chunked = True
+    guild.members = members
+
+    with patch("SetUp.backfill.db.execute", new=AsyncMock(return_value=[{"discord_id": 5}])), \
+         patch("SetUp.backfill.add_users", new=AsyncMock()) as mock_add_users:
+        log = await _backfill_users(guild, role_objects, assign_verified_role=True)
+
+    mock_add_users.assert_awaited_once_with([(1, 1), (2, 0), (3, -2)])
+    members[2].add_roles.assert_awaited_once_with(verified)
+    assert "Could not grant Verified to `user4`" in log
+    assert "Processed and added `3` users" in log
+
+
+@pytest.mark.asyncio
+async def test_backfill_grants_share_the_role_edit_limit():
+    in_flight, peak = 0, 0
+
+    async def add_roles(role):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    members = [make_member(i, [], add_roles=add_roles) for i in range(1, 7)]
+    guild = MagicMock()
+    guild.chunked = True
+    guild.members = members
+    role_objects = {name: MagicMock(name=name) for name in ("Student", "Alumni", "Friend", "Verified")}
+
+    with patch("SetUp.backfill.db.execute", new=AsyncMock(return_value=[])), \
+         patch("SetUp.backfill.add_users", new=AsyncMock()):
+        await _backfill_users(guild, role_objects, assign_verified_role=True)
+
+    assert peak == ROLE_EDIT_LIMIT
+
+
+@pytest.mark.asyncio
+async def test_add_users_uses_unnest():
+    from utils.user_init import add_users
+
+    with patch("utils.user_init.db.execute", new=AsyncMock()) as mock_execute:
+        await add_users([(1, 1), (2, -2)])
+        await add_users([])
+
+    mock_execute.assert_awaited_once()
+    query, ids, years = mock_execute.call_args.args
+    assert "unnest" in query
+    assert ids == [1, 2] and years == [1, -2]
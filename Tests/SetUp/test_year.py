@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import discord
+
+from year import Year
+
+
+def make_member(member_id, roles=()):
+    member = MagicMock()
+    member.id = member_id
+    member.bot = False
+    member.display_name = f"user{member_id}"
+    member.roles = list(roles)
+    member.edit = AsyncMock()
+    dm = MagicMock()
+    dm.send = AsyncMock()
+    member.create_dm = AsyncMock(return_value=dm)
+    return member
+
+
+@pytest.mark.asyncio
+async def test_year_rollover_is_set_based():
+    alumni_role = MagicMock()
+    graduate = make_member(1)
+    blocked = make_member(2)
+    blocked.create_dm.return_value.send.side_effect = discord.Forbidden(MagicMock(status=403), "no")
+    lost_role = make_member(3)
+    kept_role = make_member(4, [alumni_role])
+    members = {m.id: m for m in (graduate, blocked, lost_role, kept_role, make_member(5))}
+
+    guild = MagicMock()
+    guild.chunked = True
+    guild.members = list(members.values())
+    guild.get_member = members.get
+
+    connection = MagicMock()
+    connection.fetch = AsyncMock(side_effect=[
+        [{"discord_id": 99}],
+        [{"discord_id": 1, "years_remaining": 0}, {"discord_id": 2, "years_remaining": 0},
+         {"discord_id": 5, "years_remaining": 2}],
+        [{"discord_id": 1}, {"discord_id": 2}, {"discord_id": 3}, {"discord_id": 4}],
+    ])
+
+    async def run_in_transaction(callback):
+        return await callback(connection)
+
+    job = MagicMock()
+    job.report = AsyncMock()
+
+    with patch("year.db.run_in_transaction", new=run_in_transaction):
+        report = await Year(MagicMock())._run_year(job, guild, alumni_role, {})
+
+    assert connection.fetch.await_count == 3
+    assert connection.fetch.await_args_list[0].args[1] == [1, 2, 3, 4, 5]
+    for member in (graduate, blocked, lost_role):
+        member.edit.assert_awaited_once_with(roles=[alumni_role], reason="Year rollover")
+    kept_role.edit.assert_not_awaited()
+    assert "Removed from database (no longer in the server): `1`" in report
+    assert "Years decremented: `1`" in report
+    assert "Graduated to Alumni: `2` (DM sent: `1`, DM blocked: `1`)" in report
+    assert "Alumni role restored: `1`" in report
@@ -74,10 +74,24 @@ async def test_archive_no_admin_cog(cog):
 async def test_archive_team_not_found(cog):
     interaction = make_interaction()
     _pass_admin_guard(cog, interaction)
-    with patch("Teams.archive_team.db.execute", new=AsyncMock(return_value=[])):
+    with patch("Teams.archive_team.db.execute", new=AsyncMock(return_value=[])), \
+         patch("utils.search.resolve_name", new=AsyncMock(return_value=(None, ["Ghosts"]))) as mock_resolve:
         await cog.archive_team.callback(cog, interaction, team_nick="ghost")
+    mock_resolve.assert_awaited_once_with("active_teams", "ghost")
     msg = interaction.followup.send.call_args[0][0]
     assert "not found" in msg.lower()
+    assert "Did you mean `Ghosts`?" in msg
+
+
+@pytest.mark.asyncio
+async def test_archive_team_lookup_error(cog):
+    interaction = make_interaction()
+    _pass_admin_guard(cog, interaction)
+    with patch("Teams.archive_team.db.execute", new=AsyncMock(return_value=[])), \
+         patch("utils.search.resolve_name", new=AsyncMock(side_effect=Exception("DB down"))):
+        await cog.archive_team.callback(cog, interaction, team_nick="ghost")
+    msg = interaction.followup.send.call_args[0][0]
+    assert "error" in msg.lower()
 
 
 #Multiple teams found
@@ -1107,8 +1107,90 @@ async def test_finalize_team_role_forbidden_produces_warning(cog):
 
     assert len(warnings) == 1
     assert "Cap" in warnings[0]
-    
-    
+
+
+
+def make_member(member_id, name=None, add_roles=None):
+    member = MagicMock(spec=discord.Member)
+    member.id = member_id
+    member.display_name = name or f"Player{member_id}"
+    member.add_roles = add_roles or AsyncMock()
+    return member
+
+
+@pytest.mark.asyncio
+async def test_finalize_team_writes_roster_in_one_statement_per_table(cog):
+    interaction = make_interaction()
+    role = MagicMock(spec=discord.Role)
+    role.id = 1
+    category = MagicMock(spec=discord.CategoryChannel)
+    category.id = 2
+    channel = MagicMock(spec=discord.TextChannel)
+    channel.id = 3
+    captain = make_member(10, "Cap")
+    starters = [captain] + [make_member(i) for i in range(11, 16)]
+    substitutes = [make_member(i) for i in range(16, 20)] + [starters[1]]  # 11 listed twice
+
+    draft = TeamCreationData(
+        role=role, category=category, channel=channel, captain=captain,
+        starters=starters, substitutes=substitutes, year=2025, semester="Fall", seniority=1,
+    )
+
+    mock_conn = AsyncMock()
+    mock_conn.fetch = AsyncMock(side_effect=[[], [{"team_id": 42}]])
+    mock_conn.execute = AsyncMock()
+
+    async def fake_transaction(fn):
+        await fn(mock_conn)
+
+    with patch("Teams.create_team.db") as mock_db:
+        mock_db.run_in_transaction = AsyncMock(side_effect=fake_transaction)
+        warnings = await cog._finalize_team(interaction, draft)
+
+    assert warnings == []
+    assert mock_conn.execute.await_count == 2
+    players_call, members_call = mock_conn.execute.await_args_list
+    assert sorted(players_call.args[1]) == list(range(10, 20))
+    team_id, ids, statuses = members_call.args[1:]
+    assert team_id == 42
+    roster = dict(zip(ids, statuses))
+    assert len(ids) == 10
+    assert roster[10] == "starter"
+    assert roster[11] == "sub"
+    assert roster[19] == "sub"
+    for member in starters + substitutes:
+        member.add_roles.assert_awaited_once_with(role, reason="Team creation assignment")
+
+
+@pytest.mark.asyncio
+async def test_assign_team_role_runs_concurrently_and_reports_failures():
+    from Teams.create_team import assign_team_role
+
+    role = MagicMock(spec=discord.Role)
+    in_flight = 0
+    peak = 0
+
+    async def slow_add_roles(*args, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    members = [make_member(i, add_roles=AsyncMock(side_effect=slow_add_roles)) for i in range(6)]
+    members[1].add_roles = AsyncMock(side_effect=discord.Forbidden(MagicMock(), "forbidden"))
+    members[4].add_roles = AsyncMock(side_effect=discord.HTTPException(MagicMock(), "server error"))
+
+    warnings = await assign_team_role(role, members)
+
+    assert len(warnings) == 2
+    assert warnings[0] == "Missing permission to assign role to Player1."
+    assert warnings[1].startswith("Failed to assign role to Player4:")
+    assert peak > 1
+    for member in members:
+        member.add_roles.assert_awaited_once_with(role, reason="Team creation assignment")
+
+
 # create_team command – integration
 
 
@@ -0,0 +1,358 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import discord
+
+from Dues.generate import _build_workbook
+from Teams.create_team import TeamCreationError
+from Teams.import_teams import (
+    ImportTeams,
+    parse_roster_csv,
+    parse_dues_workbook,
+    plan_import,
+    run_import,
+)
+from utils.member_index import member_index
+
+
+def make_member(member_id, name):
+    member = MagicMock(spec=discord.Member)
+    member.id = member_id
+    member.name = name
+    member.global_name = name.title()
+    member.display_name = name.title()
+    member.add_roles = AsyncMock()
+    return member
+
+
+def make_guild():
+    guild = MagicMock(spec=discord.Guild)
+    guild.id = 555
+    members = {i: make_member(i, name) for i, name in enumerate(["ana", "ben", "cal", "dee", "eve"], start=100)}
+    guild.members = list(members.values())
+    guild.get_member = MagicMock(side_effect=members.get)
+
+    role = MagicMock(spec=discord.Role)
+    role.id = 7
+    role.name = "Dragons"
+    role.managed = False
+    guild.roles = [role]
+
+    channel = MagicMock(spec=discord.TextChannel)
+    channel.id = 8
+    channel.name = "dragons"
+    category = MagicMock(spec=discord.CategoryChannel)
+    category.id = 9
+    category.name = "Valorant: Fall"
+    category.text_channels = [channel]
+    guild.categories = [category]
+
+    member_index.invalidate(guild.id)
+    return guild
+
+
+ROSTER = """Team,Category,Discord Username,Status,Captain,Seniority
+Dragons,Valorant: Fall,ana,starter,x,2
+Dragons,Valorant: Fall,@ben,sub,,
+Knights,Overwatch,<@102>,starter,yes,
+Knights,Overwatch,Dee,starter,,
+"""
+
+
+async def plan(guild, rows, active=(), in_use=()):
+    with patch("Teams.import_teams.active_team_nicks.names", new=AsyncMock(return_value=list(active))), \
+         patch("Teams.import_teams.db.execute_named", new=AsyncMock(return_value=list(in_use))):
+        return await plan_import(guild, rows, 2025, "Fall", 0)
+
+
+# Parsing
+
+
+def test_parse_roster_csv_reads_rows_and_aliases():
+    rows, errors = parse_roster_csv(ROSTER)
+    assert errors == []
+    assert [(r.team, r.player, r.status, r.captain) for r in rows] == [
+        ("Dragons", "ana", "starter", True),
+        ("Dragons", "@ben", "sub", False),
+        ("Knights", "<@102>", "starter", True),
+        ("Knights", "Dee", "starter", False),
+    ]
+    assert rows[0].seniority == "2"
+    assert rows[2].where == "line 4"
+
+
+def test_parse_roster_csv_reports_missing_columns_and_fields():
+    assert parse_roster_csv("team,discord\nDragons,ana\n") == ([], ["Missing column(s): category."])
+    rows, errors = parse_roster_csv("team,category,discord\nDragons,,ana\n\n")
+    assert rows == []
+    assert errors == ["line 2: team, category and discord are required."]
+
+
+def test_parse_dues_workbook_reads_generate_dues_export():
+    teams = [
+        {
+            "team_nick": "Dragons",
+            "captain_discord_id": 1,
+            "members": [
+                {"player_discord_id": 1, "member_status": "starter", "rcsid": "ana1", "full_name": "Ana", "discord_username": "ana"},
+                {"player_discord_id": 2, "member_status": "sub", "rcsid": None, "full_name": "Ben", "discord_username": "ben"},
+            ],
+        },
+        {
+            "team_nick": "Knights",
+            "captain_discord_id": 3,
+            "members": [
+                {"player_discord_id": 3, "member_status": "starter", "rcsid": None, "full_name": "Cal", "discord_username": "cal"},
+            ],
+        },
+    ]
+    data = _build_workbook([("Valorant Fall", teams)], 50, 25).getvalue()
+    rows, errors = parse_dues_workbook(data)
+    assert errors == []
+    assert [(r.category, r.team, r.player, r.status, r.captain) for r in rows] == [
+        ("Valorant Fall", "Dragons", "ana", "starter", True),
+        ("Valorant Fall", "Dragons", "ben", "sub", False),
+        ("Valorant Fall", "Knights", "cal", "starter", True),
+    ]
+
+
+def test_parse_dues_workbook_rejects_non_workbook():
+    rows, errors = parse_dues_workbook(b"not a workbook")
+    assert rows == []
+    assert errors[0].startswith("Could not read the workbook")
+
+
+# Validation
+
+
+@pytest.mark.asyncio
+async def test_plan_import_resolves_existing_and_new_objects():
+    guild = make_guild()
+    rows, _ = parse_roster_csv(ROSTER)
+    plans, errors = await plan(guild, rows)
+    assert errors == []
+    dragons, knights = plans
+
+    # Existing role, channel and category (matched by its sheet-safe name too)
+    assert dragons.draft.role is guild.roles[0]
+    assert dragons.draft.channel is guild.categories[0].text_channels[0]
+    assert dragons.draft.captain.name == "ana"
+    assert [m.name for m in dragons.draft.substitutes] == ["ben"]
+    assert dragons.draft.seniority == 2
+    assert not (dragons.new_role or dragons.new_channel or dragons.new_category)
+
+    assert knights.draft.captain.id == 102
+    assert [m.name for m in knights.draft.starters] == ["cal", "dee"]
+    assert knights.new_role and knights.new_channel and knights.new_category
+    assert knights.channel_name == "knights"
+    assert knights.draft.seniority == 0
+
+    rows, _ = parse_roster_csv(ROSTER.replace("Valorant: Fall", "Valorant Fall"))
+    plans, errors = await plan(guild, rows)
+    assert errors == []
+    assert plans[0].draft.category is guild.categories[0]
+
+
+@pytest.mark.asyncio
+async def test_plan_import_collects_every_problem():
+    guild = make_guild()
+    rows, _ = parse_roster_csv(
+        "team,category,discord,status,captain,seniority\n"
+        "Dragons,Valorant: Fall,ana,starter,x,\n"
+        "Knights,Overwatch,ghost,starter,x,high\n"
+        "Knights,Overwatch,ben,bench,,\n"
+        "Knights,Overwatch,cal,sub,,\n"
+        "Knights,Overwatch,cal,sub,,\n"
+        "Rooks,Overwatch,dee,starter,x,\n"
+        "Rooks,Overwatch,eve,starter,x,\n"
+    )
+    in_use = [{"role_id": 7, "category_id": 9, "channel_id": 8}]
+    plans, errors = await plan(guild, rows, active=["dragons"], in_use=in_use)
+    assert len(plans) == 3
+    assert errors == [
+        "Team `Dragons`: an active team already has this name.",
+        "Team `Dragons`: an active team already uses this role, category and channel.",
+        "Team `Knights`: seniority `high` is not a whole number.",
+        "line 3: member `ghost` was not found in this server.",
+        "line 4: unknown status `bench` (use starter or sub).",
+        "line 6: Cal is listed twice for `Knights`.",
+        "Team `Knights`: mark exactly one captain (found 0).",
+        "Team `Knights`: at least one starter is required.",
+        "Team `Rooks`: mark exactly one captain (found 2).",
+    ]
+
+
+# Import
+
+
+@pytest.mark.asyncio
+async def test_run_import_creates_objects_saves_in_one_transaction_and_grants_roles():
+    guild = make_guild()
+    new_role = MagicMock(spec=discord.Role)
+    new_role.id = 17
+    new_category = MagicMock(spec=discord.CategoryChannel)
+    new_category.id = 19
+    new_channel = MagicMock(spec=discord.TextChannel)
+    new_channel.id = 18
+    guild.create_role = AsyncMock(return_value=new_role)
+    guild.create_category = AsyncMock(return_value=new_category)
+    guild.create_text_channel = AsyncMock(return_value=new_channel)
+    rows, _ = parse_roster_csv(ROSTER)
+    plans, _ = await plan(guild, rows)
+
+    job = MagicMock()
+    job.report = AsyncMock()
+    connection = object()
+
+    async def fake_transaction(fn):
+        return await fn(connection)
+
+    with patch("Teams.import_teams.db.run_in_transaction", new=AsyncMock(side_effect=fake_transaction)) as mock_tx, \
+         patch("Teams.import_teams.insert_team", new=AsyncMock()) as mock_insert, \
+         patch("Teams.import_teams.active_team_nicks.add") as mock_add:
+        report = await run_import(job, guild, plans)
+
+    mock_tx.assert_awaited_once()
+    assert [c.args for c in mock_insert.await_args_list] == [(connection, p.draft) for p in plans]
+    assert {c.args[0] for c in mock_add.call_args_list} == {"Dragons", "Knights"}
+    guild.create_category.assert_awaited_once_with(name="Overwatch", reason="Team import category")
+    guild.create_role.assert_awaited_once_with(name="Knights", reason="Team import role")
+    guild.create_text_channel.assert_awaited_once_with(
+        name="knights", category=new_category, reason="Team import channel"
+    )
+    assert plans[1].draft.role is new_role
+    member = guild.get_member(102)
+    member.add_roles.assert_awaited_once_with(new_role, reason="Team creation assignment")
+    assert report.startswith("**Imported 2 of 2 teams.**")
+    assert "`Knights` in `Overwatch` (new)" in report
+
+
+@pytest.mark.asyncio
+async def test_run_import_skips_teams_that_could_not_be_provisioned():
+    guild = make_guild()
+    guild.create_category = AsyncMock(side_effect=discord.Forbidden(MagicMock(), "forbidden"))
+    rows, _ = parse_roster_csv(ROSTER)
+    plans, _ = await plan(guild, rows)
+    job = MagicMock()
+    job.report = AsyncMock()
+
+    with patch("Teams.import_teams.db.run_in_transaction", new=AsyncMock()), \
+         patch("Teams.import_teams.active_team_nicks.add"):
+        report = await run_import(job, guild, plans)
+
+    assert report.startswith("**Imported 1 of 2 teams.**")
+    assert "Could not create category `Overwatch`" in report
+    assert "Could not create the role or channel" not in report
+
+
+@pytest.mark.asyncio
+async def test_run_import_transaction_failure_saves_nothing():
+    guild = make_guild()
+    rows, _ = parse_roster_csv(ROSTER.split("Knights")[0])
+    plans, _ = await plan(guild, rows)
+    job = MagicMock()
+    job.report = AsyncMock()
+    error = TeamCreationError("Another active team already uses this role, category, and channel.")
+
+    with patch("Teams.import_teams.db.run_in_transaction", new=AsyncMock(side_effect=error)), \
+         patch("Teams.import_teams.active_team_nicks.add") as mock_add:
+        report = await run_import(job, guild, plans)
+
+    assert report.startswith("**Team import failed.** No teams were saved")
+    assert "left in place" not in report
+    mock_add.assert_not_called()
+    guild.get_member(100).add_roles.assert_not_awaited()
+
+
+# Command
+
+
+@pytest.fixture
+def cog():
+    return ImportTeams(MagicMock())
+
+
+def make_interaction(guild, is_admin=True, filename="teams.csv", content=ROSTER.encode()):
+    interaction = MagicMock()
+    interaction.response = AsyncMock()
+    interaction.followup = MagicMock()
+    interaction.followup.send = AsyncMock()
+    interaction.guild = guild
+    interaction.user = MagicMock(spec=discord.Member)
+    interaction.user.id = 1
+    attachment = MagicMock(spec=discord.Attachment)
+    attachment.filename = filename
+    attachment.size = len(content)
+    attachment.read = AsyncMock(return_value=content)
+    return interaction, attachment
+
+
+def pass_admin_guard(cog, is_admin=True):
+    from Admin.admin import Admin
+
+    admin_mock = MagicMock(spec=Admin)
+    admin_mock.is_admin = AsyncMock(return_value=is_admin)
+    cog.bot.get_cog = MagicMock(return_value=admin_mock)
+
+
+async def invoke(cog, interaction, attachment, dry_run=False, in_use=()):
+    with patch("Teams.import_teams.active_team_nicks.names", new=AsyncMock(return_value=[])), \
+         patch("Teams.import_teams.db.execute_named", new=AsyncMock(return_value=list(in_use))), \
+         patch("Teams.import_teams.job_manager.submit") as mock_submit, \
+         patch("Teams.import_teams.settings_cache.get", new=AsyncMock()) as mock_settings:
+        mock_submit.return_value = MagicMock(id=3)
+        await cog.import_teams.callback(cog, interaction, attachment, 2025, "Fall", 0, dry_run)
+    return mock_submit, mock_settings
+
+
+@pytest.mark.asyncio
+async def test_import_teams_requires_admin(cog):
+    pass_admin_guard(cog, is_admin=False)
+    interaction, attachment = make_interaction(make_guild())
+    submit, _ = await invoke(cog, interaction, attachment)
+    assert "permission" in interaction.response.send_message.call_args[0][0]
+    attachment.read.assert_not_awaited()
+    submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_import_teams_rejects_other_file_types(cog):
+    pass_admin_guard(cog)
+    interaction, attachment = make_interaction(make_guild(), filename="teams.txt")
+    submit, _ = await invoke(cog, interaction, attachment)
+    assert ".csv" in interaction.followup.send.call_args[0][0]
+    submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_import_teams_reports_problems_and_imports_nothing(cog):
+    pass_admin_guard(cog)
+    interaction, attachment = make_interaction(
+        make_guild(), content=b"team,category,discord\nDragons,Valorant: Fall,ghost\n"
+    )
+    submit, _ = await invoke(cog, interaction, attachment)
+    message = interaction.followup.send.call_args[0][0]
+    assert message.startswith("**Nothing was imported.** Fix these 3 problem(s)")
+    assert "member `ghost` was not found" in message
+    submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_import_teams_dry_run_reports_plan_only(cog):
+    pass_admin_guard(cog)
+    interaction, attachment = make_interaction(make_guild())
+    submit, _ = await invoke(cog, interaction, attachment, dry_run=True)
+    message = interaction.followup.send.call_args[0][0]
+    assert message.startswith("**Dry run: 2 teams are ready to import.**")
+    assert "New Discord objects: 1 categories, 1 roles, 1 channels." in message
+    submit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_import_teams_starts_job(cog):
+    pass_admin_guard(cog)
+    interaction, attachment = make_interaction(make_guild())
+    submit, settings = await invoke(cog, interaction, attachment)
+    submit.assert_called_once()
+    assert submit.call_args[0][0] == "team import"
+    assert submit.call_args.kwargs["channel"] is settings.return_value.engineer_channel
+    assert "job `#3`" in interaction.followup.send.call_args[0][0]
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_name_index():
+    # The autocomplete indexes are module singletons; start each test from an empty cache.
+    from utils.name_index import room_names, active_team_nicks
+
+    room_names.invalidate()
+    active_team_nicks.invalidate()
+    yield
+    room_names.invalidate()
+    active_team_nicks.invalidate()
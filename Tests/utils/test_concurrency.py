@@ -0,0 +1,32 @@
+import asyncio
+import pytest
+
+from utils.concurrency import bounded_gather
+
+
+@pytest.mark.asyncio
+async def test_bounded_gather_caps_concurrency_and_keeps_order():
+    in_flight = 0
+    peak = 0
+    progress = []
+
+    async def work(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if item == 3:
+            raise ValueError("bad item")
+        return item * 2
+
+    async def on_done(count):
+        progress.append(count)
+
+    results = await bounded_gather(work, range(10), limit=3, on_done=on_done)
+
+    assert peak == 3
+    assert results[:3] == [0, 2, 4]
+    assert isinstance(results[3], ValueError)
+    assert results[9] == 18
+    assert progress == list(range(1, 11))
@@ -0,0 +1,126 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from utils.conversations import Conversation, ConversationRouter
+from verification_utils.conversation import VerificationFlow
+from verification_utils.student import StudentVerification
+
+
+def make_message(content, channel_id=10, user_id=1, bot=False, attachments=()):
+    message = MagicMock()
+    message.content = content
+    message.channel.id = channel_id
+    message.author.id = user_id
+    message.author.bot = bot
+    message.attachments = list(attachments)
+    return message
+
+
+class EchoConversation(Conversation):
+    def __init__(self, user, timeout=300.0):
+        super().__init__(user)
+        self.seen = []
+        self.timed_out = None
+        self.step_timeout = timeout
+
+    async def start(self):
+        self.channel = MagicMock(id=10)
+        self.expect("number", timeout=self.step_timeout)
+
+    def accepts_number(self, message):
+        return message.content.isdigit()
+
+    async def on_number(self, message):
+        self.seen.append(message.content)
+        if message.content != "0":
+            self.expect("number", timeout=self.step_timeout)
+
+    async def on_timeout(self):
+        self.timed_out = self.step
+
+
+def test_conversation_hooks_are_abstract():
+    with pytest.raises(TypeError):
+        Conversation(MagicMock(id=1))
+    with pytest.raises(TypeError):
+        VerificationFlow(MagicMock(id=1), MagicMock())
+
+
+@pytest.mark.asyncio
+async def test_router_dispatches_by_channel_and_user():
+    router = ConversationRouter()
+    conversation = EchoConversation(MagicMock(id=1))
+    await router.begin(conversation)
+
+    assert await router.dispatch(make_message("5"))
+    assert not await router.dispatch(make_message("hello"))  # rejected by accepts_number
+    assert not await router.dispatch(make_message("6", user_id=2))
+    assert not await router.dispatch(make_message("7", channel_id=11))
+    assert not await router.dispatch(make_message("8", bot=True))
+    assert conversation.seen == ["5"]
+
+    # A handler that does not expect() another step ends the conversation.
+    assert await router.dispatch(make_message("0"))
+    assert not router.is_active(1)
+    assert not await router.dispatch(make_message("9"))
+
+
+@pytest.mark.asyncio
+async def test_router_times_out_idle_conversations():
+    router = ConversationRouter()
+    conversation = EchoConversation(MagicMock(id=1), timeout=0.01)
+    await router.begin(conversation)
+
+    await asyncio.sleep(0.05)
+
+    assert conversation.timed_out == "number"
+    assert not router.is_active(1)
+
+
+@pytest.mark.asyncio
+async def test_router_ends_conversation_on_error():
+    router = ConversationRouter()
+    conversation = EchoConversation(MagicMock(id=1))
+    conversation.on_number = AsyncMock(side_effect=RuntimeError("boom"))
+    conversation.on_error = AsyncMock()
+    await router.begin(conversation)
+
+    await router.dispatch(make_message("1"))
+
+    conversation.on_error.assert_awaited_once()
+    assert not router.is_active(1)
+
+
+@pytest.mark.asyncio
+async def test_student_flow_runs_on_router():
+    router = ConversationRouter()
+    dm = MagicMock(id=10)
+    dm.send = AsyncMock()
+    interaction = MagicMock()
+    interaction.user.id = 1
+    interaction.user.create_dm = AsyncMock(return_value=dm)
+    interaction.response.send_message = AsyncMock()
+    flow = StudentVerification(interaction.user, interaction.guild, interaction)
+
+    settings = MagicMock()
+    with patch("verification_utils.conversation.session_store.save", new=AsyncMock()) as mock_save, \
+         patch("verification_utils.conversation.session_store.delete", new=AsyncMock()) as mock_delete, \
+         patch("verification_utils.conversation.email_sender.send_email", new=AsyncMock(return_value=(True, "ok"))) as mock_send, \
+         patch("verification_utils.conversation.random.choices", return_value=list("123456")), \
+         patch("verification_utils.student.settings_cache.get", new=AsyncMock(return_value=settings)), \
+         patch("verification_utils.student.handle_role_change", new=AsyncMock()) as mock_role, \
+         patch("verification_utils.student.add_user", new=AsyncMock()) as mock_add_user:
+        await router.begin(flow)
+        await router.dispatch(make_message("turing25"))
+        assert mock_send.await_args.args[0] == "turing25@rpi.edu"
+        await router.dispatch(make_message("123456"))
+        assert not await router.dispatch(make_message("12"))  # outside 1-8
+        await router.dispatch(make_message("4"))
+
+    mock_role.assert_awaited_once_with(interaction.guild, 1, settings.student_role, settings.status_roles())
+    mock_add_user.assert_awaited_once_with(1, 4)
+    assert not router.is_active(1)
+    # Saved after each step that waits on the user, removed when finished.
+    assert mock_save.await_count == 3
+    mock_delete.assert_awaited_once_with(1)
@@ -0,0 +1,203 @@
+import asyncio
+import asyncpg
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from utils.db import Database, is_readonly_query
+
+
+class FakeTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        self.connection.transactions += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.connection.rollbacks += 1
+        return False
+
+
+class FakeConnection:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.transactions = 0
+        self.rollbacks = 0
+        self.prepares = 0
+        self.releases = 0
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def fetch(self, query, *params):
+        await asyncio.sleep(self.delay)
+        return [{"query": query, "params": params}]
+
+    async def prepare(self, query):
+        self.prepares += 1
+        return FakeStatement(self, query)
+
+
+class FakeStatement:
+    """Mirrors asyncpg: a statement is unusable once its connection is released."""
+
+    def __init__(self, connection, query):
+        self.connection = connection
+        self.query = query
+        self.release_ctr = connection.releases
+
+    async def fetch(self, *params):
+        if self.release_ctr != self.connection.releases:
+            raise asyncpg.exceptions.InterfaceError(
+                "cannot call PreparedStatement.fetch(): the underlying connection "
+                "has been released back to the pool"
+            )
+        return await self.connection.fetch(self.query, *params)
+
+
+class FakeAcquire:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        return self.connection
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.connection.releases += 1
+        return False
+
+
+class FakePool:
+    def __init__(self, delay=0.0):
+        self.connection = FakeConnection(delay)
+
+    def acquire(self):
+        return FakeAcquire(self.connection)
+
+    async def close(self):
+        pass
+
+
+async def start(database, pool):
+    database._pool = pool
+    database._start_workers()
+
+
+@pytest.mark.asyncio
+async def test_execute_returns_rows():
+    database = Database(workers=2)
+    await start(database, FakePool())
+    rows = await database.execute("SELECT $1", 5)
+    assert rows == [{"query": "SELECT $1", "params": (5,)}]
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_workers_run_queries_concurrently():
+    database = Database(workers=4)
+    await start(database, FakePool(delay=0.05))
+    loop = asyncio.get_event_loop()
+    started = loop.time()
+    await asyncio.gather(*(database.execute("SELECT 1") for _ in range(4)))
+    assert loop.time() - started < 0.15
+    stats = database.stats()
+    assert stats["completed"] == 4
+    assert stats["workers"] == 4
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_callback_rolls_back_and_raises():
+    database = Database(workers=1)
+    pool = FakePool()
+    await start(database, pool)
+
+    async def callback(connection):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await database.run_in_transaction(callback)
+    assert pool.connection.rollbacks == 1
+    assert database.stats()["failed"] == 1
+    await database.close()
+
+
+def test_is_readonly_query():
+    assert is_readonly_query("SELECT role_id FROM admin_roles")
+    assert is_readonly_query("\n    select * from server_settings WHERE guild_id = $1")
+    assert not is_readonly_query("SELECT * FROM users FOR UPDATE")
+    assert not is_readonly_query("INSERT INTO users (discord_id) VALUES ($1)")
+    assert not is_readonly_query("UPDATE teams SET archived = TRUE")
+
+
+@pytest.mark.asyncio
+async def test_selects_skip_transaction_writes_keep_it():
+    database = Database(workers=1)
+    pool = FakePool()
+    await start(database, pool)
+    await database.execute("SELECT 1")
+    await database.fetch_readonly("SELECT 2")
+    assert pool.connection.transactions == 0
+    await database.execute("DELETE FROM users WHERE discord_id = $1", 1)
+    assert pool.connection.transactions == 1
+    assert database.stats()["readonly"] == 2
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_named_statement_survives_pool_release():
+    database = Database(workers=1)
+    pool = FakePool()
+    await start(database, pool)
+    database.register_statement("by_id", "SELECT * FROM users WHERE discord_id = $1")
+    await database.execute_named("by_id", 1)
+    rows = await database.execute_named("by_id", 2)
+    assert rows == [{"query": "SELECT * FROM users WHERE discord_id = $1", "params": (2,)}]
+    assert pool.connection.releases == 2
+    assert pool.connection.prepares == 0
+    assert pool.connection.transactions == 0
+    await database.close()
+
+
+@pytest.mark.asyncio
+async def test_released_prepared_statement_raises():
+    pool = FakePool()
+    async with pool.acquire() as connection:
+        statement = await connection.prepare("SELECT 1")
+        await statement.fetch()
+    with pytest.raises(asyncpg.exceptions.InterfaceError):
+        await statement.fetch()
+
+
+def test_register_statement_rejects_conflicting_sql():
+    database = Database(workers=1)
+    database.register_statement("by_id", "SELECT 1")
+    database.register_statement("by_id", "SELECT 1")
+    with pytest.raises(ValueError):
+        database.register_statement("by_id", "SELECT 2")
+
+
+@pytest.mark.asyncio
+async def test_execute_named_unknown_statement():
+    database = Database(workers=1)
+    with pytest.raises(KeyError):
+        await database.execute_named("missing")
+
+
+@pytest.mark.asyncio
+async def test_connect_applies_migrations_before_starting_workers():
+    database = Database(workers=2)
+    pool = FakePool()
+
+    async def migrate(connection):
+        assert connection is pool.connection
+        assert database._workers == []
+
+    with patch("utils.db.asyncpg.create_pool", new=AsyncMock(return_value=pool)), \
+         patch("utils.db.apply_migrations", new=AsyncMock(side_effect=migrate)) as mock_migrate:
+        await database.connect()
+    mock_migrate.assert_awaited_once()
+    assert len(database._workers) == 2
+    await database.close()
@@ -0,0 +1,260 @@
+import asyncio
+import socket
+import time
+import pytest
+from email.message import EmailMessage
+from unittest.mock import AsyncMock, patch
+
+from utils.email import EmailSender, SmtpPool, PRIORITY_BULK, PRIORITY_VERIFICATION, _CLAIM_SQL
+
+
+class RecordingHandler:
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(session.peer)
+        return "250 OK"
+
+
+def authenticator(server, session, envelope, mechanism, auth_data):
+    from aiosmtpd.smtp import AuthResult
+
+    ok = auth_data.login == b"bot@example.com" and auth_data.password == b"secret"
+    return AuthResult(success=ok)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    # Local SMTP stand-in; only needed for the pool tests.
+    pytest.importorskip("aiosmtpd")
+    from aiosmtpd.controller import Controller
+
+    handler = RecordingHandler()
+    port = free_port()
+    controller = Controller(
+        handler,
+        hostname="127.0.0.1",
+        port=port,
+        authenticator=authenticator,
+        auth_require_tls=False,
+    )
+    controller.start()
+    yield handler, port
+    controller.stop()
+
+
+def make_message(i):
+    msg = EmailMessage()
+    msg.set_content(f"code {i}")
+    msg["Subject"] = "Verification"
+    msg["From"] = "bot@example.com"
+    msg["To"] = f"student{i}@rpi.edu"
+    return msg
+
+
+def make_pool(port, **kwargs):
+    return SmtpPool(
+        "127.0.0.1", port, use_ssl=False,
+        username="bot@example.com", password="secret", **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_sessions(smtp_server):
+    handler, port = smtp_server
+    pool = make_pool(port, max_connections=2)
+
+    await asyncio.gather(*(pool.send(make_message(i)) for i in range(10)))
+
+    assert len(handler.messages) == 10
+    # Never more sessions than the pool allows.
+    assert len(handler.sessions) <= 2
+    assert len(pool._idle) <= 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_reconnects_dropped_session(smtp_server):
+    handler, port = smtp_server
+    pool = make_pool(port, max_connections=1)
+
+    await pool.send(make_message(1))
+    # Simulate the server timing the idle session out.
+    pool._idle[0][0].sock.shutdown(socket.SHUT_RDWR)
+    await pool.send(make_message(2))
+
+    assert len(handler.messages) == 2
+    assert len(handler.sessions) == 2
+    await pool.close()
+
+
+class FakeOutbox:
+    """In-memory stand-in for the email_outbox and email_quota tables."""
+
+    def __init__(self, sent_today=0):
+        self.rows = {}
+        self.next_id = 1
+        self.sent_today = sent_today
+
+    async def execute(self, query, *params):
+        q = " ".join(query.split())
+        if q.startswith("INSERT INTO email_outbox"):
+            email_id = self.next_id
+            self.next_id += 1
+            recipient, subject, body, priority = params
+            self.rows[email_id] = {
+                "id": email_id, "recipient": recipient, "subject": subject, "body": body,
+                "priority": priority, "status": "pending", "attempts": 0, "due": 0.0,
+            }
+            return [{"id": email_id}]
+        if q.startswith("UPDATE email_outbox SET status = 'sending'"):
+            due = sorted(
+                (r for r in self.rows.values() if r["status"] == "pending" and r["due"] <= time.monotonic()),
+                key=lambda r: (r["priority"], r["id"]),
+            )[: params[0]]
+            for row in due:
+                row["status"] = "sending"
+                row["attempts"] += 1
+                row["claimed"] = time.monotonic()
+            return [dict(row) for row in due]
+        if q.startswith("UPDATE email_outbox SET status = 'pending' WHERE status = 'sending'"):
+            for row in self.rows.values():
+                if row["status"] == "sending" and row["claimed"] < time.monotonic() - params[0]:
+                    row["status"] = "pending"
+            return []
+        if q.startswith("INSERT INTO email_quota"):
+            if self.sent_today >= params[1]:
+                return []
+            self.sent_today += 1
+            return [{"sent": self.sent_today}]
+        if q.startswith("UPDATE email_quota"):
+            self.sent_today -= 1
+        elif q.startswith("DELETE FROM email_outbox WHERE id"):
+            self.rows.pop(params[0], None)
+        elif "last_error" in q:
+            row = self.rows[params[0]]
+            row.update(status="pending", last_error=params[1], due=time.monotonic() + params[2])
+        return []
+
+
+@pytest.fixture
+def outbox():
+    fake = FakeOutbox()
+    with patch("utils.email.db.execute", new=fake.execute):
+        yield fake
+
+
+def make_sender():
+    sender = EmailSender()
+    sender.sender_email = "bot@example.com"
+    sender.password = "secret"
+    sender.pool.send = AsyncMock()
+    sender.RETRY_BASE = 0.01
+    sender.POLL_INTERVAL = 0.01
+    return sender
+
+
+@pytest.mark.asyncio
+async def test_send_email_waits_for_delivery(outbox):
+    sender = make_sender()
+    task = asyncio.create_task(sender._dispatch_loop())
+
+    success, _ = await sender.send_email("student@rpi.edu", "Code", "123456")
+
+    task.cancel()
+    assert success
+    assert outbox.rows == {}
+    assert outbox.sent_today == 1
+    assert sender.pool.send.await_args.args[0]["To"] == "student@rpi.edu"
+
+
+@pytest.mark.asyncio
+async def test_failed_send_is_retried_without_using_quota(outbox):
+    sender = make_sender()
+    sender.pool.send.side_effect = [ConnectionError("down"), None]
+    task = asyncio.create_task(sender._dispatch_loop())
+
+    success, _ = await sender.send_email("student@rpi.edu", "Code", "123456")
+
+    task.cancel()
+    assert success
+    assert sender.pool.send.await_count == 2
+    assert outbox.sent_today == 1
+
+
+@pytest.mark.asyncio
+async def test_quota_survives_in_table_and_rejects_verification(outbox):
+    outbox.sent_today = 495
+    sender = make_sender()
+    task = asyncio.create_task(sender._dispatch_loop())
+
+    success, message = await sender.send_email("student@rpi.edu", "Code", "123456")
+
+    task.cancel()
+    assert not success
+    assert "limit" in message
+    sender.pool.send.assert_not_awaited()
+    assert outbox.rows == {}
+
+
+@pytest.mark.asyncio
+async def test_verification_mail_jumps_the_queue(outbox):
+    sender = make_sender()
+    sender.pool.max_connections = 1
+    await sender.queue_email("list@rpi.edu", "Newsletter", "hi", PRIORITY_BULK)
+    await sender.queue_email("student@rpi.edu", "Code", "123456", PRIORITY_VERIFICATION)
+
+    await sender._dispatch_batch()
+
+    assert sender.pool.send.await_args.args[0]["To"] == "student@rpi.edu"
+    assert [row["recipient"] for row in outbox.rows.values()] == ["list@rpi.edu"]
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_requeues_only_its_row(outbox):
+    sender = make_sender()
+    sender._reserve_quota = AsyncMock(side_effect=[RuntimeError("db down"), 1])
+    first = await sender.queue_email("a@rpi.edu", "Newsletter", "hi")
+    second = await sender.queue_email("b@rpi.edu", "Newsletter", "hi")
+
+    assert await sender._dispatch_batch() == 2
+
+    assert sender.pool.send.await_args.args[0]["To"] == "b@rpi.edu"
+    assert second not in outbox.rows
+    assert outbox.rows[first]["status"] == "pending"
+    assert outbox.rows[first]["last_error"] == "db down"
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_resolves_waiter_when_reschedule_fails(outbox):
+    sender = make_sender()
+    sender._reserve_quota = AsyncMock(side_effect=RuntimeError("db down"))
+    sender._retry_or_drop = AsyncMock(side_effect=RuntimeError("still down"))
+    waiter = asyncio.get_running_loop().create_future()
+    await sender.queue_email("student@rpi.edu", "Code", "123456", PRIORITY_VERIFICATION, waiter=waiter)
+
+    await sender._dispatch_batch()
+
+    assert waiter.result() == (False, "Failed to send verification email.")
+
+
+@pytest.mark.asyncio
+async def test_reclaim_leaves_rows_within_lease(outbox):
+    sender = make_sender()
+    await sender.queue_email("a@rpi.edu", "Newsletter", "hi")
+    await sender.queue_email("b@rpi.edu", "Newsletter", "hi")
+    await outbox.execute(_CLAIM_SQL, 2)
+    outbox.rows[1]["claimed"] -= sender.SENDING_LEASE + 1
+
+    await sender._reclaim_abandoned()
+
+    assert [row["status"] for row in outbox.rows.values()] == ["pending", "sending"]
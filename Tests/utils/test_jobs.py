@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from utils.jobs import JobManager, split_message
+
+
+def make_channel():
+    channel = MagicMock()
+    message = MagicMock()
+    message.edit = AsyncMock()
+    channel.send = AsyncMock(return_value=message)
+    return channel, message
+
+
+def test_split_message_respects_limit_and_lines():
+    text = "\n".join(f"line {i}" for i in range(500))
+    chunks = split_message(text, limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert "\n".join(chunks) == text
+
+    assert split_message("x" * 250, limit=100) == ["x" * 100, "x" * 100, "x" * 50]
+
+
+@pytest.mark.asyncio
+async def test_job_reports_progress_and_posts_result():
+    manager = JobManager()
+    channel, message = make_channel()
+
+    async def work(job):
+        for i in range(1, 4):
+            await job.report(i, 3)
+        return "all done"
+
+    job = manager.submit("test", work, guild_id=1, user_id=2, channel=channel)
+    await job._task
+
+    assert job.status == "done"
+    assert job.done == 3 and job.total == 3
+    assert manager.get(job.id) is job
+    # One progress message, edited in place, then the result.
+    assert channel.send.await_args_list[0].args[0].startswith(f"Job `#{job.id}`")
+    assert channel.send.await_args_list[-1].args[0] == "all done"
+    assert "done (3/3, 100%)" in message.edit.await_args.kwargs["content"]
+
+
+@pytest.mark.asyncio
+async def test_job_cancel_and_failure():
+    manager = JobManager()
+    channel, _ = make_channel()
+    started = asyncio.Event()
+
+    async def forever(job):
+        started.set()
+        await asyncio.sleep(3600)
+
+    async def broken(job):
+        raise RuntimeError("boom")
+
+    slow = manager.submit("slow", forever, guild_id=1, user_id=2, channel=channel)
+    failing = manager.submit("broken", broken, guild_id=1, user_id=2, channel=channel)
+    await started.wait()
+
+    assert manager.cancel(slow.id)
+    await slow._task
+    await failing._task
+
+    assert slow.status == "cancelled"
+    assert not manager.cancel(slow.id)
+    assert failing.status == "failed" and failing.error == "boom"
+    assert [job.id for job in manager.list(1)] == [failing.id, slow.id]
+    assert manager.list(2) == []
@@ -0,0 +1,117 @@
+import pytest
+from unittest.mock import MagicMock
+
+from utils.member_index import MemberIndex
+
+
+def make_member(member_id, name, global_name=None, guild=None):
+    member = MagicMock()
+    member.id = member_id
+    member.name = name
+    member.global_name = global_name
+    member.guild = guild
+    return member
+
+
+def make_guild(*members):
+    guild = MagicMock()
+    guild.id = 1
+    guild.chunked = True
+    guild.members = list(members)
+    by_id = {m.id: m for m in members}
+    guild.get_member = MagicMock(side_effect=by_id.get)
+    for member in members:
+        member.guild = guild
+    return guild, by_id
+
+
+def test_lookup_by_username_ignores_case_and_at():
+    guild, _ = make_guild(make_member(10, "turing", "Alan"), make_member(11, "hopper", "Grace"))
+    index = MemberIndex()
+
+    assert index.lookup(guild, "Turing").id == 10
+    assert index.lookup(guild, " @hopper ").id == 11
+    assert index.lookup(guild, "nobody") is None
+    assert index.lookup(guild, "") is None
+
+
+def test_lookup_by_global_name_only_when_unique():
+    guild, _ = make_guild(
+        make_member(10, "turing", "Alan"),
+        make_member(11, "hopper", "Grace"),
+        make_member(12, "hopper2", "Grace"),
+    )
+    index = MemberIndex()
+
+    assert index.lookup(guild, "alan").id == 10
+    assert index.lookup(guild, "grace") is None
+
+
+def test_guild_is_indexed_once():
+    guild, _ = make_guild(make_member(10, "turing"))
+    index = MemberIndex()
+    index.lookup(guild, "turing")
+
+    guild.members = []  # Later lookups must not rescan the member list
+    assert index.lookup(guild, "turing").id == 10
+
+
+@pytest.mark.asyncio
+async def test_gateway_events_keep_index_current():
+    turing = make_member(10, "turing", "Alan")
+    guild, by_id = make_guild(turing)
+    index = MemberIndex()
+    index.lookup(guild, "turing")
+
+    # discord.py updates guild.members before dispatching each event.
+    hopper = make_member(11, "hopper", guild=guild)
+    by_id[11] = hopper
+    guild.members = [turing, hopper]
+    await index.on_member_join(hopper)
+    assert index.lookup(guild, "hopper").id == 11
+
+    renamed = make_member(10, "aturing", "Alan T", guild=guild)
+    by_id[10] = renamed
+    guild.members = [renamed, hopper]
+    await index.on_user_update(turing, renamed)
+    assert index.lookup(guild, "turing") is None
+    assert index.lookup(guild, "aturing").id == 10
+    assert index.lookup(guild, "alan t").id == 10
+
+    guild.members = [renamed]
+    await index.on_member_remove(hopper)
+    assert index.lookup(guild, "hopper") is None
+
+    await index.on_guild_remove(guild)
+    assert index.lookup(guild, "aturing").id == 10
+
+
+def test_unchunked_guild_is_scanned_not_indexed():
+    guild, by_id = make_guild(make_member(10, "turing"))
+    guild.chunked = False
+    index = MemberIndex()
+    assert index.lookup(guild, "turing").id == 10
+
+    hopper = make_member(11, "hopper", guild=guild)
+    by_id[11] = hopper
+    guild.members.append(hopper)
+    guild.chunked = True
+    assert index.lookup(guild, "hopper").id == 11
+
+    guild.members = []  # Indexed now that the guild is chunked
+    assert index.lookup(guild, "turing").id == 10
+
+
+def test_miss_rebuilds_from_member_list():
+    guild, by_id = make_guild(make_member(10, "turing"))
+    index = MemberIndex()
+    index.lookup(guild, "turing")
+
+    hopper = make_member(11, "hopper", "Grace", guild=guild)
+    by_id[11] = hopper
+    guild.members.append(hopper)  # Joined without an event reaching the index
+    assert index.lookup(guild, "hopper").id == 11
+
+    guild.members = []
+    assert index.lookup(guild, "grace").id == 11
+    assert index.lookup(guild, "nobody") is None
@@ -0,0 +1,97 @@
+import re
+import pytest
+
+from utils.migrations import MIGRATIONS_DIR, apply_migrations, migration_files
+
+
+class FakeTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        self.connection.pending = []
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.connection.committed.extend(self.connection.pending)
+        else:
+            self.connection.rollbacks += 1
+        self.connection.pending = None
+        return False
+
+
+class FakeConnection:
+    def __init__(self, applied=(), fail_on=None):
+        self.applied = list(applied)
+        self.fail_on = fail_on
+        self.committed = []
+        self.pending = None
+        self.rollbacks = 0
+        self.locks = []
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def execute(self, query, *params):
+        if "pg_advisory" in query:
+            self.locks.append(query.split("(")[0].split()[-1])
+            return
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError("syntax error")
+        if self.pending is not None:
+            self.pending.append((query, params))
+
+    async def fetch(self, query, *params):
+        return [{"version": v} for v in self.applied]
+
+
+@pytest.fixture
+def migrations(tmp_path):
+    (tmp_path / "001_first.sql").write_text("CREATE INDEX IF NOT EXISTS a ON t (a);")
+    (tmp_path / "002_second.sql").write_text("CREATE INDEX IF NOT EXISTS b ON t (b);")
+    (tmp_path / "003_third.sql").write_text("CREATE INDEX IF NOT EXISTS c ON t (c);")
+    (tmp_path / "README.txt").write_text("not a migration")
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_applies_pending_in_order_each_in_own_transaction(migrations):
+    connection = FakeConnection(applied=["001_first"])
+    assert await apply_migrations(connection, migrations) == ["002_second", "003_third"]
+    assert connection.committed == [
+        ("CREATE INDEX IF NOT EXISTS b ON t (b);", ()),
+        ("INSERT INTO schema_migrations (version) VALUES ($1)", ("002_second",)),
+        ("CREATE INDEX IF NOT EXISTS c ON t (c);", ()),
+        ("INSERT INTO schema_migrations (version) VALUES ($1)", ("003_third",)),
+    ]
+    assert connection.locks == ["pg_advisory_lock", "pg_advisory_unlock"]
+
+
+@pytest.mark.asyncio
+async def test_up_to_date_database_applies_nothing(migrations):
+    connection = FakeConnection(applied=["001_first", "002_second", "003_third"])
+    assert await apply_migrations(connection, migrations) == []
+    assert connection.committed == []
+
+
+@pytest.mark.asyncio
+async def test_failed_migration_rolls_back_and_stops(migrations):
+    connection = FakeConnection(fail_on="ON t (b)")
+    with pytest.raises(RuntimeError):
+        await apply_migrations(connection, migrations)
+    versions = [params[0] for query, params in connection.committed if params]
+    assert versions == ["001_first"]
+    assert connection.rollbacks == 1
+    assert connection.locks == ["pg_advisory_lock", "pg_advisory_unlock"]
+
+
+def test_shipped_migrations_are_idempotent():
+    # They also run against fresh databases, where init.sql already made the change.
+    files = migration_files(MIGRATIONS_DIR)
+    assert files
+    for version, sql in files:
+        for statement in re.findall(r"\bCREATE\s+(?:TABLE|INDEX|EXTENSION)\b[^;]*", sql, re.IGNORECASE):
+            assert "IF NOT EXISTS" in statement.upper(), f"{version}: {statement}"
+        for statement in re.findall(r"\bDROP\s+\w+\b[^;]*", sql, re.IGNORECASE):
+            assert "IF EXISTS" in statement.upper(), f"{version}: {statement}"
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from utils.name_index import NameIndex
+
+
+ROWS = [{"room_name": n} for n in ("Lab B", "Annex Lab", "lab a", "Gym", "Studio")]
+
+
+@pytest.mark.asyncio
+async def test_complete_prefix_before_substring_and_loads_once():
+    index = NameIndex("SELECT room_name FROM rooms", "room_name")
+    with patch("utils.name_index.db.execute", new=AsyncMock(return_value=ROWS)) as mock_exec:
+        results = await asyncio.gather(*(index.complete("LAB") for _ in range(10)))
+        assert await index.complete("") == ["Annex Lab", "Gym", "lab a", "Lab B", "Studio"]
+        assert await index.complete("zzz") == []
+    assert mock_exec.await_count == 1
+    assert results[0] == ["lab a", "Lab B", "Annex Lab"]
+
+
+@pytest.mark.asyncio
+async def test_add_discard_and_invalidate():
+    index = NameIndex("SELECT room_name FROM rooms", "room_name")
+    index.add("Ignored")  # Not loaded yet; the first load picks it up from the table
+
+    with patch("utils.name_index.db.execute", new=AsyncMock(return_value=ROWS)) as mock_exec:
+        await index.complete("")
+        index.add("Lab C")
+        index.add(None)
+        index.discard("Gym")
+        assert await index.complete("lab") == ["lab a", "Lab B", "Lab C", "Annex Lab"]
+        assert "Gym" not in await index.complete("")
+        assert mock_exec.await_count == 1
+
+        index.invalidate()
+        assert "Gym" in await index.complete("")
+        assert mock_exec.await_count == 2
+
+    choices = await index.choices("stu")
+    assert [(c.name, c.value) for c in choices] == [("Studio", "Studio")]
+
+
+@pytest.mark.asyncio
+async def test_shared_name_stays_until_its_last_row_is_discarded():
+    rows = [{"team_nick": "Dragons"}, {"team_nick": "Dragons"}, {"team_nick": "Owls"}]
+    index = NameIndex("SELECT team_nick FROM teams WHERE archived = FALSE", "team_nick")
+    with patch("utils.name_index.db.execute", new=AsyncMock(return_value=rows)):
+        assert await index.names() == ["Dragons", "Owls"]
+
+    index.discard("Dragons")
+    assert await index.names() == ["Dragons", "Owls"]
+    index.discard("Dragons")
+    assert await index.names() == ["Owls"]
+
+    index.add("Owls")
+    index.discard("Owls")
+    assert await index.names() == ["Owls"]
+    index.discard("Ghosts")  # Not indexed; ignored
+    assert await index.names() == ["Owls"]
@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+import discord
+
+from utils.role_utils import handle_role_change, bulk_set_status_role
+
+
+def make_role(role_id):
+    role = MagicMock()
+    role.id = role_id
+    return role
+
+
+EVERYONE = make_role(1)
+STUDENT = make_role(10)
+ALUMNI = make_role(11)
+FRIEND = make_role(12)
+TEAM = make_role(20)
+STATUS_ROLES = {"Student": STUDENT, "Alumni": ALUMNI, "Friend": FRIEND, "Verified": None}
+
+
+def make_member(member_id, roles):
+    member = MagicMock()
+    member.id = member_id
+    member.guild.id = 1
+    member.roles = [EVERYONE, *roles]
+    member.edit = AsyncMock()
+    return member
+
+
+@pytest.mark.asyncio
+async def test_role_change_is_one_edit_from_cache():
+    member = make_member(5, [STUDENT, TEAM])
+    guild = MagicMock()
+    guild.get_member = MagicMock(return_value=member)
+    guild.fetch_member = AsyncMock()
+
+    await handle_role_change(guild, 5, ALUMNI, STATUS_ROLES)
+
+    guild.fetch_member.assert_not_awaited()
+    member.edit.assert_awaited_once_with(roles=[TEAM, ALUMNI], reason=None)
+
+
+@pytest.mark.asyncio
+async def test_role_change_fetches_uncached_member():
+    member = make_member(5, [FRIEND])
+    guild = MagicMock()
+    guild.get_member = MagicMock(return_value=None)
+    guild.fetch_member = AsyncMock(return_value=member)
+
+    await handle_role_change(guild, 5, STUDENT, STATUS_ROLES)
+
+    guild.fetch_member.assert_awaited_once_with(5)
+    member.edit.assert_awaited_once_with(roles=[STUDENT], reason=None)
+
+
+@pytest.mark.asyncio
+async def test_role_change_skips_departed_member():
+    guild = MagicMock()
+    guild.get_member = MagicMock(return_value=None)
+    guild.fetch_member = AsyncMock(side_effect=discord.NotFound(MagicMock(status=404), "gone"))
+
+    await handle_role_change(guild, 5, STUDENT, STATUS_ROLES)
+
+
+@pytest.mark.asyncio
+async def test_role_change_noop_when_already_set():
+    member = make_member(5, [TEAM, ALUMNI])
+    guild = MagicMock()
+    guild.get_member = MagicMock(return_value=member)
+
+    await handle_role_change(guild, 5, ALUMNI, STATUS_ROLES)
+
+    member.edit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_bulk_set_status_role_reports_per_member():
+    forbidden = discord.Forbidden(MagicMock(status=403), "no")
+    members = [make_member(i, [STUDENT]) for i in range(6)]
+    members[2].edit.side_effect = forbidden
+    members[4].roles.append(ALUMNI)
+    members[4].roles.remove(STUDENT)
+    progress = []
+
+    async def on_done(count):
+        progress.append(count)
+
+    results = await bulk_set_status_role(members, ALUMNI, STATUS_ROLES, reason="test", on_done=on_done)
+
+    assert results == [True, True, forbidden, True, False, True]
+    members[0].edit.assert_awaited_once_with(roles=[ALUMNI], reason="test")
+    assert progress == [1, 2, 3, 4, 5, 6]
@@ -0,0 +1,120 @@
+import asyncio
+import struct
+from contextlib import asynccontextmanager
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from utils.scanner import ClamAVScanner, ClamdError
+
+
+class FakeClamd:
+    """Minimal clamd stand-in speaking zINSTREAM on a unix socket."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.scans = []
+        self.in_flight = 0
+        self.peak = 0
+        self.server = None
+
+    async def handle(self, reader, writer):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            command = await reader.readuntil(b"\0")
+            assert command == b"zINSTREAM\0"
+            data = b""
+            while True:
+                (size,) = struct.unpack("!L", await reader.readexactly(4))
+                if size == 0:
+                    break
+                data += await reader.readexactly(size)
+            self.scans.append(data)
+            await asyncio.sleep(self.delay)
+            if b"EICAR" in data:
+                writer.write(b"stream: Eicar-Signature FOUND\0")
+            else:
+                writer.write(b"stream: OK\0")
+            await writer.drain()
+        finally:
+            self.in_flight -= 1
+            writer.close()
+
+    async def start(self, path):
+        self.server = await asyncio.start_unix_server(self.handle, path=path)
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+@asynccontextmanager
+async def running_clamd(tmp_path, delay=0.0):
+    fake = FakeClamd(delay)
+    path = str(tmp_path / "clamd.ctl")
+    await fake.start(path)
+    try:
+        yield fake, path
+    finally:
+        await fake.stop()
+
+
+@pytest.mark.asyncio
+async def test_scan_streams_bytes_to_clamd(tmp_path):
+    async with running_clamd(tmp_path) as (fake, path):
+        scanner = ClamAVScanner(socket_path=path)
+        scanner.CHUNK_SIZE = 4  # Force several INSTREAM chunks
+        assert await scanner.scan_bytes(b"a perfectly normal pdf") == (True, "Clean")
+        assert await scanner.scan_bytes(b"X5O!P%@AP EICAR test") == (False, "Infected with `Eicar-Signature`")
+    assert fake.scans == [b"a perfectly normal pdf", b"X5O!P%@AP EICAR test"]
+
+
+@pytest.mark.asyncio
+async def test_scan_results_are_cached_by_content(tmp_path):
+    async with running_clamd(tmp_path) as (fake, path):
+        scanner = ClamAVScanner(socket_path=path)
+        first = await scanner.scan_bytes(b"same upload")
+        second = await scanner.scan_bytes(b"same upload")
+
+    assert first == second == (True, "Clean")
+    assert len(fake.scans) == 1
+
+
+@pytest.mark.asyncio
+async def test_scan_concurrency_is_limited(tmp_path):
+    async with running_clamd(tmp_path, delay=0.05) as (fake, path):
+        scanner = ClamAVScanner(socket_path=path, max_concurrent=2)
+        results = await asyncio.gather(*(scanner.scan_bytes(f"file {i}".encode()) for i in range(6)))
+
+    assert all(result == (True, "Clean") for result in results)
+    assert fake.peak == 2
+
+
+@pytest.mark.asyncio
+async def test_scan_falls_back_to_cli_without_clamd(tmp_path):
+    scanner = ClamAVScanner(socket_path=str(tmp_path / "missing.ctl"))
+    proc = MagicMock(returncode=1)
+    proc.communicate = AsyncMock(return_value=(b"stream: Eicar-Signature FOUND\n", b""))
+
+    with patch("utils.scanner.asyncio.create_subprocess_exec", AsyncMock(return_value=proc)) as mock_exec:
+        result = await scanner.scan_bytes(b"EICAR")
+
+    assert result == (False, "Infected with `Eicar-Signature`")
+    assert mock_exec.call_args.args == ("clamscan", "--no-summary", "-")
+    proc.communicate.assert_awaited_once_with(b"EICAR")
+
+
+@pytest.mark.asyncio
+async def test_failed_scans_are_not_cached(tmp_path):
+    scanner = ClamAVScanner(socket_path=str(tmp_path / "missing.ctl"))
+
+    with patch("utils.scanner.asyncio.create_subprocess_exec", AsyncMock(side_effect=FileNotFoundError)):
+        result = await scanner.scan_bytes(b"upload")
+
+    assert result[0] is None
+    assert scanner._cache == {}
+
+
+def test_parse_reply_rejects_errors():
+    with pytest.raises(ClamdError):
+        ClamAVScanner.parse_reply("INSTREAM size limit exceeded. ERROR")
@@ -0,0 +1,66 @@
+import asyncpg
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from utils.search import search_names, resolve_name, find_by_name, did_you_mean
+
+
+@pytest.mark.asyncio
+async def test_search_names_runs_registered_statement():
+    rows = [{"name": "Dragons", "score": 0.6}, {"name": "Dragonflies", "score": 0.4}]
+    with patch("utils.search.db.execute_named", new=AsyncMock(return_value=rows)) as mock_exec:
+        names = await search_names("active_teams", " drag_on% ", limit=3)
+    assert names == ["Dragons", "Dragonflies"]
+    mock_exec.assert_awaited_once_with("search_active_teams", "drag_on%", "%drag\\_on\\%%", 3)
+
+
+@pytest.mark.asyncio
+async def test_search_names_blank_query_skips_db():
+    with patch("utils.search.db.execute_named", new=AsyncMock()) as mock_exec:
+        assert await search_names("rooms", "   ") == []
+    mock_exec.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_search_names_without_pg_trgm_returns_nothing():
+    error = asyncpg.exceptions.UndefinedFunctionError("function similarity(text, text) does not exist")
+    with patch("utils.search.db.execute_named", new=AsyncMock(side_effect=error)):
+        assert await search_names("rooms", "lab") == []
+
+
+@pytest.mark.asyncio
+async def test_resolve_name_accepts_unique_case_insensitive_match():
+    rows = [{"name": "Lab A"}, {"name": "Lab AB"}]
+    with patch("utils.search.db.execute_named", new=AsyncMock(return_value=rows)):
+        assert await resolve_name("rooms", "lab a") == ("Lab A", [])
+
+
+@pytest.mark.asyncio
+async def test_resolve_name_suggests_when_not_exact_or_ambiguous():
+    with patch("utils.search.db.execute_named", new=AsyncMock(return_value=[{"name": "Dragons"}])):
+        assert await resolve_name("active_teams", "dargons") == (None, ["Dragons"])
+
+    rows = [{"name": "Lab A"}, {"name": "LAB A"}]
+    with patch("utils.search.db.execute_named", new=AsyncMock(return_value=rows)):
+        assert await resolve_name("rooms", "lab a") == (None, ["Lab A", "LAB A"])
+
+
+@pytest.mark.asyncio
+async def test_find_by_name_retries_with_stored_spelling_only():
+    fetch = AsyncMock(side_effect=lambda name: [{"id": 1}] if name == "Lab A" else [])
+    with patch("utils.search.resolve_name", new=AsyncMock()) as mock_resolve:
+        assert await find_by_name("rooms", "Lab A", fetch) == ([{"id": 1}], "Lab A", [])
+    mock_resolve.assert_not_awaited()
+
+    with patch("utils.search.resolve_name", new=AsyncMock(return_value=("Lab A", []))):
+        assert await find_by_name("rooms", "lab a", fetch) == ([{"id": 1}], "Lab A", [])
+
+    fetch.reset_mock()
+    with patch("utils.search.resolve_name", new=AsyncMock(return_value=(None, ["Lab A"]))):
+        assert await find_by_name("rooms", "lab", fetch) == ([], "lab", ["Lab A"])
+    fetch.assert_awaited_once_with("lab")
+
+
+def test_did_you_mean():
+    assert did_you_mean([]) == ""
+    assert did_you_mean(["Dragons", "Drakes"]) == " Did you mean `Dragons`, `Drakes`?"
@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from utils.settings import SettingsCache
+
+
+def make_guild():
+    guild = MagicMock()
+    guild.id = 123
+    roles = {1: MagicMock(id=1), 4: MagicMock(id=4)}
+    guild.get_role = MagicMock(side_effect=roles.get)
+    guild.get_channel = MagicMock(return_value=MagicMock(id=9))
+    return guild
+
+
+RECORD = {
+    "guild_id": 123,
+    "student_id": 1,
+    "alumni_id": 2,
+    "friend_id": None,
+    "verified_id": 4,
+    "engineer_channel_id": 9,
+    "verify_channel_id": None,
+}
+
+
+@pytest.mark.asyncio
+async def test_settings_loaded_once_and_resolved():
+    cache = SettingsCache()
+    guild = make_guild()
+    with patch("utils.settings.db.execute_named", new=AsyncMock(return_value=[RECORD])) as mock_exec:
+        first = await cache.get(guild)
+        second = await cache.get(guild)
+    assert mock_exec.await_count == 1
+    assert first.student_role.id == 1
+    assert second.alumni_role is None  # role 2 no longer exists in the guild
+    assert first.friend_role is None
+    assert first.engineer_channel.id == 9
+    assert first.verify_channel is None
+    assert set(first.status_roles()) == {"Student", "Alumni", "Friend", "Verified"}
+
+
+@pytest.mark.asyncio
+async def test_settings_invalidate_reloads():
+    cache = SettingsCache()
+    guild = make_guild()
+    with patch("utils.settings.db.execute_named", new=AsyncMock(return_value=[RECORD])) as mock_exec:
+        await cache.get(guild)
+        cache.invalidate(guild.id)
+        await cache.get(guild)
+    assert mock_exec.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_settings_missing_row_not_cached():
+    cache = SettingsCache()
+    guild = make_guild()
+    with patch("utils.settings.db.execute_named", new=AsyncMock(return_value=[])) as mock_exec:
+        assert await cache.get(guild) is None
+        assert await cache.get(guild) is None
+    assert mock_exec.await_count == 2
@@ -0,0 +1,104 @@
+import pytest
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from utils.conversations import ConversationRouter
+from verification_utils import conversation as conversation_module
+from verification_utils import friend as friend_module
+from verification_utils.friend import FriendVerification
+
+
+def make_message(content, channel_id=10, user_id=1):
+    message = MagicMock()
+    message.content = content
+    message.guild = None
+    message.channel.id = channel_id
+    message.author.id = user_id
+    message.author.bot = False
+    message.attachments = []
+    return message
+
+
+def make_setup():
+    dm = MagicMock(id=10)
+    dm.send = AsyncMock()
+    user = MagicMock(id=1, mention="<@1>")
+    user.create_dm = AsyncMock(return_value=dm)
+
+    friend_dm = MagicMock()
+    friend_dm.send = AsyncMock()
+    friend = MagicMock(id=2, roles=[MagicMock(id=50)])
+    friend.name = "pal"
+    friend.create_dm = AsyncMock(return_value=friend_dm)
+
+    guild = MagicMock()
+    guild.get_member = MagicMock(side_effect=lambda member_id: friend if member_id == 2 else None)
+
+    settings = MagicMock()
+    settings.status_role_ids = MagicMock(return_value={50})
+    settings.friend_role.name = "Friend"
+
+    interaction = MagicMock()
+    interaction.response.send_message = AsyncMock()
+    return user, dm, friend, friend_dm, guild, settings, interaction
+
+
+@contextmanager
+def patched(friend, settings, store=None):
+    store = store or MagicMock(save=AsyncMock(), delete=AsyncMock())
+    with patch.object(conversation_module, "session_store", store), \
+         patch.object(friend_module.member_index, "lookup", return_value=friend), \
+         patch.object(friend_module.settings_cache, "get", new=AsyncMock(return_value=settings)), \
+         patch.object(friend_module, "handle_role_change", new=AsyncMock()) as mock_role, \
+         patch.object(friend_module, "add_user", new=AsyncMock()) as mock_add_user:
+        yield mock_role, mock_add_user
+
+
+async def request_confirmation(router, user, guild, interaction):
+    flow = FriendVerification(user, guild, interaction)
+    await router.begin(flow)
+    assert await router.dispatch(make_message("pal"))
+    assert flow.step == "friend_confirmation"
+    return flow
+
+
+@pytest.mark.asyncio
+async def test_friend_confirmation_grants_role():
+    user, dm, friend, friend_dm, guild, settings, interaction = make_setup()
+    router = ConversationRouter()
+    with patched(friend, settings) as (mock_role, mock_add_user):
+        await request_confirmation(router, user, guild, interaction)
+        view = friend_dm.send.await_args.kwargs["view"]
+        await view.on_result(True)
+
+    mock_role.assert_awaited_once_with(guild, 1, settings.friend_role, settings.status_roles())
+    mock_add_user.assert_awaited_once_with(1, -1)
+    assert "has confirmed your request" in dm.send.await_args.args[0]
+    assert not router.is_active(1)
+
+
+@pytest.mark.asyncio
+async def test_friend_denial_grants_nothing():
+    user, dm, friend, friend_dm, guild, settings, interaction = make_setup()
+    router = ConversationRouter()
+    with patched(friend, settings) as (mock_role, mock_add_user):
+        await request_confirmation(router, user, guild, interaction)
+        await friend_dm.send.await_args.kwargs["view"].on_result(False)
+
+    mock_role.assert_not_awaited()
+    mock_add_user.assert_not_awaited()
+    assert "denied" in dm.send.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_dm_during_friend_confirmation_grants_nothing():
+    user, dm, friend, friend_dm, guild, settings, interaction = make_setup()
+    router = ConversationRouter()
+    with patched(friend, settings) as (mock_role, mock_add_user):
+        flow = await request_confirmation(router, user, guild, interaction)
+        assert not await router.dispatch(make_message("I confirm myself"))
+
+    mock_role.assert_not_awaited()
+    mock_add_user.assert_not_awaited()
+    assert flow.step == "friend_confirmation"
+    assert router.get(1) is flow
@@ -0,0 +1,160 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from utils.conversations import ConversationRouter
+from verification_utils.sessions import VerificationSessionStore, new_code_hash, code_matches
+from verification_utils import conversation as conversation_module
+from verification_utils.conversation import restore_verification
+import verification_utils.student  # noqa: F401  (registers the flow)
+import verification_utils.alumni  # noqa: F401
+import verification_utils.general  # noqa: F401
+from verification_utils import friend as friend_module
+
+
+def test_code_is_stored_only_as_salted_hash():
+    salt, digest = new_code_hash("123456")
+    other_salt, other_digest = new_code_hash("123456")
+
+    assert b"123456" not in digest
+    assert digest != other_digest
+    assert code_matches("123456", salt, digest)
+    assert not code_matches("654321", salt, digest)
+
+
+@pytest.mark.asyncio
+async def test_session_resumes_after_restart():
+    salt, digest = new_code_hash("123456")
+    store = VerificationSessionStore()
+    store.bot = MagicMock()
+    guild = MagicMock()
+    store.bot.get_guild = MagicMock(return_value=guild)
+    store._index[1] = {
+        "user_id": 1, "guild_id": 5, "channel_id": 10, "flow": "student", "step": "code",
+        "code_salt": salt, "code_hash": digest, "attempts": 1, "friend_id": None,
+        "expires_at": datetime.now(timezone.utc) + timedelta(minutes=3),
+    }
+    router = ConversationRouter()
+    router.resolver = restore_verification
+
+    message = MagicMock()
+    message.guild = None
+    message.content = "123456"
+    message.author.id = 1
+    message.author.bot = False
+    message.channel.id = 10
+    message.channel.send = AsyncMock()
+
+    with patch.object(conversation_module, "session_store", store), \
+         patch.object(conversation_module, "conversation_router", router), \
+         patch("verification_utils.sessions.db.execute", new=AsyncMock()) as mock_execute:
+        assert await router.dispatch(message)
+
+    flow = router.get(1)
+    assert flow.step == "years"
+    assert flow.attempts == 1
+    assert "Resuming" in message.channel.send.await_args_list[0].args[0]
+    # The new step was saved without the code or email.
+    saved = mock_execute.await_args.args
+    assert "INSERT INTO verification_sessions" in saved[0]
+    assert "123456" not in [str(value) for value in saved[1:]]
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_in_batches():
+    store = VerificationSessionStore()
+    store.SWEEP_BATCH = 2
+    store._index = {1: {}, 2: {}, 3: {}}
+    batches = [
+        [{"user_id": 1, "channel_id": 10}, {"user_id": 2, "channel_id": 20}],
+        [{"user_id": 3, "channel_id": 30}],
+    ]
+
+    with patch("verification_utils.sessions.db.execute", new=AsyncMock(side_effect=batches)) as mock_execute:
+        expired = await store.sweep()
+
+    assert mock_execute.await_count == 2
+    assert [row["user_id"] for row in expired] == [1, 2, 3]
+    assert store._index == {}
+
+
+def saved_session(flow, step, friend_id=None):
+    store = VerificationSessionStore()
+    store.bot = MagicMock()
+    store._index[1] = {
+        "user_id": 1, "guild_id": 5, "channel_id": 10, "flow": flow, "step": step,
+        "code_salt": None, "code_hash": None, "attempts": 0, "friend_id": friend_id,
+        "expires_at": datetime.now(timezone.utc) + timedelta(minutes=20),
+    }
+    router = ConversationRouter()
+    router.resolver = restore_verification
+    return store, router
+
+
+def dm(content, attachments=()):
+    message = MagicMock()
+    message.guild = None
+    message.content = content
+    message.attachments = list(attachments)
+    message.author.id = 1
+    message.author.bot = False
+    message.channel.id = 10
+    message.channel.send = AsyncMock()
+    return message
+
+
+@pytest.mark.asyncio
+async def test_restored_friend_session_reasks_friend_and_ignores_requester_dm():
+    store, router = saved_session("friend", "friend_confirmation", friend_id=2)
+    friend = MagicMock(id=2)
+    friend.name = "pal"
+    friend.create_dm = AsyncMock(return_value=MagicMock(send=AsyncMock()))
+    guild = MagicMock()
+    guild.get_member = MagicMock(side_effect=lambda member_id: friend if member_id == 2 else None)
+    store.bot.get_guild = MagicMock(return_value=guild)
+    message = dm("yes")
+
+    with patch.object(conversation_module, "session_store", store), \
+         patch.object(conversation_module, "conversation_router", router), \
+         patch("verification_utils.sessions.db.execute", new=AsyncMock()), \
+         patch.object(friend_module, "handle_role_change", new=AsyncMock()) as mock_role, \
+         patch.object(friend_module, "add_user", new=AsyncMock()) as mock_add_user:
+        assert not await router.dispatch(message)
+
+    mock_role.assert_not_awaited()
+    mock_add_user.assert_not_awaited()
+    assert router.get(1).step == "friend_confirmation"
+    friend_dm = friend.create_dm.return_value
+    assert "view" in friend_dm.send.await_args.kwargs
+    assert "re-sent" in message.channel.send.await_args.args[0]
+
+
+@pytest.mark.asyncio
+async def test_restored_alumni_session_waits_for_proof():
+    store, router = saved_session("alumni", "proof")
+    store.bot.get_guild = MagicMock(return_value=MagicMock())
+    message = dm("here it comes")
+
+    with patch.object(conversation_module, "session_store", store), \
+         patch.object(conversation_module, "conversation_router", router), \
+         patch("verification_utils.sessions.db.execute", new=AsyncMock()):
+        assert not await router.dispatch(message)  # No attachment yet
+
+    assert router.get(1).step == "proof"
+    assert "Resuming" in message.channel.send.await_args_list[0].args[0]
+
+
+@pytest.mark.asyncio
+async def test_restored_general_session_takes_email_and_sends_code():
+    store, router = saved_session("general", "email")
+    store.bot.get_guild = MagicMock(return_value=MagicMock())
+    message = dm("someone@example.com")
+
+    with patch.object(conversation_module, "session_store", store), \
+         patch.object(conversation_module, "conversation_router", router), \
+         patch("verification_utils.sessions.db.execute", new=AsyncMock()), \
+         patch.object(conversation_module.email_sender, "send_email", new=AsyncMock(return_value=(True, "sent"))) as mock_send:
+        assert await router.dispatch(message)
+
+    assert mock_send.await_args.args[0] == "someone@example.com"
+    assert router.get(1).step == "code"
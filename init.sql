@@ -1,3 +1,9 @@
+-- Fresh databases only. Later schema changes live in Bot/migrations and are
+-- applied on startup (utils/migrations.py); mirror them here as well.
+
+-- Trigram indexes for typo-tolerant name search (utils/search.py).
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TYPE semester_type AS ENUM ('Fall', 'Summer', 'Spring');
 CREATE TYPE member_status_type AS ENUM ('starter', 'sub');
 
@@ -14,6 +20,13 @@ CREATE TABLE teams (
     archived BOOLEAN DEFAULT FALSE
 );
 
+-- Only active teams are searched, so archived seasons do not grow the index.
+CREATE INDEX teams_team_nick_trgm_idx ON teams USING GIN (team_nick gin_trgm_ops) WHERE archived = FALSE;
+
+-- Reservation commands look up the caller's active team by captain.
+CREATE INDEX teams_captain_active_idx ON teams (captain_discord_id) WHERE archived = FALSE;
+CREATE INDEX teams_archived_idx ON teams (archived);
+
 CREATE TABLE players (
     player_discord_id BIGINT PRIMARY KEY,
     rcsid VARCHAR(50)
@@ -26,6 +39,8 @@ CREATE TABLE team_members (
     PRIMARY KEY (team_id, player_discord_id)
 );
 
+CREATE INDEX team_members_player_idx ON team_members (player_discord_id);
+
 CREATE TABLE admin_roles(
     role_id BIGINT PRIMARY KEY
 );
@@ -59,6 +74,8 @@ CREATE TABLE rooms (
     description VARCHAR(255)
 );
 
+CREATE INDEX rooms_room_name_trgm_idx ON rooms USING GIN (room_name gin_trgm_ops);
+
 CREATE TABLE room_slots (
     slot_id    SERIAL PRIMARY KEY,
     room_id    INT REFERENCES rooms(room_id) ON DELETE CASCADE,
@@ -67,8 +84,52 @@ CREATE TABLE room_slots (
     CHECK (end_time > start_time)
 );
 
+-- /list_rooms pages through upcoming slots by (start_time, slot_id).
+CREATE INDEX room_slots_start_time_idx ON room_slots (start_time, slot_id);
+CREATE INDEX room_slots_room_start_idx ON room_slots (room_id, start_time);
+
 CREATE TABLE room_reservations (
     reservation_id SERIAL PRIMARY KEY,
     slot_id        INT UNIQUE REFERENCES room_slots(slot_id) ON DELETE CASCADE,
     team_id        INT REFERENCES teams(team_id) ON DELETE CASCADE
 );
+
+-- Outbound mail waiting to be sent. Rows are deleted once delivered or dropped.
+CREATE TABLE email_outbox (
+    id              SERIAL PRIMARY KEY,
+    recipient       VARCHAR(255) NOT NULL,
+    subject         VARCHAR(255) NOT NULL,
+    body            TEXT NOT NULL,
+    priority        SMALLINT NOT NULL DEFAULT 10,
+    status          VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts        INT NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    claimed_at      TIMESTAMPTZ,
+    last_error      TEXT,
+    created_at      TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX email_outbox_due_idx ON email_outbox (priority, id) WHERE status = 'pending';
+
+-- Emails sent per UTC day, for the provider's daily sending limit.
+CREATE TABLE email_quota (
+    day  DATE PRIMARY KEY,
+    sent INT NOT NULL DEFAULT 0
+);
+
+-- In-progress DM verifications, so they survive restarts. No email address or
+-- RCSID is stored; only a salted hash of the emailed code.
+CREATE TABLE verification_sessions (
+    user_id    BIGINT PRIMARY KEY,
+    guild_id   BIGINT NOT NULL,
+    channel_id BIGINT NOT NULL,
+    flow       VARCHAR(20) NOT NULL,
+    step       VARCHAR(30) NOT NULL,
+    code_salt  BYTEA,
+    code_hash  BYTEA,
+    attempts   INT NOT NULL DEFAULT 0,
+    friend_id  BIGINT,
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX verification_sessions_expires_idx ON verification_sessions (expires_at);